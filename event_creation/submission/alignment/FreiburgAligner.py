@@ -1,11 +1,13 @@
 import numpy as np
-import pandas as pd
-import scipy.stats
 import os
 
 import json
 from ..exc import AlignmentError
 from ..log import logger
+from ..lazy import lazy_import
+
+pd = lazy_import('pandas')
+stats = lazy_import('scipy.stats')
 
 
 class FreiburgAligner:
@@ -106,11 +108,11 @@ class FreiburgAligner:
         eeg_pulse_ms = np.array(eeg_pulse_ms)
         matching_task_times, matching_eeg_times, max_residual= \
             cls.get_matching_pulses(task_pulse_ms, eeg_pulse_ms)
-        slope, intercept, r, p, err = scipy.stats.linregress(matching_task_times, matching_eeg_times)
+        slope, intercept, r, p, err = stats.linregress(matching_task_times, matching_eeg_times)
         prediction = matching_task_times * slope + intercept
         residual = matching_eeg_times - prediction
-        logger.debug('Slope: {0}\nIntercept: {1}\nStd. Err: {2}\nMax residual: {3}\nMin residual: {4}'\
-            .format(slope, intercept, err, max(residual), min(residual)))
+        logger.debug('Slope: {0}\nIntercept: {1}\nStd. Err: {2}\nMax residual: {3}\nMin residual: {4}',
+                     slope, intercept, err, max(residual), min(residual))
         return slope, intercept
 
 
@@ -145,12 +147,12 @@ class FreiburgAligner:
         prediction_start = slope_start * task_pulse_ms[task_start_range[0]: task_start_range[1]] + intercept_start
         residuals_start = eeg_pulse_ms[eeg_start_range[0]: eeg_start_range[1]] - prediction_start
         max_residual_start = max(abs(residuals_start))
-        logger.debug('Max residual start %.1f' % max_residual_start)
+        logger.debug('Max residual start {:.1f}', max_residual_start)
 
         prediction_end = slope_end * task_pulse_ms[task_end_range[0]: task_end_range[1]] + intercept_end
         residuals_end = eeg_pulse_ms[eeg_end_range[0]: eeg_end_range[1]] - prediction_end
         max_residual_end = max(abs(residuals_end))
-        logger.debug('Max residual end %.1f;' % max_residual_end)
+        logger.debug('Max residual end {:.1f};', max_residual_end)
 
         max_residual = max(max_residual_start, max_residual_end)
 
@@ -174,7 +176,7 @@ class FreiburgAligner:
         :param y:
         :return: slope, intercept
         """
-        return scipy.stats.linregress(x, y)
+        return stats.linregress(x, y)
 
     @classmethod
     def find_matching_window(cls, eeg_diff, task_diff, from_front=True, alignment_window=None):
@@ -214,7 +216,7 @@ class FreiburgAligner:
             if alignment_window - cls.ALIGNMENT_WINDOW_STEP < cls.MIN_ALIGNMENT_WINDOW:
                 raise AlignmentError("Could not align window")
             else:
-                logger.warn('Reducing align window to {}'.format(alignment_window - cls.ALIGNMENT_WINDOW_STEP))
+                logger.warn('Reducing align window to {}', alignment_window - cls.ALIGNMENT_WINDOW_STEP)
                 return cls.find_matching_window(eeg_diff, task_diff, from_front,
                                                 alignment_window - cls.ALIGNMENT_WINDOW_STEP)
 
@@ -1,9 +1,11 @@
 import os
-import mne
 import glob
 import numpy as np
-import pandas as pd
 from ..log import logger
+from ..lazy import lazy_import
+
+mne = lazy_import('mne')
+pd = lazy_import('pandas')
 
 
 class LTPAligner:
@@ -96,7 +98,7 @@ class LTPAligner:
 
         # Align each EEG file
         for basename in self.eeg:
-            logger.debug('Calculating alignment for recording, ' + basename)
+            logger.debug('Calculating alignment for recording, {}', basename)
 
             # Reset ephys sync pulse info and get the sample rate and length of recording for the current file
             self.num_samples = self.eeg[basename].n_times
@@ -121,7 +123,7 @@ class LTPAligner:
                     self.pulses = mne.find_events(self.eeg[basename], stim_channel='STI 014', output=time_type, shortest_event=1)[:, 0]
 
             # Skip alignment for any EEG files with no sync pulses
-            logger.debug('%d sync pulses were detected.' % len(self.pulses))
+            logger.debug('{} sync pulses were detected.', len(self.pulses))
             if len(self.pulses) == 0:
                 logger.warn('No sync pulses were detected in %s. Unable to align behavioral and EEG data.' % basename)
                 continue
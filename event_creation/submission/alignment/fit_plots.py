@@ -0,0 +1,161 @@
+"""
+Deferred plotting of alignment fits.
+
+Aligners only save the data behind each fit (x, y, slope, intercept, residuals) to a small .plotdata.npz file, so
+alignment never has to import or wait on matplotlib. The figures are rendered afterwards from those files, either on
+demand:
+
+    python -m event_creation.submission.alignment.fit_plots <directory> [<directory> ...]
+
+by the AlignmentPlotTask stage of an events pipeline (submit with --plot-alignment), or in a background thread with
+render_fit_plots_async.
+"""
+import glob
+import os
+import threading
+
+import numpy as np
+
+from ..log import logger
+
+# Distinct from other .npz outputs that may share the processed directory
+FIT_FILE_EXT = '.plotdata.npz'
+PLOT_FILE_EXT = '.png'
+
+FIT_KIND = 'fit'
+BAR_KIND = 'bar'
+
+
+def fit_filename(plot_save_dir, plot_save_label):
+    return os.path.join(plot_save_dir, '{label}_fit{ext}'.format(label=plot_save_label, ext=FIT_FILE_EXT))
+
+
+def save_fit(plot_save_dir, plot_save_label, x, y, coefficients):
+    """
+    Saves the data describing a fit so that it can be plotted later
+    :param plot_save_dir: Where to save the fit. Nothing is saved if this is None
+    :param plot_save_label: What to name the saved fit (and eventually the plot)
+    :param x: source times
+    :param y: destination times
+    :param coefficients: (slope, intercept)
+    :return: path to the saved file, or None if nothing was saved
+    """
+    if not plot_save_dir:
+        return None
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    residuals = y - (coefficients[0] * x + coefficients[1])
+    filename = fit_filename(plot_save_dir, plot_save_label)
+    try:
+        np.savez_compressed(filename, kind=FIT_KIND, x=x, y=y, slope=coefficients[0], intercept=coefficients[1],
+                            residuals=residuals)
+    except Exception:
+        logger.debug("Could not save fit {}", plot_save_label)
+        return None
+    return filename
+
+
+def save_bar(plot_save_dir, plot_save_label, values, ylabel='', title=''):
+    """
+    Saves a set of values to be plotted later as a bar chart
+    :param plot_save_dir: Where to save the values. Nothing is saved if this is None
+    :param plot_save_label: What to name the saved values (and eventually the plot)
+    :param values: heights of the bars
+    :param ylabel: y-axis label of the eventual plot
+    :param title: title of the eventual plot
+    :return: path to the saved file, or None if nothing was saved
+    """
+    if not plot_save_dir:
+        return None
+    filename = os.path.join(plot_save_dir, '{label}{ext}'.format(label=plot_save_label, ext=FIT_FILE_EXT))
+    try:
+        np.savez_compressed(filename, kind=BAR_KIND, values=np.atleast_1d(values), ylabel=ylabel, title=title)
+    except Exception:
+        logger.debug("Could not save values for plot {}", plot_save_label)
+        return None
+    return filename
+
+
+def render_fit_file(fit_file, overwrite=False):
+    """
+    Renders the plot for a single file saved by save_fit or save_bar, next to that file
+    :param fit_file: path to the saved data file
+    :param overwrite: Re-render even if the plot already exists
+    :return: path to the rendered plot
+    """
+    # Figure/FigureCanvasAgg rather than pyplot, so that rendering is safe from a background thread
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    plot_file = fit_file[:-len(FIT_FILE_EXT)] + PLOT_FILE_EXT
+    if os.path.exists(plot_file) and not overwrite:
+        return plot_file
+
+    data = np.load(fit_file)
+    kind = str(data['kind'])
+    if kind == FIT_KIND:
+        x = data['x']
+        fit = data['slope'] * x + data['intercept']
+        fig = Figure(figsize=(20, 10))
+        ax = fig.add_subplot(121)
+        ax.plot(x, data['y'], 'g.', x, fit, 'b-')
+        ax.set_title("EEG Samples vs Timestamps")
+        ax.set_xlabel("Timestamp (ms)")
+        ax.set_ylabel("EEG Samples")
+        ax.set_xlim(x.min(), x.max())
+
+        ax = fig.add_subplot(122)
+        ax.plot(x, data['residuals'], 'g.-', [x.min(), x.max()], [0, 0], 'k-')
+        ax.set_title("Fit residuals")
+        ax.set_xlabel("Timestamp (ms)")
+        ax.set_ylabel("Best-fit residuals")
+        ax.set_xlim(x.min(), x.max())
+    elif kind == BAR_KIND:
+        values = data['values']
+        fig = Figure()
+        ax = fig.add_subplot(111)
+        ax.bar(np.arange(len(values)), values)
+        ax.set_ylabel(str(data['ylabel']))
+        ax.set_title(str(data['title']))
+    else:
+        raise ValueError('Unknown plot kind {} in {}'.format(kind, fit_file))
+
+    FigureCanvasAgg(fig).print_figure(plot_file)
+    return plot_file
+
+
+def render_fit_plots(plot_save_dir, overwrite=False):
+    """
+    Renders every saved fit in a directory
+    :param plot_save_dir: directory containing files written by save_fit or save_bar
+    :param overwrite: Re-render plots that already exist
+    :return: list of rendered plots
+    """
+    rendered = []
+    for fit_file in sorted(glob.glob(os.path.join(plot_save_dir, '*' + FIT_FILE_EXT))):
+        try:
+            rendered.append(render_fit_file(fit_file, overwrite))
+        except Exception as e:
+            logger.warn('Could not render plot for {}: {}'.format(fit_file, e))
+    return rendered
+
+
+def render_fit_plots_async(plot_save_dir, overwrite=False):
+    """
+    Renders every saved fit in a directory from a background thread
+    :param plot_save_dir: directory containing files written by save_fit or save_bar
+    :param overwrite: Re-render plots that already exist
+    :return: the (started) rendering thread
+    """
+    thread = threading.Thread(target=render_fit_plots, args=(plot_save_dir, overwrite),
+                              name='render_fit_plots')
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+if __name__ == '__main__':
+    import sys
+    for directory in sys.argv[1:]:
+        for plot in render_fit_plots(directory):
+            print(plot)
@@ -3,15 +3,17 @@ import json
 import os
 from copy import deepcopy
 
-import matplotlib.pyplot as plt
 import numpy as np
-import scipy.stats
 
 from ..exc import AlignmentError
+from .fit_plots import save_fit, save_bar
 from ..readers.eeg_reader import NSx_reader
 from ..readers.eeg_reader import read_jacksheet
 from ..log import logger
-from ..parsers.system2_log_parser import System2LogParser
+from ..parsers.system2_log_parser import System2LogParser, read_host_log
+from ..lazy import lazy_import
+
+stats = lazy_import('scipy.stats')
 
 
 def System2Aligner(events, files, plot_save_dir=None):
@@ -39,8 +41,6 @@ class System2TaskAligner(object):
     NP_TIME_FIELD = 'eegoffset'  # Field which describes sample on EG system
     EEG_FILE_FIELD = 'eegfile'   # Field containing name of eeg file in events structure
 
-    PLOT_SAVE_FILE_EXT = '.png'
-
     def __init__(self, events, files, plot_save_dir=None):
         """
         Constructor
@@ -149,14 +149,19 @@ class System2TaskAligner(object):
         """
         # Get the nsx files which were used in the session
         nsx_infos = self.get_used_nsx_files()
-        full_mask = np.zeros(events[self.EEG_FILE_FIELD].shape)
-        # Find the events which occurred between the start and end of the recording
-        for info, host_start in \
-                zip(nsx_infos, self.host_time_np_starts):
-            mask = np.logical_and(host_times > host_start,
-                                  host_times < (host_start + info['n_samples'] * float(info['sample_rate']) / 1000))
-            full_mask = np.logical_or(full_mask, mask)
-            events[self.EEG_FILE_FIELD][mask] = info['name']
+        n_recordings = min(len(nsx_infos), len(self.host_time_np_starts))
+        if n_recordings == 0:
+            return
+        names = np.array([info['name'] for info in nsx_infos[:n_recordings]])
+        host_starts = np.array(self.host_time_np_starts[:n_recordings], dtype=float)
+        host_ends = host_starts + np.array([info['n_samples'] * float(info['sample_rate']) / 1000
+                                            for info in nsx_infos[:n_recordings]])
+        # Each event belongs to the last recording that started before it, if it occurred before that one ended
+        order = np.argsort(host_starts, kind='stable')
+        host_times = np.asarray(host_times, dtype=float)
+        recordings = order[np.maximum(np.searchsorted(host_starts[order], host_times, side='left') - 1, 0)]
+        mask = (host_times > host_starts[recordings]) & (host_times < host_ends[recordings])
+        events[self.EEG_FILE_FIELD][mask] = names[recordings[mask]]
 
     def get_used_nsx_files(self):
         """
@@ -190,25 +195,17 @@ class System2TaskAligner(object):
         best_index = np.argmin(errors)
 
         if errors[best_index] == 'NaN':
-            logger.debug("nsx file lengths: {}".format([nsx_file['n_samples'] * float(nsx_file['sample_rate'] / 1000) for nsx_file in self.all_nsx_info]))
-            logger.debug("host time start differences: {}".format([x for x in diff_np_starts]))
+            logger.debug("nsx file lengths: {}", [nsx_file['n_samples'] * float(nsx_file['sample_rate'] / 1000) for nsx_file in self.all_nsx_info])
+            logger.debug("host time start differences: {}", [x for x in diff_np_starts])
             raise AlignmentError('Could not find recording long enough to match events')
 
         if len(self.host_time_np_starts) > 1:
             min_errors = errors[best_index]
             if min_errors > 10000:
                 raise AlignmentError('Guess at beginning of recording inaccurate by over ten seconds (%d ms)' % min_errors)
-            plt.clf()
-            fig, ax = plt.subplots()
-            error_indices = np.arange(len(min_errors)) if isinstance(min_errors, list) else 1
-            ax.bar(error_indices, min_errors)
-            ax.set_ylabel('Error in estimated time difference between start of recordings')
-            ax.set_title('Accuracy of multiple-nsx file match-up')
-            try:
-                plt.savefig(os.path.join(self.plot_save_dir, 'multi-ns2{ext}'.format(ext=self.PLOT_SAVE_FILE_EXT)))
-            except Exception:
-                logger.log('Could not save plot')
-            plt.close()
+            save_bar(self.plot_save_dir, 'multi-ns2', min_errors,
+                     ylabel='Error in estimated time difference between start of recordings',
+                     title='Accuracy of multiple-nsx file match-up')
 
         return nsx_file_combinations[best_index]
 
@@ -264,13 +261,16 @@ class System2TaskAligner(object):
         :param okay_no_align_up_to: Up to n=this event, it is okay if alignment doesn't occur
         :return: times aligned to destination
         """
+        time_source = np.asarray(time_source)
         time_dest = np.full(len(time_source), np.nan)
         time_dest[time_source == -1] = -1
-        for (task_start, task_end, coefficient) in zip(starts[:-1], starts[1:], coefficients):
-            time_mask = (time_source >= task_start) & (time_source < task_end)
-            time_dest[time_mask] = cls.apply_coefficients(time_source[time_mask], coefficient)
-        time_mask = time_source >= starts[-1]
-        time_dest[time_mask] = cls.apply_coefficients(time_source[time_mask], coefficients[-1])
+        # Each time is converted with the coefficients of the last start at or before it (the final coefficients
+        # apply from the last start onwards)
+        segments = np.searchsorted(starts, time_source, side='right') - 1
+        segments[segments == len(starts) - 1] = len(coefficients) - 1
+        time_mask = (segments >= 0) & (segments < len(coefficients)) & ~np.isnan(time_source)
+        slopes, intercepts = np.array([coefficient[:2] for coefficient in coefficients], dtype=float).T
+        time_dest[time_mask] = slopes[segments[time_mask]] * time_source[time_mask] + intercepts[segments[time_mask]]
         still_nans = np.where(np.isnan(time_dest))[0]
         if len(still_nans) > 0:
             if (np.array(still_nans) <= okay_no_align_up_to).all():
@@ -313,11 +313,11 @@ class System2TaskAligner(object):
         """
         # Get NEUROPORT-TIMEs from host file
         [host_times, np_tics] = System2LogParser.get_columns_by_type(host_log_file, 'NEUROPORT-TIME', [0, 2], int)
-        if (not host_times and not np_tics):
-            logger.debug('No NEUROPORT-TIMEs in %s' % host_log_file)
+        if len(host_times) == 0:
+            logger.debug('No NEUROPORT-TIMEs in {}', host_log_file)
             return [], [], []
         if len(host_times) == 1:
-            logger.debug('Only one NEUROPORT-TIME in {}. Skipping.'.format(host_log_file), 'WARNING')
+            logger.debug('Only one NEUROPORT-TIME in {}. Skipping.', host_log_file)
 
         # "samples" from host log are actually tics of internal np counter. Convert those to actual samples
         np_times = cls.tics_to_samples(np_tics, nsx_file)
@@ -347,20 +347,18 @@ class System2TaskAligner(object):
         :param np_times: List of all neuroport times
         :return: (host times split by neuroport resets, neuroport times split by neuroport resets)
         """
-        # Get the times at which the neuroport recording restarted
-        resets = np.concatenate([[0], np.where(np.diff(np_times) < 0)[0] + 1])
-        split_host = []
-        split_np = []
+        host_times = np.asarray(host_times)
+        np_times = np.asarray(np_times)
 
-        # Add each reset
-        for start, end in zip(resets[:-1], resets[1:]):
-            split_host.append(host_times[start:end-1])
-            split_np.append(np_times[start:end-1])
-
-        # Then one more for the last reset till the end of the file
-        split_host.append(host_times[resets[-1]:])
-        split_np.append(np_times[resets[-1]:])
-        return split_host, split_np
+        # Get the times at which the neuroport recording restarted
+        resets = np.flatnonzero(np.diff(np_times) < 0) + 1
+        # The last time before each reset is left out of its recording
+        kept = np.ones(len(np_times), dtype=bool)
+        kept[resets - 1] = False
+        kept_indices = np.flatnonzero(kept)
+        # Position of each reset among the kept times
+        boundaries = np.searchsorted(kept_indices, resets)
+        return np.split(host_times[kept], boundaries), np.split(np_times[kept], boundaries)
 
     @classmethod
     def tics_to_samples(cls, np_tics, nsx_file):
@@ -392,7 +390,7 @@ class System2TaskAligner(object):
             return [], [], []
 
         # Task times are just host times minus offsets
-        task_times = np.array(host_times) - np.array(offsets)
+        task_times = host_times - offsets
         coefficients = self.get_fit(task_times, host_times)
 
         # Get the times at which these started and stop applying
@@ -414,34 +412,22 @@ class System2TaskAligner(object):
         :param y:
         :return: slope, intercept
         """
-        coefficients = scipy.stats.linregress(x, y)
+        coefficients = stats.linregress(x, y)
         return coefficients[:2]
 
     @classmethod
     def plot_fit(cls, x, y, coefficients, plot_save_dir, plot_save_label):
         """
-        Plots a fit between two values (both plotting fit itself and residuals
+        Saves the data describing a fit between two values, so that the fit and its residuals can be plotted later
+        (see alignment.fit_plots)
         :param x:
         :param y:
         :param coefficients:
-        :param plot_save_dir: Where to save the plot
-        :param plot_save_label: What to name the saved plot
+        :param plot_save_dir: Where to save the fit. Nothing is saved if None
+        :param plot_save_label: What to name the saved fit
         :return: None
         """
-        fit = coefficients[0] * np.array(x) + coefficients[1]
-        if plot_save_dir:
-            plt.clf()
-            plt.plot(x, y, 'g.', x, fit, 'b-')
-            plt.savefig(os.path.join(plot_save_dir, '{label}_fit{ext}'.format(label=plot_save_label,
-                                                                              ext=cls.PLOT_SAVE_FILE_EXT)))
-            plt.show()
-
-        if plot_save_dir:
-            plt.clf()
-            plt.plot(x, y-fit, 'g-', [min(x), max(x)], [0, 0], 'k-')
-            plt.savefig(os.path.join(plot_save_dir, '{label}_residuals{ext}'.format(label=plot_save_label,
-                                                                              ext=cls.PLOT_SAVE_FILE_EXT)))
-            plt.show()
+        save_fit(plot_save_dir, plot_save_label, x, y, coefficients)
 
 
 
@@ -476,10 +462,6 @@ class System2HostAligner(System2TaskAligner):
             self.host_log_files = sorted(host_log_files)
         else:
             self.host_log_files = [host_log_files]
-        contents = []
-        for host_log_file in self.host_log_files:
-            contents += [line.strip().split('~')
-                         for line in open(host_log_file).readlines()]
 
         eeg_sources = json.load(open(files['eeg_sources']))
 
@@ -488,11 +470,12 @@ class System2HostAligner(System2TaskAligner):
         np_earliest_start = first_eeg_source['start_time_ms']
         host_offset = None
 
-        for split_line in contents:
-            # Look for the first NEUROPORT-TIME in the file.
-            if split_line[1] == 'NEUROPORT-TIME':
+        for host_log_file in self.host_log_files:
+            # Look for the first NEUROPORT-TIME in the files.
+            host_times, np_tics = System2LogParser.get_columns_by_type(host_log_file, 'NEUROPORT-TIME', [0, 2], int)
+            if len(host_times) > 0:
                 # Start time of the recording is the host time minus that neuroport time divided by 30 (b/c 30 KHz)
-                np_start_host = int(split_line[0]) - int(split_line[2]) / 30
+                np_start_host = int(host_times[0]) - int(np_tics[0]) / 30
                 host_offset = np_start_host - np_earliest_start
                 break
 
@@ -508,8 +491,8 @@ class System2HostAligner(System2TaskAligner):
         :param plot_save_dir:
         :return: coefficients to align host to epoch
         """
-        split_lines = [line.split('~') for line in open(host_log_file)]
-        return [[1, self.host_offset]], [int(split_lines[0][0])], [int(split_lines[-1][0])]
+        lines = read_host_log(host_log_file).lines
+        return [[1, self.host_offset]], [int(lines[0].split('~')[0])], [int(lines[-1].split('~')[0])]
 
     def stim_event_to_mstime(self, stim_event):
         """
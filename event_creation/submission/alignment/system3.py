@@ -2,13 +2,12 @@ import json
 import os
 from copy import deepcopy
 
-import matplotlib.pyplot as plt
 import numpy as np
-import scipy.stats
 
 from ..log import logger
 from ..parsers.system3_log_parser import System3LogParser
 from ..exc import AlignmentError
+from .fit_plots import save_fit
 import itertools
 
 
@@ -26,6 +25,10 @@ class System3Aligner(object):
                    )
     TO_LABELS = ('t_event', 't0')
 
+    # Above this many pulse pairs, the Theil-Sen slope is estimated from a seeded sample of pairs
+    MAX_FIT_PAIRS = 500000
+    FIT_RANDOM_SEED = 0
+
     def __init__(self, events, files, plot_save_dir=None):
 
         self.files = files
@@ -41,6 +44,11 @@ class System3Aligner(object):
         self.session_attrs['files'] = files
 
         self.residuals =  []
+
+        # Parse each event log once; every label combination below is pulled from these columns
+        log_fields = set(label for label, _, _ in self.FROM_LABELS) | set(self.TO_LABELS) | {'offset'}
+        self.event_log_columns = [self.read_event_log(event_log, log_fields) for event_log in self.events_logs]
+
         # vocalization_events = VocalizationParser(**session_attrs).parse()
         # if vocalization_events.shape:
         #     self.merged_events = np.concatenate([self.events,vocalization_events]).view(np.recarray).sort('mstime')
@@ -52,14 +60,14 @@ class System3Aligner(object):
                     self.get_coefficients_from_event_log(from_label, 'offset', from_rate,exclude)
                 self.host_to_ens_coefs, self.host_ends = \
                     self.get_coefficients_from_event_log(to_label, 'offset', 1,exclude)
-                logger.debug("Found coefficient with label {}".format(from_label))
+                logger.debug("Found coefficient with label {}", from_label)
             except KeyError as key_error:
                 if key_error.message != from_label:
                     raise
-                logger.debug("Couldn't find coefficient with label {}".format(from_label))
+                logger.debug("Couldn't find coefficient with label {}", from_label)
                 continue
             except AlignmentError as ae:
-                logger.debug("Couldn't align coefficient with label {}".format(from_label))
+                logger.debug("Couldn't align coefficient with label {}", from_label)
                 continue
             self.label = from_label
             self.from_multiplier = from_rate
@@ -109,17 +117,18 @@ class System3Aligner(object):
         ends = []
         coefs = []
 
-        for i, event_log in enumerate(self.events_logs):
+        for i, columns in enumerate(self.event_log_columns):
 
-            event_dict = json.load(open(event_log))['events']
+            if from_label not in columns or to_label not in columns:
+                continue
 
-            froms = [float(event[from_label]) * 1000. / rate for event in event_dict \
-                    if from_label in event and to_label in event and event['event_label'] not in exclude]
-            tos = [float(event[to_label]) for event in event_dict\
-                   if from_label in event and to_label in event and event['event_label'] not in exclude]
+            froms = columns[from_label]
+            tos = columns[to_label]
+            not_excluded = np.array([label not in exclude for label in columns['event_label']], dtype=bool)
+            has_both = ~np.isnan(froms) & ~np.isnan(tos) & not_excluded
 
-            froms = np.array(froms)
-            tos = np.array(tos)
+            froms = froms[has_both] * 1000. / rate
+            tos = tos[has_both]
 
             froms = froms[tos > 0]
             tos = tos[tos > 0]
@@ -127,19 +136,19 @@ class System3Aligner(object):
             if len(froms) <= 1:
                 continue
 
-            coefs.append(scipy.stats.theilslopes(x=froms, y=tos)[:2])
+            coefs.append(self.get_fit(froms, tos))
             ends.append(froms[-1])
 
-            self.plot_fit(froms, tos, coefs[-1], '.', 'fit_{}_{}_{}'.format(from_label,to_label,i))
+            self.plot_fit(froms, tos, coefs[-1], self.plot_save_dir, 'fit_{}_{}_{}'.format(from_label,to_label,i))
             residuals = self.check_fit(froms, tos, coefs[-1])
 
             if from_label == 'orig_timestamp':
-                for time,residue in zip(froms,residuals):
-                    at_time = self.events['mstime']==time
-                    if at_time.any():
-                        new_event = self.events[at_time]
-                        new_event['msoffset'] = int(residue)
-                        self.events[at_time] = new_event
+                # The last residual for a repeated timestamp wins, as when these were assigned one at a time
+                residue_by_time = dict(zip(froms, residuals))
+                at_times = np.isin(self.events['mstime'], list(residue_by_time.keys()))
+                if at_times.any():
+                    self.events['msoffset'][at_times] = [int(residue_by_time[time])
+                                                         for time in self.events['mstime'][at_times]]
 
 
         if len(coefs) == 0:
@@ -147,6 +156,52 @@ class System3Aligner(object):
 
         return np.array(coefs), np.array(ends)
 
+    @staticmethod
+    def read_event_log(event_log, fields):
+        """
+        Reads an event log into columns, so that it only has to be parsed once per session
+        :param event_log: path to an event_log.json file
+        :param fields: numeric fields to extract. Events without a field get NaN in that column
+        :return: dictionary of field -> array, plus 'event_label' -> array of labels.
+                 Fields that appear in no event are left out.
+        """
+        with open(event_log) as f:
+            event_dicts = json.load(f)['events']
+        columns = {'event_label': np.array([event.get('event_label') for event in event_dicts], dtype=object)}
+        for field in fields:
+            if any(field in event for event in event_dicts):
+                columns[field] = np.array([float(event[field]) if event.get(field) is not None else np.nan
+                                           for event in event_dicts], dtype=float)
+        return columns
+
+    @classmethod
+    def get_fit(cls, x, y):
+        """
+        Theil-Sen fit between x and y: the median slope over pairs of points, and the intercept through the medians.
+        Identical to scipy.stats.theilslopes for up to MAX_FIT_PAIRS pairs. Past that, the median is taken over
+        MAX_FIT_PAIRS randomly drawn pairs (with a fixed seed, so repeated runs align identically) plus the pairs
+        that split the x-sorted points in half, which keeps long sessions at O(n log n).
+        :param x:
+        :param y:
+        :return: slope, intercept
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        n = len(x)
+        if n * (n - 1) // 2 <= cls.MAX_FIT_PAIRS:
+            first, second = np.triu_indices(n, 1)
+        else:
+            rng = np.random.RandomState(cls.FIT_RANDOM_SEED)
+            order = np.argsort(x, kind='mergesort')
+            half = n // 2
+            first = np.concatenate([order[:half], rng.randint(0, n, cls.MAX_FIT_PAIRS)])
+            second = np.concatenate([order[half:2 * half], rng.randint(0, n, cls.MAX_FIT_PAIRS)])
+        delta_x = x[second] - x[first]
+        different_x = delta_x != 0
+        slope = np.median((y[second] - y[first])[different_x] / delta_x[different_x])
+        intercept = np.median(y) - slope * np.median(x)
+        return slope, intercept
+
     def align(self, start_type=None):
 
         new_events = deepcopy(self.merged_events)
@@ -256,36 +311,16 @@ class System3Aligner(object):
     @classmethod
     def plot_fit(cls, x, y, coefficients, plot_save_dir, plot_save_label):
         """
-        Plots a fit between two values (both plotting fit itself and residuals
+        Saves the data describing a fit between two values, so that the fit and its residuals can be plotted later
+        (see alignment.fit_plots)
         :param x:
         :param y:
         :param coefficients:
-        :param plot_save_dir: Where to save the plot
-        :param plot_save_label: What to name the saved plot
+        :param plot_save_dir: Where to save the fit. Nothing is saved if None
+        :param plot_save_label: What to name the saved fit
         :return: None
         """
-        fit = coefficients[0] * np.array(x) + coefficients[1]
-        plt.figure(figsize=(20,10))
-        plt.subplot(121)
-        plt.plot(x, y, 'g.', x, fit, 'b-')
-        plt.title("EEG Samples vs Tim   estamps")
-        plt.xlabel("Timestamp (ms)")
-        plt.ylabel("EEG Samples")
-        plt.xlim(min(x), max(x))
-
-        plt.subplot(122)
-        plt.plot(x, y - fit, 'g.-', [min(x), max(x)], [0, 0], 'k-')
-        plt.title("Fit residuals")
-        plt.xlabel("Timestamp (ms)")
-        plt.ylabel("Best-fit residuals")
-        plt.xlim(min(x), max(x))
-        try:
-            plt.savefig(os.path.join(plot_save_dir, '{label}_fit{ext}'.format(label=plot_save_label,
-                                                                                ext='.png')))
-        except Exception:
-            logger.debug("Could not save plot %s"%plot_save_label)
-        plt.show()
-        plt.close()
+        save_fit(plot_save_dir, plot_save_label, x, y, coefficients)
 
 
 class System3FourAligner(System3Aligner):
@@ -1,10 +1,84 @@
+import ast
 import os
-import mne
 import glob
 import numpy as np
-import pandas as pd
 import json
+from ..exc import AlignmentError
 from ..log import logger
+from ..readers.eeg_reader import read_edf_header
+
+# Entries of a JSONL log that are collected by read_sync_markers
+SYNC_MARKER_TYPES = ('HEARTBEAT', 'EEGSTART', 'SYNC')
+
+
+def decode_message(message):
+    """
+    Decodes a network message embedded in a UnityEPL session log
+
+    :param message: The message, either already decoded or as a JSON string
+    :return: dictionary of the message's fields, or None if it could not be decoded
+    """
+    if isinstance(message, dict):
+        return message
+    try:
+        decoded = json.loads(message)
+    except (TypeError, ValueError):
+        # Some task versions log messages as Python dictionaries (single quotes, True/False) rather than JSON
+        try:
+            decoded = ast.literal_eval(message)
+        except (SyntaxError, ValueError):
+            return None
+    return decoded if isinstance(decoded, dict) else None
+
+
+def read_sync_markers(logfile, network=False, types=SYNC_MARKER_TYPES):
+    """
+    Reads the times of all sync markers (heartbeats, EEGSTART, ...) from a JSONL log in a single pass, without loading
+    the rest of the log. Blank lines are skipped; the log itself is never modified.
+
+    :param logfile: The filepath for the .jsonl log (e.g. event.log from system 4, or a UnityEPL session.jsonl)
+    :param network: If True, markers are read from the network messages that the task sent (as logged in UnityEPL
+                    session logs) rather than from the entries of the log
+    :param types: The types of markers to collect
+    :return: dictionary of marker type -> 1-D numpy array of the mstimes of those markers, in the order logged
+    """
+    # Lines are only decoded if they might hold a marker
+    needles = ('network',) if network else types
+    markers = {marker_type: [] for marker_type in types}
+    n_malformed = 0
+    with open(logfile, 'r') as f:
+        for line in f:
+            if not line.strip() or not any(needle in line for needle in needles):
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                n_malformed += 1
+                continue
+            if network:
+                data = entry.get('data')
+                if entry.get('type') != 'network' or not isinstance(data, dict) or str(data.get('sent')) != 'True':
+                    continue
+                entry = decode_message(data.get('message'))
+                if entry is None:
+                    continue
+            if entry.get('type') in markers:
+                markers[entry['type']].append(entry['time'])
+    if n_malformed > 0:
+        logger.warn('Skipped %d malformed lines of %s' % (n_malformed, logfile))
+    return {marker_type: np.array(times) for marker_type, times in markers.items()}
+
+
+def eegstart_from_markers(markers, logfile):
+    """
+    :param markers: output of read_sync_markers
+    :param logfile: The log the markers were read from
+    :return: the mstime of the first EEGSTART
+    """
+    if len(markers['EEGSTART']) == 0:
+        raise AlignmentError('No EEGSTART in %s' % logfile)
+    return markers['EEGSTART'][0]
+
 
 class System4Offset:
     def __init__(self, events, files, eeg_dir):
@@ -14,7 +88,8 @@ class System4Offset:
         self.eeg_file_stem = list(eeg_sources.keys())[0]
         self.eeg_log = files['event_log'][0]
         self.eeg_file = glob.glob(os.path.join(eeg_dir, '*.edf'))[0]
-        self.eeg = mne.io.read_raw_edf(self.eeg_file, preload=True)
+        # Only the sample rate and number of samples are needed, so only the header is read
+        self.eeg = read_edf_header(self.eeg_file)
         self.ev_ms = events.view(np.recarray).mstime
         self.events = events.view(np.recarray)
     
@@ -26,11 +101,7 @@ class System4Offset:
         :param logfile: The filepath for the event.log jsonl file
         :return: the mstime at which the eeg file began recording
         """
-        # Read session log
-        df = pd.read_json(logfile, lines=True)
-        # Get the mstime of eeg start
-        eeg_start_ms = df[df.type == 'EEGSTART'].time.iloc[0]
-        return eeg_start_ms
+        return eegstart_from_markers(read_sync_markers(logfile), logfile)
     
     def align(self):
         # Skip alignment if there are no events or no sync pulse logs
@@ -41,8 +112,8 @@ class System4Offset:
         logger.debug('Aligning...')
 
         # get the sample rate and length of recording for the current file
-        self.num_samples = self.eeg.n_times
-        self.sample_rate = self.eeg.info['sfreq']
+        self.num_samples = self.eeg['n_times']
+        self.sample_rate = self.eeg['sfreq']
         
         # get eeg start time
         self.eeg_start_ms = self.extract_eegstart(self.eeg_log)
@@ -94,7 +165,7 @@ class System4Aligner:
         DATA FIELDS:
         behav_log: the logfile with behavioral data, assumed to be .jsonl format 
         eeg_log: The event.log file created by system 4, containing heartbeats according the ephys computer's clock
-        eeg: A dictionary matching the basename of each EEG recording to its data (designed for cases with multiple 
+        eeg: A dictionary matching the basename of each EEG recording to its header (designed for cases with multiple 
         recordings from a single session).
         num_samples: The number of EEG samples in the current EEG recording.
         sample_rate: The sample rate of the current EEG recording.
@@ -110,15 +181,15 @@ class System4Aligner:
             raise AlignmentError('Cannot align EEG with %d sources' % len(eeg_sources))
         self.eeg_file_stem = list(eeg_sources.keys())[0]
         self.eeg_dir = eeg_dir  # Path to current_processed ephys files
-        # Get list of the ephys computer's EEG recordings, then get a list of their basenames, and create a Raw object
-        # for each
+        # Get list of the ephys computer's EEG recordings, then get a list of their basenames, and read the header of
+        # each (only the sample rate and number of samples are needed)
         # FIXME: probably does not need to be iterable for system 4. Ask Ryan.
         self.eeg_files = glob.glob(os.path.join(eeg_dir, '*.edf'))
         self.eeg_log = files['event_log'][0]
         self.eeg = {}
         for f in self.eeg_files:
             basename = os.path.basename(f)
-            self.eeg[basename] = mne.io.read_raw_edf(f, preload=True)
+            self.eeg[basename] = read_edf_header(f)
 
         self.num_samples = None
         self.sample_rate = None
@@ -158,18 +229,21 @@ class System4Aligner:
             logger.warn('No heartbeats were found in the session log. Unable to align behavioral and EEG data.')
             return self.events
 
+        # The event.log is the same for every EEG file, so its heartbeats and EEGSTART are read once, together
+        eeg_log_markers = read_sync_markers(self.eeg_log)
+
         # Align each EEG file
         for basename in self.eeg:
-            logger.debug('Calculating alignment for recording, ' + basename)
+            logger.debug('Calculating alignment for recording, {}', basename)
 
             # Reset ephys sync pulse info and get the sample rate and length of recording for the current file
-            self.num_samples = self.eeg[basename].n_times
-            self.sample_rate = self.eeg[basename].info['sfreq']
+            self.num_samples = self.eeg[basename]['n_times']
+            self.sample_rate = self.eeg[basename]['sfreq']
             
             # Grab logged start time for the edf file
-            self.eeg_start_ms = self.extract_eegstart(self.eeg_log)
+            self.eeg_start_ms = eegstart_from_markers(eeg_log_markers, self.eeg_log)
 
-            self.ephys_ms = self.extract_heartbeats_eventlog(self.eeg_log)
+            self.ephys_ms = eeg_log_markers['HEARTBEAT'].astype(int)
             if not isinstance(self.ephys_ms, np.ndarray) or len(self.ephys_ms) < 2:
                 logger.warn('No heartbeats were found in the event.log file. Unable to align behavioral and EEG data.')
                 return self.events
@@ -212,13 +286,8 @@ class System4Aligner:
         :param logfile: The filepath for the event.log jsonl file
         :return: 1-D numpy array containing the mstimes for all heartbeats
         """
-        # Read session log
-        df = pd.read_json(logfile, lines=True)
-        # Get the times when all heartbeats were sent
-        heartbeats = np.array(df[df.type == 'HEARTBEAT'].time)
         # Convert pulse times to integers before returning
-        heartbeats = heartbeats.astype(int)
-        return heartbeats
+        return read_sync_markers(logfile)['HEARTBEAT'].astype(int)
 
     @staticmethod
     def extract_heartbeats_unity(logfile):
@@ -228,22 +297,9 @@ class System4Aligner:
         :param logfile: The filepath for the session log .jsonl file
         :return: 1-D numpy array containing the mstimes for all heartbeats
         """
-        strip_empty_lines(logfile) 
-        # Read session log
-        df = pd.read_json(logfile, lines=True)
-        # Get the times when all heartbeats were sent
-        # We want only the received elemem network messages containing heartbeats.
-        messages = df[df.type=='network'].data.apply(lambda data: data.get('message') if
-                                                     data.get('sent')=='True' else None).dropna()
-        # C# syntax not understood so replace false/true with False/True
-        messages = messages.astype(str).str.replace('false', 'False').replace('true', 'True') 
-        # "message" field is a string, not a dict, so tell pandas it's a string then eval as dict.
-        # .apply(pd.Series) explodes dictionary fields as columns
-        messages = messages.astype(str).apply(eval).dropna().apply(pd.Series)
-        heartbeats = messages[messages.type=='HEARTBEAT'].time.values
+        # Get the times when all heartbeats were sent: only the elemem network messages sent by the task count
         # Convert pulse times to integers before returning
-        heartbeats = heartbeats.astype(int)
-        return heartbeats
+        return read_sync_markers(logfile, network=True)['HEARTBEAT'].astype(int)
 
     @staticmethod
     def extract_eegstart(logfile):
@@ -253,30 +309,7 @@ class System4Aligner:
         :param logfile: The filepath for the event.log jsonl file
         :return: the mstime at which the eeg file began recording
         """
-        # Read session log
-        df = pd.read_json(logfile, lines=True)
-        # Get the mstime of eeg start
-        eeg_start_ms = df[df.type == 'EEGSTART'].time.iloc[0]
-        return eeg_start_ms
-
-def strip_empty_lines(logfile):
-    """
-    pandas read_json(line=True) fails if the file has empty lines. 
-    This function checks for empty lines and removes them if they exist
-    """
-    with open(logfile,'r') as file:
-        lines = file.readlines()
-    newlines = []
-    for line in lines:
-        if not line.strip():
-            continue
-        else:
-            newlines.append(line)
-    if len(lines)==len(newlines):
-        import sys
-        return
-    with open(logfile, 'w') as file:
-        file.writelines(newlines)
+        return eegstart_from_markers(read_sync_markers(logfile), logfile)
 
 def times_to_offsets(behav_ms, ephys_ms, ev_ms, eeg_start_ms, samplerate, window=100, thresh_ms=10):
     """
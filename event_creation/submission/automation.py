@@ -4,14 +4,13 @@ import copy
 from collections import defaultdict
 import traceback
 
-from ptsa.data.readers import JsonIndexReader
-
-from .transferer import TransferError
+from .transferer import TransferError, Transferer, session_destination
 from .pipelines import build_events_pipeline, build_split_pipeline, build_convert_events_pipeline, \
                        build_convert_eeg_pipeline, build_import_montage_pipeline, build_import_localization_pipeline,\
                        build_create_montage_pipeline
 from .log import logger
 from .configuration import paths
+from .session_index import load_session_index
 
 
 class ImporterCollection(object):
@@ -285,49 +284,62 @@ class Automator(object):
 
     def __init__(self, protocol):
         self.protocol = protocol
-        self.index = JsonIndexReader(os.path.join(paths.db_root, 'protocols', '{}.json'.format(protocol)))
+        self.index = load_session_index(os.path.join(paths.db_root, 'protocols', '{}.json'.format(protocol)))
         self.importers = []
+        self.precheck_results = defaultdict(int)
 
     def populate_importers(self):
         self.add_existing_events_importers()
         self.add_existing_montage_importers()
         self.add_future_events_importers()
 
+    def describe_skipped(self):
+        results = dict(self.precheck_results)
+        skipped = results.pop('unchanged', 0)
+        description = 'Skipped {} unchanged sessions'.format(skipped)
+        if results:
+            description += '; checked {} sessions ({})'.format(
+                sum(results.values()), ', '.join('{} {}'.format(count, reason)
+                                                 for reason, count in sorted(results.items())))
+        return description
+
+    def montage_code(self, subject, montage):
+        """
+        :param montage: '<localization>.<montage>', as stored with each session
+        :return: the subject_alias of the montage, from the subject's localizations
+        """
+        localization, localization_montage = montage.split('.')
+        return self.index.get_value('subject_alias', subject=subject, localization=localization,
+                                    localization_montage=localization_montage)
+
     def add_existing_montage_importers(self):
         subjects = self.index.subjects()
         for subject in subjects:
             montages = self.index.montages(subject=subject)
             for montage in montages:
-                code = self.index.get_value('subject_alias', subject=subject, montage=montage.split('.')[1])
+                code = self.montage_code(subject, montage)
                 importer = Importer(Importer.CONVERT_MONTAGE,
                                     subject=subject, montage=montage, protocol=self.protocol, code=code)
                 if importer.check() or importer.errored or self.INCLUDE_TRANSFERRED:
                     self.importers.append(importer)
 
     def session_indexes(self):
-        experiments = self.index.experiments()
-        for experiment in experiments:
-            exp_index = self.index.filtered(experiment=experiment)
-            subjects = exp_index.subjects()
-            for subject in subjects:
-                subj_index = exp_index.filtered(subject=subject)
-                sessions = subj_index.sessions()
-                for session in sessions:
-                    sess_index = subj_index.filtered(session=session)
-                    yield subject, experiment, session, sess_index
-
-    def build_existing_event_importer_kwargs(self, subject, experiment, session, index, do_compare=True):
-        montage = index.montages()[0]
+        """
+        :return: generator of (subject, experiment, session, record), where record is the dict of the session's
+                 fields in the protocol index
+        """
+        for (experiment, subject, session), rows in self.index.group_by('experiment', 'subject', 'session').items():
+            record = {}
+            for row in rows:
+                record.update(self.index.row(row))
+            yield subject, experiment, session, record
+
+    def build_existing_event_importer_kwargs(self, subject, experiment, session, record, do_compare=True):
+        montage = record['montage']
         do_math = experiment in self.MATH_TASKS
-        code = index.get_value('subject_alias')
-        try:
-            original_session = int(index.get_value('original_session'))
-        except KeyError:
-            original_session = int(session)
-        try:
-            original_experiment = index.get_value('original_experiment')
-        except KeyError:
-            original_experiment = experiment
+        code = record['subject_alias']
+        original_session = int(record.get('original_session', session))
+        original_experiment = record.get('original_experiment', experiment)
 
         kwargs = dict(subject=subject, montage=montage, experiment=original_experiment, session=int(session),
                       new_experiment=experiment, original_session=original_session,
@@ -336,8 +348,15 @@ class Automator(object):
 
 
     def add_existing_events_importers(self):
-        for subject, experiment, session, index in self.session_indexes():
-            kwargs = self.build_existing_event_importer_kwargs(subject, experiment, session, index)
+        for subject, experiment, session, record in self.session_indexes():
+            # Only build pipelines for sessions whose sources may have changed since they were last imported
+            if not self.INCLUDE_TRANSFERRED:
+                unchanged, reason = Transferer.source_fingerprints_match(
+                    session_destination(self.protocol, subject, experiment, session))
+                self.precheck_results[reason] += 1
+                if unchanged:
+                    continue
+            kwargs = self.build_existing_event_importer_kwargs(subject, experiment, session, record)
             importer = Importer(Importer.BUILD_EVENTS, **kwargs)
             if not importer.check() and not importer.errored:
                 pass
@@ -354,24 +373,27 @@ class Automator(object):
                         self.importers.append(importer2)
                     else:
                         self.importers.append(importer)
+        logger.info(self.describe_skipped())
 
     def add_future_events_importers(self):
         subjects = self.index.subjects()
         for subject in subjects:
-            subj_index = self.index.filtered(subject=subject)
-            montages = subj_index.montages()
+            montages = self.index.montages(subject=subject)
             max_montage = max(montages)
             for experiment in self.EXPERIMENTS:
-                exp_index = subj_index.filtered(montage=max_montage, experiment=experiment)
-                sessions = exp_index.sessions()
+                sessions = self.index.sessions(subject=subject, montage=max_montage, experiment=experiment)
                 if sessions:
                     max_session = max(sessions)
                     try:
-                        original_session = exp_index.get_value('original_session', session=max_session) + 1
+                        original_session = self.index.get_value('original_session', subject=subject,
+                                                                montage=max_montage, experiment=experiment,
+                                                                session=max_session) + 1
                     except KeyError:
                         original_session = max_session+1
                     try:
-                        original_experiment = exp_index.get_value('original_experiment', session=max_session)
+                        original_experiment = self.index.get_value('original_experiment', subject=subject,
+                                                                   montage=max_montage, experiment=experiment,
+                                                                   session=max_session)
                     except KeyError:
                         original_experiment = experiment
                     session = max_session + 1
@@ -380,7 +402,7 @@ class Automator(object):
                     original_session = 0
                     original_experiment = experiment
                 do_math = experiment in self.MATH_TASKS
-                code = subj_index.get_value('subject_alias', montage=max_montage.split('.')[1])
+                code = self.montage_code(subject, max_montage)
                 kwargs = dict(subject=subject, montage=max_montage, experiment=original_experiment, session=session,
                               new_experiment=experiment, original_session=original_session,
                               do_math=do_math, protocol=self.protocol, code=code, do_compare=False)
@@ -399,9 +421,10 @@ class Automator(object):
     def describe(self):
         descriptions = []
         if not self.importers:
-            return 'No Importers'
+            return 'No Importers\n' + self.describe_skipped()
         for importer in self.sorted_importers():
             descriptions.append(importer.describe())
+        descriptions.append(self.describe_skipped())
         return '\n---------------\n'.join(descriptions)
 
 def xtest_future_events():
@@ -1,6 +1,8 @@
-import mne
 import numpy as np
 from ..log import logger
+from ..lazy import lazy_import
+
+mne = lazy_import('mne')
 
 
 class ArtifactDetector:
@@ -50,28 +52,27 @@ class ArtifactDetector:
                     logger.warn('Unidentifiable EEG system detected in file %s' % self.eegfile)
                     continue
 
-                # Pick only the EOG channels
-                eog = self.eeg[self.eegfile].copy()
-                eog.pick_channels(self.left_eog + self.right_eog)
+                # Load only the EOG channels, rather than copying the whole recording
+                raw = self.eeg[self.eegfile]
+                eog = raw.get_data(picks=self.left_eog + self.right_eog)
 
                 # Set bipolar reference for EOG channels. Note that the resulting channels will be anode - cathode
-                eog = mne.set_bipolar_reference(eog, anode=[self.left_eog[0], self.right_eog[0]],
-                                                cathode=[self.left_eog[1], self.right_eog[1]])
+                eog = np.vstack([eog[0] - eog[1], eog[2] - eog[3]])
 
                 # Apply a 1-10 Hz bandpass filter on the EOG data to reduce irrelevant noise
-                eog.filter(1, 10, picks=mne.pick_types(eog.info, eog=True), filter_length='10s', phase='zero-double',
-                           fir_window='hann', fir_design='firwin2')
+                eog = mne.filter.filter_data(eog, raw.info['sfreq'], 1, 10, filter_length='10s',
+                                             phase='zero-double', fir_window='hann', fir_design='firwin2')
 
-                # Record the indices of the bipolar EOG channels, as positioned in the mne object
-                self.leog_ind = eog.ch_names.index(self.left_eog[0] + '-' + self.left_eog[1])
-                self.reog_ind = eog.ch_names.index(self.right_eog[0] + '-' + self.right_eog[1])
+                # Record the indices of the bipolar EOG channels, as positioned in the EOG array
+                self.leog_ind = 0
+                self.reog_ind = 1
 
                 # Run artifact detection
-                self.detect_eog_artifacts(eog)
+                self.detect_eog_artifacts(eog, raw.info['sfreq'])
 
         return self.events
 
-    def detect_eog_artifacts(self, eog):
+    def detect_eog_artifacts(self, eog, sfreq):
         """
         Detects eye movement artifacts on the EOG channels and logs this information in the events. Events with
         artifacts detected on both eyes will be marked with a 3. Events with artifacts detected only on the left eye
@@ -89,7 +90,8 @@ class ArtifactDetector:
             interquartile ranges below the 25th percentile.
         3) Mark every event where the voltage on that channel exceeds either threshold as having an EOG artifcat.
 
-        :param eog: An MNE Raw object containing the EOG channel data to be searched for artifacts.
+        :param eog: A (channels x samples) array containing the bipolar EOG data to be searched for artifacts.
+        :param sfreq: The sample rate of the EOG data.
         :return: None
         """
         ##########
@@ -98,7 +100,7 @@ class ArtifactDetector:
         #
         ##########
 
-        logger.debug('Finding blinks for %s' % self.eegfile)
+        logger.debug('Finding blinks for {}', self.eegfile)
 
         SETTINGS = {
             'ltpFR': {'WORD': (0., 3.0)},
@@ -110,35 +112,41 @@ class ArtifactDetector:
             'NiclsCourierReadOnly': {'WORD': (0, 1.6)}
         }
 
+        n_times = eog.shape[1]
+        in_file = np.char.endswith(self.events.eegfile.astype(str), self.eegfile)
+
         ev_types = SETTINGS[self.experiment]
         for t in ev_types:
-            # Get the eeg offsets of all events of the target type
-            offsets = [o for i, o in enumerate(self.events.eegoffset) if self.events.type[i] == t and
-                       self.events.eegfile[i].endswith(self.eegfile)]
+            # Get the indices and eeg offsets of all events of the target type
+            event_mask = np.where((self.events.type == t) & in_file)[0]
+            offsets = self.events.eegoffset[event_mask].astype(int)
             # Skip to the next event type if there were no events of the target type
             if len(offsets) == 0:
                 continue
 
-            # Create MNE events using eeg offsets
-            mne_evs = np.zeros((len(offsets), 3), dtype=int)
-            mne_evs[:, 0] = offsets
-
-            # Determine tmin and tmax using settings dictionary
+            # Determine tmin and tmax using settings dictionary, in samples (as mne.Epochs would)
             tmin = ev_types[t][0]
             tmax = ev_types[t][1]
+            start = int(np.round(tmin * sfreq))
+            stop = int(np.round(tmax * sfreq)) + 1
 
             # Remove any events that run beyond the bounds of the EEG file
             truncated_events_pre = 0
             truncated_events_post = 0
-            while mne_evs[0, 0] + eog.info['sfreq'] * tmin < 0:
-                mne_evs = mne_evs[1:]
+            while len(offsets) > 0 and offsets[0] + start < 0:
+                offsets = offsets[1:]
                 truncated_events_pre += 1
-            while mne_evs[-1, 0] + eog.info['sfreq'] * tmax >= eog.n_times:
-                mne_evs = mne_evs[:-1]
+            while len(offsets) > 0 and offsets[-1] + stop > n_times:
+                offsets = offsets[:-1]
                 truncated_events_post += 1
+            if len(offsets) == 0:
+                continue
 
-            # Load data from all presentation events into an mne.Epochs object & baseline correct using each event's average voltage
-            ep = mne.Epochs(eog, mne_evs, tmin=tmin, tmax=tmax, baseline=(None, None), preload=True)
+            # Cut a window out of each channel for every event at once, as a strided view into the EOG data, then
+            # baseline correct using each event's average voltage
+            windows = np.lib.stride_tricks.sliding_window_view(eog, stop - start, axis=1)
+            epochs = windows[:, offsets + start].transpose(1, 0, 2)
+            epochs = epochs - epochs.mean(axis=2, keepdims=True)
 
             ##########
             #
@@ -148,13 +156,13 @@ class ArtifactDetector:
 
             # Look for large deviations of voltage from interquartile range on individual channels during event
             # Find the interquartile range of each channel, across time and across all events
-            p75 = np.percentile(ep._data, 75, axis=[2, 0])
-            p25 = np.percentile(ep._data, 25, axis=[2, 0])
+            p75 = np.percentile(epochs, 75, axis=[2, 0])
+            p25 = np.percentile(epochs, 25, axis=[2, 0])
             iqr = p75 - p25
 
             # Find the max and min of each channel in each event, then determine how many IQRs outside the IQR they fall
-            amp_max_iqr = (ep._data.max(axis=2) - p75) / iqr
-            amp_min_iqr = (ep._data.min(axis=2) - p25) / iqr
+            amp_max_iqr = (epochs.max(axis=2) - p75) / iqr
+            amp_min_iqr = (epochs.min(axis=2) - p25) / iqr
 
             # Search for blinks/eye movements in each EOG channel
             left_eog_art = np.logical_or(amp_max_iqr[:, self.leog_ind] > 3, amp_min_iqr[:, self.leog_ind] < -3)
@@ -168,16 +176,10 @@ class ArtifactDetector:
 
             logger.debug('Marking events with blink info...')
 
-            # Skip event types which have not been tested with artifact detection, and those aligned to other recordings
-            event_mask = np.where([ev.type == t and ev.eegfile.endswith(self.eegfile) for ev in self.events])[0]
-
-            # Also skip any events that run beyond the bounds of the EEG file (as determined previously)
-            event_mask = event_mask[truncated_events_pre:]
-            event_mask = event_mask[:-truncated_events_post] if truncated_events_post > 0 else event_mask
+            # Skip any events that run beyond the bounds of the EEG file (as determined previously)
+            event_mask = event_mask[truncated_events_pre:len(event_mask) - truncated_events_post]
 
             # Set eogArtifact to 1 if an artifact was detected only on the left, 2 if only on the right, and 3 if both
-            self.events.eogArtifact[event_mask] = 0
-            self.events.eogArtifact[event_mask[left_eog_art]] += 1
-            self.events.eogArtifact[event_mask[right_eog_art]] += 2
+            self.events.eogArtifact[event_mask] = left_eog_art.astype(int) + 2 * right_eog_art.astype(int)
 
-            logger.debug('Events marked with blink info for %s' % self.eegfile)
+            logger.debug('Events marked with blink info for {}', self.eegfile)
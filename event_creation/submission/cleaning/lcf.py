@@ -1,10 +1,13 @@
 import os
-import mne
 import numpy as np
 from glob import glob
-from scipy import linalg
-from cluster_helper.cluster import cluster_view
 from ..log import logger
+from ..lazy import lazy_import
+
+mne = lazy_import('mne')
+linalg = lazy_import('scipy.linalg')
+sp_signal = lazy_import('scipy.signal')
+cluster = lazy_import('cluster_helper.cluster')
 
 
 def run_lcf(events, eeg_dict, ephys_dir, method='fastica', highpass_freq=.5, iqr_thresh=3, lcf_winsize=.2):
@@ -55,7 +58,7 @@ def run_lcf(events, eeg_dict, ephys_dir, method='fastica', highpass_freq=.5, iqr
         ##########
 
         basename, filetype = os.path.splitext(eegfile)
-        logger.debug('Cleaning data from {}'.format(basename))
+        logger.debug('Cleaning data from {}', basename)
         clean_eegfile = os.path.join(ephys_dir, '%s_clean_raw.fif' % basename)
 
         # Make sure LCF hasn't already been run for this file (prevents re-running LCF during math event creation)
@@ -235,7 +238,7 @@ def run_lcf(events, eeg_dict, ephys_dir, method='fastica', highpass_freq=.5, iqr
         # Run ICA and then LCF on each part of the sesion in parallel. Sometimes cluster helper returns errors even
         # when successful, so avoid crashing event creation if an error comes up here.
         try:
-            with cluster_view(scheduler='sge', queue='RAM.q', num_jobs=len(inputs), cores_per_job=6) as view:
+            with cluster.cluster_view(scheduler='sge', queue='RAM.q', num_jobs=len(inputs), cores_per_job=6) as view:
                 view.map(run_split_lcf, inputs)
         except Exception:
             logger.warn('Cluster helper returned an error. This may happen even if LCF was successful, so attempting to'
@@ -252,9 +255,9 @@ def run_lcf(events, eeg_dict, ephys_dir, method='fastica', highpass_freq=.5, iqr
                 os.remove(subfile)
 
         # Concatenate the cleaned partitions of the recording back together
-        logger.debug('Constructing cleaned data file for {}'.format(basename))
+        logger.debug('Constructing cleaned data file for {}', basename)
         clean = mne.concatenate_raws(clean)
-        logger.debug('Saving cleaned data for {}'.format(basename))
+        logger.debug('Saving cleaned data for {}', basename)
 
         ##########
         #
@@ -269,12 +272,91 @@ def run_lcf(events, eeg_dict, ephys_dir, method='fastica', highpass_freq=.5, iqr
         del clean
 
 
+def hurst_rs_2d(data, nvals=None, fit='RANSAC', corrected=True, unbiased=True, block_size=16):
+    """
+    Batched version of nolds.hurst_rs, which estimates the Hurst exponent of every row of a 2-D array at once. The
+    (R/S)_n statistics are computed for a block of rows at a time (to bound memory use), and the final line fit for each
+    row uses the same fitting routine as nolds, so the results match calling hurst_rs on each row separately.
+
+    :param data: A (rows x samples) array, e.g. channels x time.
+    :param nvals: Subseries sizes at which to calculate (R/S)_n. Defaults to the same values nolds uses.
+    :param fit: Line fitting method passed through to nolds ('RANSAC' or 'poly').
+    :param corrected: Whether to apply the Anis-Lloyd-Peters correction, as in nolds.
+    :param unbiased: Whether to use the unbiased standard deviation, as in nolds.
+    :param block_size: The number of rows to process at once.
+    :return: A 1-D array containing the Hurst exponent of each row.
+    """
+    from nolds.measures import expected_rs, logmid_n, poly_fit
+
+    data = np.atleast_2d(np.asarray(data))
+    n_rows, total_n = data.shape
+    if nvals is None:
+        nvals = logmid_n(total_n, ratio=1/4.0, nsteps=15)
+    nvals = np.asarray(nvals)
+
+    # (R/S)_n for every row and every n
+    rsvals = np.empty((n_rows, len(nvals)))
+    for block_start in range(0, n_rows, block_size):
+        block = data[block_start:block_start + block_size]
+        for j, n in enumerate(nvals):
+            m = total_n // n
+            seqs = block[:, :m * n].reshape(block.shape[0], m, n)
+            y = np.cumsum(seqs - seqs.mean(axis=2, keepdims=True), axis=2)
+            r = y.max(axis=2) - y.min(axis=2)
+            sd = seqs.std(axis=2, ddof=1 if unbiased else 0)
+            # Subseries with a range of zero are excluded, and a row with no nonzero ranges gets NaN
+            nonzero = r != 0
+            with np.errstate(invalid='ignore', divide='ignore'):
+                ratios = np.where(nonzero, r / sd, 0)
+                rsvals[block_start:block_start + block.shape[0], j] = ratios.sum(axis=1) / nonzero.sum(axis=1)
+
+    log_n = np.log(nvals)
+    log_expected = np.log([expected_rs(n) for n in nvals])
+    hurst = np.full(n_rows, np.nan)
+    for i in range(n_rows):
+        not_nan = ~np.isnan(rsvals[i])
+        if not not_nan.any():
+            continue
+        yvals = np.log(rsvals[i, not_nan])
+        if corrected:
+            yvals -= log_expected[not_nan]
+        hurst[i] = poly_fit(log_n[not_nan], yvals, 1, fit=fit)[0]
+    return hurst + 0.5 if corrected else hurst
+
+
+def convolve_rows(signal, kernel):
+    """
+    Convolves every row of a 2-D array with the same kernel, using the FFT. Equivalent to calling
+    np.convolve(row, kernel, 'same') on each row (for rows at least as long as the kernel).
+
+    :param signal: A (rows x samples) array.
+    :param kernel: A 1-D kernel.
+    :return: The convolved array, with the same shape as signal.
+    """
+    return sp_signal.fftconvolve(signal, np.asarray(kernel, dtype=float)[None, :], mode='same', axes=1)
+
+
+def reconstruction_matrix(ica):
+    """
+    Combines the ICA mixing matrix, the inverse of the PCA components, and MNE's pre-whitening into a single matrix,
+    which maps sources straight back to channels. The (costly) pseudo-inverse is computed once, and the sources only
+    need to be multiplied by one matrix instead of two.
+
+    :param ica: A fitted mne.preprocessing.ICA object.
+    :return: (mixing, offset), such that channel data = mixing . sources + offset
+    """
+    mixing = np.dot(linalg.pinv(ica.pca_components_), ica.mixing_matrix_)
+    pre_whitener = np.asarray(ica.pre_whitener_).reshape(-1, 1)
+    return mixing * pre_whitener, ica.pca_mean_[:, None] * pre_whitener
+
+
 def run_split_lcf(inputs):
     """
-    Runs ICA followed by LCF on one partition of the session. Note that this function has been designed to work as a
-    parallel job managed via ipython-cluster-helper. As such, all necessary imports and function declarations have to be
-    made within this function, leading to the odd code structure here. This is also why inputs must be passed as a
-    dictionary.
+    Runs ICA followed by LCF on one partition of the session, as a parallel job managed via ipython-cluster-helper.
+    The engines rebuild this function from its code with the globals of this module, which they import, so it can use
+    the module-level helpers (hurst_rs_2d, convolve_rows, reconstruction_matrix, and scipy.signal through the lazy
+    sp_signal). The remaining imports are made inside the function so that they, and MKL's thread count, are set up on
+    the engine. Inputs are passed as a single dictionary because view.map passes one argument to each job.
 
     :param inputs: A dictionary specifying the "index" of the partition (for coordination with other parallel jobs), the
         "basename" of the EEG recording, the "ephys_dir" path to the current_processed folder, the "method" of ICA to
@@ -288,8 +370,6 @@ def run_split_lcf(inputs):
     import numpy as np
     import pandas as pd
     import scipy.stats as ss
-    import scipy.signal as sp_signal
-    from nolds import hurst_rs
     from ..log import logger
 
     def detect_bad_channels(eeg, index, basename, ephys_dir, ignore=None):
@@ -331,7 +411,7 @@ def run_split_lcf(inputs):
             during bad channel detection.
         :return: A list containing the string names of each bad channel.
         """
-        logger.debug('Identifying bad channels for part %i of %s' % (index, basename))
+        logger.debug('Identifying bad channels for part {} of {}', index, basename)
 
         # Set thresholds for bad channel criteria (see docstring for details on how these were optimized)
         low_var_th = -3  # If z-scored log variance < -3, channel is most likely flat
@@ -354,19 +434,13 @@ def run_split_lcf(inputs):
         """
 
         # Method 1: High or low log-transformed variance
-        if ignore is None:
-            var = np.log(np.var(eeg._data, axis=1))
-        else:
-            var = np.log(np.var(eeg._data[:, ~ignore], axis=1))
+        data = eeg._data if ignore is None else eeg._data[:, ~ignore]
+        var = np.log(np.var(data, axis=1))
         zvar = ss.zscore(var)
 
         # Method 2: High Hurst exponent
-        hurst = np.zeros(n_chans)
-        for i in range(n_chans):
-            if ignore is None:
-                hurst[i] = hurst_rs(eeg._data[i, :])
-            else:
-                hurst[i] = hurst_rs(eeg._data[i, ~ignore])
+        hurst = hurst_rs_2d(data)
+        del data
         zhurst = ss.zscore(hurst)
 
         # Identify bad channels using optimized thresholds
@@ -412,15 +486,13 @@ def run_split_lcf(inputs):
         neg_thresh = p25 - iqr * iqr_thresh
 
         # Detect artifacts using the IQR threshold. Dilate the detected zones to account for the mixer transition equation
-        ctrl_signal = np.zeros(feat.shape, dtype=float)
-        dilator = np.ones(dilator_width)
-        for i in range(ctrl_signal.shape[0]):
-            ctrl_signal[i, :] = (feat[i, :] > pos_thresh[i]) | (feat[i, :] < neg_thresh[i])
-            ctrl_signal[i, :] = np.convolve(ctrl_signal[i, :], dilator, 'same')
-        del p75, p25, iqr, pos_thresh, neg_thresh, dilator
+        ctrl_signal = ((feat > pos_thresh[:, None]) | (feat < neg_thresh[:, None])).astype(float)
+        ctrl_signal = convolve_rows(ctrl_signal, np.ones(dilator_width))
+        del p75, p25, iqr, pos_thresh, neg_thresh
 
-        # Binarize signal
-        ctrl_signal = (ctrl_signal > 0).astype(float)
+        # Binarize signal. The dilated signal counts artifactual samples in each window, so anything above one half is
+        # nonzero (the FFT leaves tiny rounding errors where the count is zero)
+        ctrl_signal = (ctrl_signal > .5).astype(float)
 
         ##########
         #
@@ -429,26 +501,20 @@ def run_split_lcf(inputs):
         ##########
 
         # Allocate normalized transition window
-        trans_win = sp_signal.hann(transition_width, True)
+        trans_win = sp_signal.windows.hann(transition_width, True)
         trans_win /= trans_win.sum()
 
         # Pad extremes of control signal
-        pad_width = [tuple([0, 0])] * ctrl_signal.ndim
         pad_size = int(transition_width / 2 + 1)
-        pad_width[1] = (pad_size, pad_size)
-        ctrl_signal = np.pad(ctrl_signal, tuple(pad_width), mode='edge')
-        del pad_width
+        ctrl_signal = np.pad(ctrl_signal, ((0, 0), (pad_size, pad_size)), mode='edge')
 
         # Combine the transition window and the control signal to build a final transition-control signal, which can be applied to the components
-        for i in range(ctrl_signal.shape[0]):
-            ctrl_signal[i, :] = np.convolve(ctrl_signal[i, :], trans_win, 'same')
+        ctrl_signal = convolve_rows(ctrl_signal, trans_win)
         del trans_win
 
         # Remove padding from transition-control signal
-        rm_pad_slice = [slice(None)] * ctrl_signal.ndim
-        rm_pad_slice[1] = slice(pad_size, -pad_size)
-        ctrl_signal = ctrl_signal[rm_pad_slice]
-        del rm_pad_slice, pad_size
+        ctrl_signal = ctrl_signal[:, pad_size:-pad_size]
+        del pad_size
 
         # Mix sources with control signal to get cleaned sources
         S_clean = S * (1 - ctrl_signal)
@@ -457,17 +523,10 @@ def run_split_lcf(inputs):
 
     def reconstruct_signal(sources, ica):
 
-        # Mix sources to translate back into PCA components (PCA components x Time)
-        data = np.dot(ica.mixing_matrix_, sources)
-
-        # Mix PCA components to translate back into original EEG channels (Channels x Time)
-        data = np.dot(linalg.pinv(ica.pca_components_), data)
-
-        # Invert transformations that MNE performs prior to PCA
-        data += ica.pca_mean_[:, None]
-        data *= ica.pre_whitener_
-
-        return data
+        # Mix sources back into the original EEG channels (Channels x Time), inverting the PCA and the transformations
+        # that MNE performs prior to PCA in the same step
+        mixing, offset = reconstruction_matrix(ica)
+        return np.dot(mixing, sources) + offset
 
     ######
     # Initialization
@@ -517,7 +576,7 @@ def run_split_lcf(inputs):
     ######
 
     # Run ICA for the current partition of the session. Note that ICA automatically excludes bad channels.
-    logger.debug('Running ICA (part %i) on %s' % (index, basename))
+    logger.debug('Running ICA (part {}) on {}', index, basename)
     ica = mne.preprocessing.ICA(method=method, max_pca_components=n_components)
     ica.fit(eeg, reject_by_annotation=True)
 
@@ -525,7 +584,7 @@ def run_split_lcf(inputs):
     # LCF
     ######
 
-    logger.debug('Running LCF (part %i) on %s' % (index, basename))
+    logger.debug('Running LCF (part {}) on {}', index, basename)
     # Convert data to sources
     S = ica.get_sources(eeg)._data
 
@@ -1,11 +1,11 @@
 import os
 import yaml
-import matplotlib
 import argparse
 import copy
 from ..exc import ConfigurationError
 
-MPL_BACKEND = matplotlib.get_backend()
+# The C parser, where PyYAML was built with libyaml, is an order of magnitude faster
+YAML_LOADER = getattr(yaml, 'CLoader', yaml.Loader)
 
 
 def yml_join(loader, node):
@@ -13,6 +13,7 @@ def yml_join(loader, node):
 
 
 yaml.add_constructor('!join', yml_join)
+yaml.add_constructor('!join', yml_join, Loader=YAML_LOADER)
 
 
 class ConfigOption(object):
@@ -55,7 +56,7 @@ class Configuration(object):
 
     def load_config(self, config_file):
         self.config_file = config_file
-        self.config_dict = yaml.load(open(self.config_file), Loader=yaml.Loader)
+        self.config_dict = yaml.load(open(self.config_file), Loader=YAML_LOADER)
 
         options = self.config_dict['options']
 
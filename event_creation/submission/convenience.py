@@ -4,16 +4,17 @@ if sys.version_info[0] < 3:
     input = raw_input
 from .configuration import config
 
+import os
+
 if __name__ == '__main__':
     config.parse_args()
-    import matplotlib
+    # Chooses the backend without importing matplotlib, which is only loaded if something is plotted
     if not config.show_plots:
-        matplotlib.use('agg')
+        os.environ['MPLBACKEND'] = 'agg'
     else:
-        matplotlib.use('Qt4Agg')
+        os.environ['MPLBACKEND'] = 'Qt4Agg'
 
 import re
-import os
 import json
 import glob
 import numpy as np
@@ -28,11 +29,7 @@ from .tasks import CleanDbTask, IndexAggregatorTask
 from .events_tasks import ReportLaunchTask
 from .log import logger
 from .automation import Importer, ImporterCollection
-
-try:
-    from ptsa.data.readers import BaseEventReader, JsonIndexReader
-except:
-    logger.warn('PTSA NOT LOADED')
+from .session_index import load_session_index
 
 
 def determine_montage_from_code(code, protocol='r1', allow_new=False, allow_skip=False):
@@ -72,6 +69,7 @@ def determine_montage_from_code(code, protocol='r1', allow_new=False, allow_skip
         return '%1.1f' % new_montage_num
 
 def get_ltp_subject_sessions_by_experiment(experiment):
+    from ptsa.data.readers import BaseEventReader
     events_dir = os.path.join(paths.data_root, 'scalp', 'ltp', experiment, 'behavioral', 'events')
     events_files = sorted(glob.glob(os.path.join(events_dir, 'events_all_LTP*.mat')),
                           key=lambda f: f.split('_')[:-1])
@@ -110,25 +108,23 @@ def get_subject_sessions_by_experiment(experiment, protocol='r1', include_montag
     :param include_montage_changes:
     :return: subject, subject_code,  session, original_session, experiment, version
     """
-    json_reader = JsonIndexReader(os.path.join(paths.rhino_root, 'protocols', '%s.json' % protocol))
-    if experiment in json_reader.experiments():
-        subjects = json_reader.subjects(experiment=experiment)
-        for subject_no_montage in subjects:
-            for montage in json_reader.montages(subject=subject_no_montage, experiment=experiment):
-                subject = subject_no_montage if montage == '0' else '%s_%s' % (subject_no_montage, montage)
-                sessions = json_reader.sessions(subject=subject_no_montage, montage=montage, experiment=experiment)
-                for session in sessions:
-                    try:
-                        original_session = json_reader.get_value('original_session', subject=subject_no_montage,
-                                                                 experiment=experiment, session=session)
-                    except ValueError:
-                        original_session = session  # not necessarily robust
-                    yield subject_no_montage, subject, session, original_session,  experiment, '0'
+    index = load_session_index(os.path.join(paths.rhino_root, 'protocols', '%s.json' % protocol))
+    sessions = index.group_by('subject', 'montage', 'session', experiment=experiment)
+    if sessions:
+        for (subject_no_montage, montage, session), rows in sessions.items():
+            subject = subject_no_montage if montage == '0' else '%s_%s' % (subject_no_montage, montage)
+            try:
+                original_session = index.get_value('original_session', subject=subject_no_montage,
+                                                   experiment=experiment, session=session)
+            except ValueError:
+                original_session = session  # not necessarily robust
+            yield subject_no_montage, subject, session, original_session,  experiment, '0'
     else:
         if re.match('catFR[0-4]', experiment):
             ram_exp = 'RAM_{}'.format(experiment[0].capitalize() + experiment[1:])
         else:
             ram_exp = 'RAM_{}'.format(experiment)
+        from ptsa.data.readers import BaseEventReader
         events_dir = os.path.join(paths.data_root, 'events', ram_exp)
         events_files = sorted(glob.glob(os.path.join(events_dir, '{}*_events.mat'.format(protocol.upper()))),
                               key=lambda f: f.split('_')[:-1])
@@ -545,7 +541,7 @@ def get_code_montage(code, protocol='r1'):
     r1 = load_index(protocol)
     try:
         localization_num = r1.get_value('localization', subject_alias=code)
-        montage_num = r1.get_value('montage', subject_alias=code)
+        montage_num = r1.get_value('localization_montage', subject_alias=code)
         return '{}.{}'.format(localization_num, montage_num)
     except ValueError:
         return None
@@ -586,23 +582,18 @@ def show_imported_sessions(subject, experiment, protocol='r1', show_info=False):
                                                                              montage=montage_str, type=import_type))
 
 
-LOADED_INDEXES = {}
-
-
 def load_index(protocol):
-    if protocol not in LOADED_INDEXES:
-        index_file = os.path.join(paths.db_root, 'protocols', '{}.json'.format(protocol))
-        if not os.path.exists(index_file):
-            print(index_file)
-            with open(index_file, 'w') as f:
-                json.dump({}, f)
-        LOADED_INDEXES[protocol] = JsonIndexReader(index_file)
-    return LOADED_INDEXES[protocol]
+    index_file = os.path.join(paths.db_root, 'protocols', '{}.json'.format(protocol))
+    if not os.path.exists(index_file):
+        print(index_file)
+        with open(index_file, 'w') as f:
+            json.dump({}, f)
+    return load_session_index(index_file)
 
 
 def get_next_orig_session(code, experiment, protocol='r1'):
     index = load_index(protocol)
-    orig_sessions = list(index.aggregate_values('original_session', subject_alias=code, experiment=experiment))
+    orig_sessions = index.values('original_session', subject_alias=code, experiment=experiment)
     if orig_sessions:
         return max([int(s) for s in orig_sessions]) + 1
     else:
@@ -2,10 +2,9 @@ import glob
 import os
 import re
 import traceback
-import requests
 import json
 import numpy as np
-from ptsa.data.readers import BaseEventReader
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 
 from ..tests.test_event_creation import SYS1_COMPARATOR_INPUTS, SYS2_COMPARATOR_INPUTS, \
     SYS1_STIM_COMPARISON_INPUTS, SYS2_STIM_COMPARISON_INPUTS, LTP_COMPARATOR_INPUTS
@@ -16,7 +15,8 @@ from .alignment.system2 import System2Aligner
 from .alignment.FreiburgAligner import FreiburgAligner 
 from .alignment.system3 import System3Aligner, System3FourAligner
 from .alignment.system4 import System4Offset
-from .configuration import paths
+from .alignment.fit_plots import render_fit_plots
+from .configuration import config, paths
 from .cleaning.artifact_detection import ArtifactDetector
 from .cleaning.lcf import run_lcf
 from .parsers.ltpfr_log_parser import LTPFRSessionLogParser
@@ -45,19 +45,27 @@ from .parsers.math_parser import MathSessionLogParser
 from .parsers.hostpc_parsers import FRHostPCLogParser, catFRHostPCLogParser,\
         TiclFRParser
 from .parsers.elemem_parsers import BaseElememLogParser, ElememRepFRParser
-from .readers.eeg_reader import get_eeg_reader
+from .parsers.dtypes import compact
+from .readers.eeg_reader import get_eeg_reader, update_sources
 from .tasks import PipelineTask
 from .quality.util import get_time_field
 
-from .viewers.recarray import to_json, from_json
+from .viewers.recarray import from_json, npz_columns
 from .log import logger
 from .exc import NoEventsError, ProcessingError
+from .lazy import lazy_import
+
+requests = lazy_import('requests')
 
 
 class SplitEEGTask(PipelineTask):
 
     SPLIT_FILENAME = '{subject}_{experiment}_{session}_{time}'
 
+    SPLIT_WORKERS = 4  # Number of raw EEG files (or groups of files) split at once
+    SPLIT_MEMORY_BUDGET = 16 * 2 ** 30  # Bytes that the files being split at once may take up in memory
+    SPLIT_MEMORY_FACTOR = 3  # Estimated peak memory use of splitting a file, as a multiple of its size
+
     def __init__(self, subject, montage, experiment, session, protocol, critical=True, **kwargs):
         super(SplitEEGTask, self).__init__(critical)
         self.name = 'Splitting {exp}_{sess}'.format(exp=experiment, sess=session)
@@ -142,19 +150,9 @@ class SplitEEGTask(PipelineTask):
 
             channel_map = files.get('channel_map')
 
-            for raw_eeg, jacksheet_file in zip(raw_eeg_groups, jacksheet_files):
-                try:
-                    reader = get_eeg_reader(raw_eeg, jacksheet_file, channel_map_filename=channel_map)
-                except KeyError as k:
-                    traceback.print_exc()
-                    logger.warn('Cannot split file with extension {}'.format(k))
-                    continue
-
-                split_eeg_filename = self.SPLIT_FILENAME.format(subject=self.subject,
-                                                                experiment=self.experiment,
-                                                                session=self.session,
-                                                                time=reader.get_start_time_string())
-                reader.split_data(db_folder, split_eeg_filename)
+            jobs = [(raw_eeg, jacksheet_file, channel_map) for raw_eeg, jacksheet_file in zip(raw_eeg_groups,
+                                                                                               jacksheet_files)]
+            update_sources(db_folder, self.split_files(jobs, db_folder))
 
             num_split_files = (len(glob.glob(os.path.join(db_folder, 'noreref', '*.[0-9]*')))
                         + len(glob.glob(os.path.join(db_folder,'noreref','*.h5'))))
@@ -167,6 +165,78 @@ class SplitEEGTask(PipelineTask):
 
         else:
             logger.warn('Splitting not implemented for protocol {}'.format(self.protocol))
+
+    def estimate_split_memory(self, raw_eeg):
+        """
+        :param raw_eeg: raw EEG file, or list of files split together
+        :return: estimated number of bytes needed to split the file(s)
+        """
+        raw_eegs = raw_eeg if isinstance(raw_eeg, list) else [raw_eeg]
+        return self.SPLIT_MEMORY_FACTOR * sum(os.path.getsize(filename) for filename in raw_eegs
+                                              if os.path.isfile(filename))
+
+    def split_files(self, jobs, db_folder):
+        """
+        Splits independent raw EEG files in parallel, in as many worker processes as SPLIT_WORKERS and
+        SPLIT_MEMORY_BUDGET allow. sources.json is left to the caller, so that it is written from a single process
+        :param jobs: list of (raw eeg file(s), jacksheet, channel map)
+        :param db_folder: folder to split into
+        :return: the merged sources.json entries of the split files
+        """
+        kwargs = dict(subject=self.subject, experiment=self.experiment, session=self.session,
+                      output=config.eeg_output, complevel=int(config.eeg_complevel))
+        if len(jobs) < 2 or self.SPLIT_WORKERS < 2:
+            sources = {}
+            for job in jobs:
+                sources.update(split_raw_eeg(*job, db_folder=db_folder, **kwargs))
+            return sources
+
+        # Largest files first, so that the smaller ones can fill in around them
+        pending = sorted(jobs, key=lambda job: self.estimate_split_memory(job[0]), reverse=True)
+        running = {}
+        sources = {}
+        with ProcessPoolExecutor(min(self.SPLIT_WORKERS, len(jobs))) as executor:
+            while pending or running:
+                # Start whatever fits in the budget. A file larger than the whole budget is split on its own
+                for job in list(pending):
+                    memory = self.estimate_split_memory(job[0])
+                    if running and (len(running) >= self.SPLIT_WORKERS or
+                                    sum(running.values()) + memory > self.SPLIT_MEMORY_BUDGET):
+                        continue
+                    # Each file is split by a single process, rather than each worker starting a pool of its own
+                    running[executor.submit(split_raw_eeg, *job, db_folder=db_folder, split_workers=1,
+                                            **kwargs)] = memory
+                    pending.remove(job)
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    del running[future]
+                    sources.update(future.result())
+        return sources
+
+
+def split_raw_eeg(raw_eeg, jacksheet_file, channel_map, db_folder, subject, experiment, session, output, complevel,
+                  split_workers=None):
+    """
+    Splits a single raw EEG file (or group of files) without touching sources.json.
+    Module-level so that it can be run in a worker process.
+    :param split_workers: if given, overrides the reader's own SPLIT_WORKERS
+    :return: the sources.json entry for the split file, or an empty dict if it could not be read
+    """
+    try:
+        reader = get_eeg_reader(raw_eeg, jacksheet_file, channel_map_filename=channel_map)
+    except KeyError as k:
+        traceback.print_exc()
+        logger.warn('Cannot split file with extension {}'.format(k))
+        return {}
+    if split_workers is not None:
+        reader.SPLIT_WORKERS = split_workers
+
+    split_eeg_filename = SplitEEGTask.SPLIT_FILENAME.format(subject=subject,
+                                                           experiment=experiment,
+                                                           session=session,
+                                                           time=reader.get_start_time_string())
+    return reader.split_data(db_folder, split_eeg_filename, output=output, complevel=complevel,
+                             record_sources=False)
                 
 
 
@@ -374,8 +444,7 @@ class EventCreationTask(PipelineTask):
 
         events = parser.clean_events(events) if events.shape != () else events
         self.pipeline.importer.tests.extend(parser.check_event_quality(events, files))
-        self.create_file(self.filename, to_json(events),
-                         '{}_events'.format(self.event_label))
+        self.create_events_files(self.filename, events, '{}_events'.format(self.event_label))
 
 
 class PruneEventsTask(PipelineTask):
@@ -391,15 +460,29 @@ class PruneEventsTask(PipelineTask):
             if len(filtered_events) == 0 or events is None:
                 logger.info('No events for this experiment. If there are subsequent PS4 sessions, do not panic.')
                 raise NoEventsError()
-            filtered_events = to_json(filtered_events)
-            self.create_file(fid, filtered_events, os.path.splitext(os.path.basename(fid))[0])
+            self.create_events_files(fid, filtered_events, os.path.splitext(os.path.basename(fid))[0])
+
+
+class AlignmentPlotTask(PipelineTask):
+    """Renders the alignment fits saved during event creation into plots."""
+
+    def __init__(self, critical=False):
+        super(AlignmentPlotTask, self).__init__(critical)
+        self.name = 'Alignment plots'
+
+    def _run(self, files, db_folder):
+        plots = render_fit_plots(db_folder)
+        logger.debug('Rendered {} alignment plots'.format(len(plots)))
 
 
 class RecognitionFlagTask(PipelineTask):
     def _run(self, files, db_folder):
-        event_file = os.path.join(db_folder, 'task_events.json')
-        events = from_json(event_file)
-        self.pipeline.register_info('Recognition', any(['RECOG' in tipe for tipe in np.unique(events.type)]))
+        npz_file = os.path.join(db_folder, 'task_events.npz')
+        if os.path.isfile(npz_file):
+            types = npz_columns(npz_file)['type']
+        else:
+            types = from_json(os.path.join(db_folder, 'task_events.json')).type
+        self.pipeline.register_info('Recognition', any(['RECOG' in tipe for tipe in np.unique(types)]))
 
 
 class ReportLaunchTask(PipelineTask):
@@ -459,12 +542,13 @@ class EventCombinationTask(PipelineTask):
             sort_field = self.sort_field
         event_files = [os.path.join(db_folder, '{}_events.json'.format(label)) for label in self.event_labels]
         event_files = [f for f in event_files if os.path.isfile(f)]
-        events = [from_json(event_file) for event_file in event_files]
+        # Strings read from JSON are stored as U256; narrowed, the events are several times smaller to combine
+        events = [compact(from_json(event_file)) for event_file in event_files]
         combiner = EventCombiner(events, sort_field=sort_field)
         combined_events = combiner.combine()
 
-        self.create_file('{}_events.json'.format(self.COMBINED_LABEL),
-                         to_json(combined_events), '{}_events'.format(self.COMBINED_LABEL))
+        self.create_events_files('{}_events.json'.format(self.COMBINED_LABEL), combined_events,
+                                 '{}_events'.format(self.COMBINED_LABEL))
 
 
 class MontageLinkerTask(PipelineTask):
@@ -538,7 +622,7 @@ class MatlabEventConversionTask(PipelineTask):
                                         self.original_session, files)
         events = converter.convert()
 
-        self.create_file(self.filename, to_json(events), '{}_events'.format(self.event_label))
+        self.create_events_files(self.filename, events, '{}_events'.format(self.event_label))
 
 
 class ImportEventsTask(PipelineTask):
@@ -619,6 +703,7 @@ class CompareEventsTask(PipelineTask):
             logger.warn("Could not find existing MATLAB file. Not executing comparison!")
             return
 
+        from ptsa.data.readers import BaseEventReader
         mat_events_reader = \
             BaseEventReader(
                 filename=mat_file,
@@ -45,3 +45,7 @@ class EEGError(Exception):
 
 class PeakFindingError(Exception):
     """Raised when there are errors peak finding."""
+
+
+class IndexValueError(KeyError, ValueError):
+    """Raised when a protocol index does not hold exactly one value for a field."""
@@ -1,6 +1,13 @@
+import hashlib
 import os
+from collections import OrderedDict
 from contextlib import contextmanager
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
 
 def mkdir(path):
     """Make a new directory with the correct permissions."""
@@ -31,3 +38,124 @@ def open_with_perms(filename, mode='r', *args, **kwargs):
 
     if mode == 'w':
         os.chmod(filename, 0o644)
+
+
+# ioctl that makes a file share the blocks of another (copy-on-write), on filesystems that support it
+FICLONE = 0x40049409
+
+COPY_BLOCK_SIZE = 2 ** 20
+
+
+def md5sum(filename):
+    """Calculates the md5 of a file's contents without reading it all into memory.
+
+    Parameters
+    ----------
+    filename : str
+
+    Returns
+    -------
+    str
+        Hex digest of the file's contents.
+
+    """
+    checksum = hashlib.md5()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(COPY_BLOCK_SIZE), b''):
+            checksum.update(block)
+    return checksum.hexdigest()
+
+
+def copy_with_md5(src, dst):
+    """Copies a file, calculating the md5 of its contents as it is copied.
+
+    Parameters
+    ----------
+    src : str
+    dst : str
+
+    Returns
+    -------
+    str
+        Hex digest of the copied contents.
+
+    """
+    checksum = hashlib.md5()
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        for block in iter(lambda: fsrc.read(COPY_BLOCK_SIZE), b''):
+            checksum.update(block)
+            fdst.write(block)
+    return checksum.hexdigest()
+
+
+def clone_file(src, dst):
+    """Makes ``dst`` a reflink (copy-on-write clone) of ``src``, without
+    copying its data. Hard links are never made, as files are sometimes
+    edited in place after being transferred, which would change ``src`` too.
+
+    Parameters
+    ----------
+    src : str
+    dst : str
+
+    Returns
+    -------
+    str or None
+        ``'reflink'``, or None if the filesystem does not support reflinks
+        (in which case ``dst`` does not exist).
+
+    """
+    if fcntl is None:
+        return None
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        return 'reflink'
+    except (IOError, OSError):
+        if os.path.exists(dst):
+            os.remove(dst)
+        return None
+
+
+class FileCache(object):
+    """What was read from each file, kept until the file changes. Only the
+    ``max_entries`` most recently used results are kept.
+
+    Parameters
+    ----------
+    read : callable
+        ``read(filename, *args)`` reads the file.
+    max_entries : int
+
+    """
+    def __init__(self, read, max_entries):
+        self.read = read
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, filename, *args):
+        """Reads a file, or returns what was read from it before if its
+        modification time is unchanged.
+
+        Parameters
+        ----------
+        filename : str
+        args : list
+            Further arguments to ``read``. Each combination is kept apart.
+
+        """
+        key = (os.path.abspath(filename),) + args
+        mtime = os.path.getmtime(filename)
+        entry = self._entries.pop(key, None)
+        if entry is None or entry[0] != mtime:
+            entry = (mtime, self.read(filename, *args))
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry[1]
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
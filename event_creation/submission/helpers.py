@@ -1,5 +1,7 @@
 import numpy as np
-from scipy.signal import butter, filtfilt
+from .lazy import lazy_import
+
+signal = lazy_import('scipy.signal')
 
 
 def butter_filt(data, freq_range, sample_rate=500, filt_type='bandstop', order=4):
@@ -25,7 +27,7 @@ def butter_filt(data, freq_range, sample_rate=500, filt_type='bandstop', order=4
     freq_range = freq_range / nyq
     # Get the Butterworth values and run the filter for zero phase distortion
     for i in range(np.shape(freq_range)[0]):
-        Bb, Ab = butter(order, freq_range[i, :], btype=filt_type)
+        Bb, Ab = signal.butter(order, freq_range[i, :], btype=filt_type)
         pad = 3 * (max(len(Ab), len(Bb)) - 1)  # calculate padlen like MATLAB instead of SciPy
-        data = filtfilt(Bb, Ab, data, padlen=pad)
+        data = signal.filtfilt(Bb, Ab, data, padlen=pad)
     return data
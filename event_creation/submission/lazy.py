@@ -0,0 +1,61 @@
+"""
+Deferred loading of heavy dependencies (mne, tables, pandas, scipy, ...).
+
+lazy_import returns a placeholder module that is only executed when one of its attributes is first used, so that
+importing the submission package (e.g. to list imported sessions, or to build an Automator) does not pay for
+libraries that are only needed once a reader, aligner or cleaning step actually runs. Likewise, a dependency that is
+not installed only causes an ImportError once something tries to use it.
+"""
+import importlib.util
+import sys
+import threading
+import types
+import warnings
+
+_IMPORT_LOCK = threading.RLock()
+
+
+class MissingModule(types.ModuleType):
+    """
+    Stands in for a module that is not installed, raising ImportError when it is used
+    """
+
+    def __getattr__(self, item):
+        if item.startswith('__'):
+            raise AttributeError(item)
+        raise ImportError('No module named {} (needed for {}.{})'.format(self.__name__, self.__name__, item),
+                          name=self.__name__)
+
+    def __bool__(self):
+        return False
+
+    __nonzero__ = __bool__
+
+
+def lazy_import(name, warn_missing=False):
+    """
+    :param name: full name of the module (e.g. 'scipy.stats'). Parent packages are imported immediately
+    :param warn_missing: whether to warn straight away if the module is not installed
+    :return: the module, which is loaded on first attribute access, or a MissingModule
+    """
+    with _IMPORT_LOCK:
+        if name in sys.modules:
+            return sys.modules[name]
+        try:
+            spec = importlib.util.find_spec(name)
+        except ImportError:  # A parent package is missing
+            spec = None
+        if spec is None:
+            if warn_missing:
+                warnings.warn('{} not available'.format(name))
+            return MissingModule(name)
+        loader = importlib.util.LazyLoader(spec.loader)
+        spec.loader = loader
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        loader.exec_module(module)
+        parent, _, child = name.rpartition('.')
+        if parent:
+            # As the import statement would, so that e.g. scipy.stats also resolves through scipy
+            setattr(sys.modules[parent], child, module)
+        return module
@@ -1,24 +1,115 @@
 import os
+import atexit
 import logging
-from logging.handlers import TimedRotatingFileHandler
+from collections import OrderedDict
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
 import traceback as tb
 
+try:
+    import queue
+except ImportError:  # Python 2
+    import Queue as queue
+
 from . import fileutil
 from .configuration import paths
 
 
+class LogMessage(object):
+    """
+    A log message that is only formatted when a handler emits it, so that debug calls with nobody listening (or
+    in hot loops) cost next to nothing. The subject and label are captured when the message is created.
+    """
+    __slots__ = ('msg', 'args', 'prefix', 'subject', 'label')
+
+    def __init__(self, msg, args, prefix, subject, label):
+        self.msg = msg
+        self.args = args
+        self.prefix = prefix
+        self.subject = subject
+        self.label = label
+
+    def __str__(self):
+        msg = str(self.msg)
+        if self.args:
+            msg = msg.format(*self.args)
+        return '{subject} - {label} - {msg}'.format(msg=self.prefix + msg, subject=self.subject, label=self.label)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queues records as they are, rather than formatting them first as QueueHandler does, so that formatting happens
+    in the listener's thread
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class SubjectFileHandler(logging.Handler):
+    """
+    Writes records to the master log file and to the log file of the subject that was set when they were logged.
+    Subject log files are opened once and kept open (up to MAX_SUBJECT_HANDLERS of them) across sessions.
+    """
+
+    MAX_SUBJECT_HANDLERS = 32
+
+    def __init__(self, master_handler, formatter):
+        super(SubjectFileHandler, self).__init__(logging.DEBUG)
+        self.master_handler = master_handler
+        self.formatter = formatter
+        self.subject_handlers = OrderedDict()
+
+    @staticmethod
+    def subject_filename(protocol, subject):
+        return os.path.join(paths.db_root, 'protocols', protocol, 'subjects', subject, 'log.txt')
+
+    def subject_handler(self, protocol, subject):
+        key = (protocol, subject)
+        if key in self.subject_handlers:
+            self.subject_handlers[key] = self.subject_handlers.pop(key)
+        else:
+            filename = self.subject_filename(protocol, subject)
+            if not os.path.exists(os.path.dirname(filename)):
+                fileutil.makedirs(os.path.dirname(filename), exist_ok=True)
+            handler = logging.FileHandler(filename)
+            handler.setLevel(logging.DEBUG)
+            handler.setFormatter(self.formatter)
+            self.subject_handlers[key] = handler
+            if len(self.subject_handlers) > self.MAX_SUBJECT_HANDLERS:
+                _, oldest = self.subject_handlers.popitem(last=False)
+                oldest.close()
+        return self.subject_handlers[key]
+
+    def emit(self, record):
+        if record.levelno >= self.master_handler.level:
+            self.master_handler.handle(record)
+        protocol = getattr(record, 'protocol', None)
+        subject = getattr(record, 'subject', None)
+        if protocol and subject:
+            try:
+                self.subject_handler(protocol, subject).handle(record)
+            except Exception:
+                self.handleError(record)
+
+    def close(self):
+        for handler in self.subject_handlers.values():
+            handler.close()
+        self.subject_handlers.clear()
+        self.master_handler.close()
+        super(SubjectFileHandler, self).close()
+
+
 class Logger(object):
     def __init__(self):
         self.label = None  # type: str
         self.subject = None  # type: str
         self.protocol = None  # type: str
-        self.subject_handler = None  # type: logging.Handler
 
         self._logger = logging.getLogger('submission')
-        self._logger.setLevel(logging.DEBUG)
 
         self.formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 
+        # The terminal is written to directly, so that log messages stay in order with printed output
         self.stdout_handler = logging.StreamHandler()
         self.stdout_handler.setLevel(logging.INFO)
         self.stdout_handler.setFormatter(self.formatter)
@@ -31,67 +122,94 @@ class Logger(object):
         # self.master_file_handler = logging.handlers.TimedRotatingFileHandler(
             # os.path.join(paths.db_root, 'protocols', 'log.txt'),
             # 'D', 30, backupCount=1)
-        self.master_file_handler = logging.FileHandler(os.path.join(paths.db_root, 'protocols', 'log.txt'))
+        # Only opened once something is logged to it, rather than whenever the package is imported
+        self.master_file_handler = logging.FileHandler(os.path.join(paths.db_root, 'protocols', 'log.txt'),
+                                                       delay=True)
         self.master_file_handler.setLevel(logging.INFO)
         self.master_file_handler.setFormatter(self.formatter)
-        self._logger.addHandler(self.master_file_handler)
+
+        # Log files (which live on shared network storage) are written from a background thread
+        self.file_handler = SubjectFileHandler(self.master_file_handler, self.formatter)
+        self._queue = queue.Queue()
+        self.queue_handler = DeferredQueueHandler(self._queue)
+        self._logger.addHandler(self.queue_handler)
+        self._listener = QueueListener(self._queue, self.file_handler)
+        self._listener.start()
+        atexit.register(self.close)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._write_synchronously)
+
+        self._update_level()
+
+    def _update_level(self):
+        """Only create records at levels that some handler will write."""
+        levels = [self.stdout_handler.level, self.master_file_handler.level]
+        if self.subject:
+            levels.append(logging.DEBUG)
+        self._logger.setLevel(min(levels))
 
     def set_stdout_level(self, level):
         """Set the log level for the stream handler."""
         self.stdout_handler.setLevel(level)
-
-    def _set_subject_handler(self):
-        """Add a file handler to log to the subject directory."""
-        if self.subject_handler:
-            self._logger.removeHandler(self.subject_handler)
-        filename = os.path.join(paths.db_root,
-                                'protocols', self.protocol,
-                                'subjects', self.subject,
-                                'log.txt')
-        if not os.path.exists(os.path.dirname(filename)):
-            fileutil.makedirs(os.path.dirname(filename))
-        self.subject_handler = logging.FileHandler(filename)
-        self.subject_handler.setLevel(logging.DEBUG)
-        self.subject_handler.setFormatter(self.formatter)
-        self._logger.addHandler(self.subject_handler)
-        self.debug("Log file {} opened".format(filename))
+        self._update_level()
 
     def set_label(self, label):
         """Set the label to be attached to log messages."""
         self.label = label
 
     def set_subject(self, subject, protocol):
-        """Set the subject to be attached to log messages."""
+        """Set the subject to be attached to log messages, which are then also logged to the subject's log file."""
         self.subject = subject
         self.protocol = protocol
-        self._set_subject_handler()
+        self._update_level()
+        self.debug("Log file {} opened", SubjectFileHandler.subject_filename(protocol, subject))
 
     def unset_subject(self):
         """Unset the current subject."""
         self.subject = None
         self.protocol = None
-        if self.subject_handler:
-            self._logger.removeHandler(self.subject_handler)
-            self.subject_handler = None
-
-    @staticmethod
-    def _format_msg(msg, **kwargs):
-        return '{subject} - {label} - {msg}'.format(msg=msg, **kwargs)
-
-    def debug(self, msg):
-        self._logger.debug(self._format_msg(msg, subject=self.subject, label=self.label))
-
-    def info(self, msg):
-        self._logger.info(self._format_msg(msg, subject=self.subject, label=self.label))
-
-    def warn(self, msg):
-        self._logger.warn(self._format_msg(" ****** " + msg, subject=self.subject, label=self.label))
-
-    def error(self, msg):
-        self._logger.error(self._format_msg(" ************ " + msg, subject=self.subject, label=self.label))
-
-    def critical(self, msg):
-        self._logger.critical(self._format_msg(" ********************* " + msg, subject=self.subject, label=self.label))
+        self._update_level()
+
+    def _write_synchronously(self):
+        """
+        The listener thread does not survive a fork, and worker processes may exit without running atexit handlers,
+        so forked processes write their log files directly
+        """
+        self._listener = None
+        self._logger.removeHandler(self.queue_handler)
+        self._logger.addHandler(self.file_handler)
+
+    def flush(self):
+        """Wait until every queued message has been written."""
+        if self._listener is not None:
+            self._queue.join()
+
+    def close(self):
+        """Write any queued messages and stop the background thread."""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+            self.file_handler.close()
+
+    def _log(self, level, prefix, msg, args):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, LogMessage(msg, args, prefix, self.subject, self.label),
+                             extra={'subject': self.subject, 'protocol': self.protocol})
+
+    def debug(self, msg, *args):
+        self._log(logging.DEBUG, '', msg, args)
+
+    def info(self, msg, *args):
+        self._log(logging.INFO, '', msg, args)
+
+    def warn(self, msg, *args):
+        self._log(logging.WARNING, " ****** ", msg, args)
+
+    def error(self, msg, *args):
+        self._log(logging.ERROR, " ************ ", msg, args)
+
+    def critical(self, msg, *args):
+        self._log(logging.CRITICAL, " ********************* ", msg, args)
 
 try:
     logger = Logger()
@@ -1,6 +1,4 @@
 import os
-import requests
-import bptools.pairs
 
 from ..neurorad.json_cleaner import clean_json_dumps
 from ..neurorad.localization import Localization,InvalidContactException
@@ -10,6 +8,11 @@ from ..neurorad import (vox_mother_converter, calculate_transformation, add_loca
 from .log import logger
 from .tasks import PipelineTask
 from .exc import WebAPIError
+from .lazy import lazy_import
+
+requests = lazy_import('requests')
+bptools_pairs = lazy_import('bptools.pairs')
+
 
 class LoadVoxelCoordinatesTask(PipelineTask):
 
@@ -250,7 +253,7 @@ class CreateMontageTask(PipelineTask):
         self.nums_to_labels = nums_to_labels
         self.labels_to_nums = labels_to_nums
         if self.reference_scheme == 'bipolar':
-            self.pairs_frame = bptools.pairs.create_pairs(jacksheet)
+            self.pairs_frame = bptools_pairs.create_pairs(jacksheet)
 
     def build_contacts_dict(self,db_folder,name):
         contacts = {}
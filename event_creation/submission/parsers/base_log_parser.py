@@ -5,9 +5,9 @@ import os
 import re
 import sqlite3
 import numbers
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
-import pandas as pd
 
 from ..log import logger
 from ..exc import LogParseError, UnknownExperimentError, EventFieldError
@@ -15,6 +15,92 @@ from ..readers.eeg_reader import read_jacksheet
 from ..viewers.recarray import pformat_rec, to_dict, from_dict
 from ..exc import NoAnnotationError
 from . import dtypes
+from .. import fileutil
+from ..lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+
+_COMPILED_ANN_REGEXES = {}
+
+
+def _parse_ann_file(ann_file, regex):
+    if regex not in _COMPILED_ANN_REGEXES:
+        _COMPILED_ANN_REGEXES[regex] = re.compile(regex)
+    pattern = _COMPILED_ANN_REGEXES[regex]
+    with codecs.open(ann_file, encoding='latin1') as f:
+        split_lines = [line.split() for line in f if line[0] != '#' and pattern.match(line.strip())]
+    return (np.array([float(line[0]) for line in split_lines], dtype=float),
+            np.array([int(line[1]) for line in split_lines], dtype=int),
+            [' '.join(line[2:]) for line in split_lines])
+
+
+# Parsed annotation files, by (path, regex)
+LOADED_ANN_FILES = fileutil.FileCache(_parse_ann_file, max_entries=256)
+
+
+def read_ann_file(ann_file, regex):
+    """
+    Parses an annotation file, or returns the parse kept in LOADED_ANN_FILES
+    :param ann_file: path to the .ann file
+    :param regex: regular expression that annotation lines (other than comments) must match
+    :return: (rectimes, item numbers, words) of the matching lines, as (float array, int array, list of str)
+    """
+    return LOADED_ANN_FILES.get(ann_file, regex)
+
+
+class PresentationIndex(object):
+    """
+    Rows of a growing events array at which each item was presented, keyed by the value of one field (e.g.
+    item_name). Recall handlers look up the presentation of every recalled word; scanning the whole array each time
+    makes the recall phase of a session quadratic in its length, so only the rows added since the previous lookup
+    are scanned. If the rows found for an item no longer present it (e.g. because events were reordered), the index
+    is rebuilt.
+    """
+
+    def __init__(self, field, types):
+        """
+        :param field: field of the events identifying the item
+        :param types: event types that present an item
+        """
+        self.field = field
+        self.types = types
+        self._rows = {}
+        self._n_indexed = 0
+
+    def _reset(self):
+        self._rows = {}
+        self._n_indexed = 0
+
+    def _extend(self, events):
+        """
+        Indexes the presentations among the events added since the last call
+        """
+        if len(events) < self._n_indexed:
+            self._reset()
+        new_events = events[self._n_indexed:]
+        is_presentation = np.isin(new_events['type'], self.types)
+        rows = np.flatnonzero(is_presentation) + self._n_indexed
+        for row, item in zip(rows.tolist(), new_events[self.field][is_presentation].tolist()):
+            self._rows.setdefault(item, []).append(row)
+        self._n_indexed = len(events)
+
+    def _matches(self, item, events, rows):
+        return (events[self.field][rows] == item).all() and np.isin(events['type'][rows], self.types).all()
+
+    def rows(self, item, events):
+        """
+        :param item: value of the field to look up
+        :param events: all events so far
+        :return: integer array of the rows of events that present the item, in order
+        """
+        self._extend(events)
+        rows = np.array(self._rows.get(item, []), dtype=int)
+        if len(rows) and not self._matches(item, events, rows):
+            self._reset()
+            self._extend(events)
+            rows = np.array(self._rows.get(item, []), dtype=int)
+        return rows
 
 
 class BaseLogParser(object):
@@ -37,6 +123,14 @@ class BaseLogParser(object):
     # Maximum amount of time after which a valid annotation can appear in a .ann file
     MAX_ANN_LENGTH = 600000
 
+    # Number of annotation files read at once when loading a session's annotations
+    ANN_READ_THREADS = 4
+
+    # Field identifying the item of a presentation event, and the types of presentation events, for
+    # _presentation_rows
+    _PRESENTATION_FIELD = 'item_name'
+    _PRESENTATION_TYPES = ('WORD', 'PRACTICE_WORD')
+
     # Tests to run in order to validate output
     _TESTS = []
 
@@ -78,6 +172,9 @@ class BaseLogParser(object):
         self._type_to_new_event = {}
         self._type_to_modify_events = {}
 
+        # PresentationIndex of the events being parsed, by (field, types)
+        self._presentation_indexes = {}
+
         # Try to read the jacksheet if it is present
         if 'contacts' in files:
             self._jacksheet = read_jacksheet(files['contacts'])
@@ -92,6 +189,8 @@ class BaseLogParser(object):
                                for ann_file in files['annotations']}
         except KeyError:
             self._ann_files = []
+        # Parsed annotations, by ann_id. Loaded on first use
+        self._annotations = None
 
     @classmethod
     def empty_stim_params(cls):
@@ -255,14 +354,42 @@ class BaseLogParser(object):
         if ann_id not in self._ann_files:
             raise NoAnnotationError("Missing %s.ann"%ann_id)
 
-        # Read the annotation file, getting everything that matches the regular expression
-        ann_file = self._ann_files[ann_id]
-        lines = codecs.open(ann_file, encoding='latin1').readlines()
-        matching_lines = [line for line in lines if line[0] != '#' and re.match(self.MATCHING_ANN_REGEX, line.strip())]
+        if self._annotations is None:
+            self._annotations = self._load_annotations()
+        rectimes, item_nums, words = self._annotations[ann_id]
 
         # Remove events with rectimes greater than 10 minutes, because they're probably a mistake
-        split_lines = [line.split() for line in matching_lines if float(line.split()[0]) < self.MAX_ANN_LENGTH]
-        return [(float(line[0]), int(line[1]), ' '.join(line[2:])) for line in split_lines]
+        keep = np.flatnonzero(rectimes < self.MAX_ANN_LENGTH)
+        return [(float(rectimes[i]), int(item_nums[i]), words[i]) for i in keep]
+
+    def _load_annotations(self):
+        """
+        Reads all of the session's annotation files at once, so that handlers asking for one list's recalls (or for
+        the same file more than once) read from memory
+        :return: dict of {ann_id: (rectimes, item numbers, words)}
+        """
+        ann_ids = list(self._ann_files)
+        if len(ann_ids) <= 1:
+            return {ann_id: read_ann_file(self._ann_files[ann_id], self.MATCHING_ANN_REGEX) for ann_id in ann_ids}
+        with ThreadPoolExecutor(min(self.ANN_READ_THREADS, len(ann_ids))) as executor:
+            parsed = executor.map(lambda ann_id: read_ann_file(self._ann_files[ann_id], self.MATCHING_ANN_REGEX),
+                                  ann_ids)
+            return dict(zip(ann_ids, parsed))
+
+    def _presentation_rows(self, item, events, field=None, types=None):
+        """
+        Finds the events at which an item was presented, through an index that is extended as events are created
+        rather than by scanning all events
+        :param item: value of the field to look up (e.g. the recalled word)
+        :param events: all events so far
+        :param field: field identifying the item (defaults to _PRESENTATION_FIELD)
+        :param types: types of presentation events (defaults to _PRESENTATION_TYPES)
+        :return: integer array of the rows of the presentation events, in order
+        """
+        key = (field or self._PRESENTATION_FIELD, tuple(types or self._PRESENTATION_TYPES))
+        if key not in self._presentation_indexes:
+            self._presentation_indexes[key] = PresentationIndex(*key)
+        return self._presentation_indexes[key].rows(item, events)
 
     def _read_primary_log(self):
         """
@@ -312,6 +439,7 @@ class BaseLogParser(object):
         """
         # Start with a single empty event
         events = self._empty_event
+        self._presentation_indexes = {}
         # Loop over the contents of the log file
         for raw_event in self._contents:
             this_type = self._get_raw_event_type(raw_event)
@@ -844,7 +972,7 @@ class StimComparator(object):
                 _ = self.get_subfield(self.events2[0], field_name2)
                 self.fields_to_compare[field_name1] = field_name2
             except ValueError:
-                logger.warn('Could not access fields {}/{} for comparison'.format(field_name1, field_name2))
+                logger.warn('Could not access fields {}/{} for comparison', field_name1, field_name2)
 
         self.exceptions = exceptions
 
@@ -983,6 +1111,11 @@ class EventCombiner(object):
                 # pick the named one
                 dtype_0 = dtype_0 if dtype_0.names else dtype
                 continue
+            if dtype.subdtype is not None and dtype_0.subdtype is not None:
+                # Subarrays (e.g. stim_params) are combined field by field; max() would pick one side whole
+                base = self.combine_dtypes([dtype_0.subdtype[0], dtype.subdtype[0]])
+                dtype_0 = np.dtype((base, max(dtype_0.subdtype[1], dtype.subdtype[1])))
+                continue
             if dtype.names is None:
                 dtype_0 = max(dtype_0, dtype)
                 continue
@@ -1001,7 +1134,9 @@ class EventCombiner(object):
                         type_dict[name] = max(dtype_0[name], dtype[name])
                     else:
                         type_dict[name] = dtype_0[name] if name in dtype_0.names else dtype[name]
-                dtype_0 = np.dtype([x for x in type_dict.items()])
+                # Keep the fields in order; nested records are copied into the combined dtype by position
+                names = list(dtype_0.names) + [name for name in dtype.names if name not in dtype_0.names]
+                dtype_0 = np.dtype([(name, type_dict[name]) for name in names])
         return dtype_0
 
 
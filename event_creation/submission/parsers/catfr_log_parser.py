@@ -3,6 +3,7 @@ import numpy as np
 
 from .base_log_parser import BaseSessionLogParser
 from ..viewers.recarray import strip_accents
+from ..readers.wordpool import load_wordpool
 from .fr_log_parser import FRSessionLogParser
 from ..quality import fr_tests
 from .dtypes import fr_fields,category_fields
@@ -31,6 +32,8 @@ class CatFRSessionLogParser(BaseSessionLogParser):
 
     _TESTS = FRSessionLogParser._TESTS + [fr_tests.test_catfr_categories]
 
+    _PRESENTATION_TYPES = ('WORD',)
+
     def __init__(self, protocol, subject, montage, experiment, session, files):
         """
         constructor
@@ -50,7 +53,7 @@ class CatFRSessionLogParser(BaseSessionLogParser):
             wordpool_type = 'no_accent_wordpool'
         else:
             wordpool_type = 'wordpool'
-        self._wordpool = np.array([x.strip() for x in open(files[wordpool_type]).readlines()])
+        self._wordpool = load_wordpool(files[wordpool_type])
         self._list = -999
         self._serialpos = -999
         self._stim_list = False
@@ -188,11 +191,7 @@ class CatFRSessionLogParser(BaseSessionLogParser):
     def apply_word(self, event):
         event.item_name = self._word.upper()
         self._word = self._word.upper()
-        if (self._wordpool == self._word).any():
-            wordno = np.where(self._wordpool == self._word)
-            event.item_num = wordno[0] + 1
-        else:
-            event.item_num = -1
+        event.item_num = self._wordpool.item_num(self._word)
         return event
 
     def event_practice_word(self, split_line):
@@ -262,20 +261,20 @@ class CatFRSessionLogParser(BaseSessionLogParser):
 
             # If XLI
 
-            pres_mask = self.find_presentation(word, events)
-            pres_list = np.unique(events[pres_mask].list)
+            pres_rows = self._presentation_rows(word, events)
+            pres_list = np.unique(events.list[pres_rows])
 
             # Correct recall or PLI
             if len(pres_list) == 1:
                 new_event.intrusion = self._list - pres_list[0]
                 if new_event.intrusion == 0:
-                    new_event.category_num = np.unique(events[pres_mask].category_num)
-                    new_event.category = np.unique(events[pres_mask].category)
-                    new_event.serialpos = np.unique(events[pres_mask].serialpos)
+                    new_event.category_num = np.unique(events.category_num[pres_rows])
+                    new_event.category = np.unique(events.category[pres_rows])
+                    new_event.serialpos = np.unique(events.serialpos[pres_rows])
                     new_event.recalled = True
-                    if not any(events.recalled[pres_mask]):
-                        events.recalled[pres_mask] = True
-                        events.rectime[pres_mask] = new_event.rectime
+                    if not any(events.recalled[pres_rows]):
+                        events.recalled[pres_rows] = True
+                        events.rectime[pres_rows] = new_event.rectime
             else:  # XLI
                 new_event.intrusion = -1
 
@@ -1,10 +1,15 @@
 import numpy as np
-import pandas as pd
 from . import dtypes
 from .base_log_parser import BaseUnityLogParser
 import six
+from ..lazy import lazy_import
+
+pd = lazy_import('pandas')
 
 class CourierSessionLogParser(BaseUnityLogParser):
+
+    _PRESENTATION_FIELD = 'item'
+    _PRESENTATION_TYPES = ('WORD',)
     def __init__(self, protocol, subject, montage, experiment, session, files):
         super(CourierSessionLogParser, self).__init__(protocol, subject, montage, experiment, session, files)
         self._trial = 0
@@ -100,28 +105,29 @@ class CourierSessionLogParser(BaseUnityLogParser):
 
 
     def _identify_intrusion(self, events, new_event):
-        words = events[events['type'] == 'WORD']
-        word_event = words[(words['item'] == new_event["item"])]
+        word_rows = self._presentation_rows(new_event["item"], events)
 
-        if len(word_event) > 1:
+        if len(word_rows) > 1:
             raise Exception("Repeat items not supported or expected. Please check your data.")
 
-        elif len(word_event) == 0: #ELI
+        elif len(word_rows) == 0: #ELI
             new_event.intrusion  = -1
+            return new_event
 
-        elif word_event["trial"][0] == self._trial:
+        word_event = events[word_rows[0]]
+        if word_event["trial"] == self._trial:
             new_event.intrusion = 0
-            new_event.serialpos = words[words['item'] == new_event["item"]]['serialpos'][0]
-            new_event.store  = words[words['item'] == new_event["item"]]['store'][0]
-            new_event.storeX = words[words['item'] == new_event["item"]]['storeX'][0]
-            new_event.storeZ = words[words['item'] == new_event["item"]]['storeZ'][0]
-
-        elif word_event["trial"][0] >= 0: # PLI
-            new_event.intrusion = self._trial - word_event["trial"][0]
-            new_event.serialpos = words[words['item'] == new_event["item"]]['serialpos'][0]
-            new_event.store  = words[words['item'] == new_event["item"]]['store'][0]
-            new_event.storeX = words[words['item'] == new_event["item"]]['storeX'][0]
-            new_event.storeZ = words[words['item'] == new_event["item"]]['storeZ'][0]
+            new_event.serialpos = word_event['serialpos']
+            new_event.store  = word_event['store']
+            new_event.storeX = word_event['storeX']
+            new_event.storeZ = word_event['storeZ']
+
+        elif word_event["trial"] >= 0: # PLI
+            new_event.intrusion = self._trial - word_event["trial"]
+            new_event.serialpos = word_event['serialpos']
+            new_event.store  = word_event['store']
+            new_event.storeX = word_event['storeX']
+            new_event.storeZ = word_event['storeZ']
         else:
             raise Exception("Processing error, word event was not presented during experimental trial")
 
@@ -321,9 +327,9 @@ class CourierSessionLogParser(BaseUnityLogParser):
             new_event = self._identify_intrusion(events, new_event)
 
             if new_event.intrusion > 0:
-                events.intruded[(events["type"] == 'WORD') & (events["item"] == new_event["item"])] = 1
+                events.intruded[self._presentation_rows(new_event["item"], events)] = 1
             elif new_event.intrusion == 0:
-                events.recalled[(events["type"] == 'WORD') & (events["item"] == new_event["item"])] = 1
+                events.recalled[self._presentation_rows(new_event["item"], events)] = 1
 
             events = np.append(events, new_event).view(np.recarray) 
 
@@ -387,8 +393,6 @@ class CourierSessionLogParser(BaseUnityLogParser):
         except:
             ann_outputs = self._parse_ann_file("final free")
 
-        words = events[events["type"] == 'WORD']
-
         for recall in ann_outputs:
             new_event = self._new_rec_event(recall, rec_start_event)
 
@@ -400,7 +404,7 @@ class CourierSessionLogParser(BaseUnityLogParser):
 
             if new_event.intrusion >= 0:
                 new_event.intrusion = 0
-                events.finalrecalled[(events["type"] == "WORD") & (events["item"] == new_event["item"])] = 1
+                events.finalrecalled[self._presentation_rows(new_event["item"], events)] = 1
             
             events = np.append(events, new_event).view(np.recarray) 
 
@@ -2,8 +2,13 @@
 Datatype specifications for use by parser classes,
 to make sure that different parsers for the same experiment return arrays with the same fields.
 Fields are specified as (name, default_value,dtype_string)
-"""
 
+The string fields are sized for the longest value they could hold (e.g. 'U256' for eegfile), so most of each event
+is padding. compact() narrows them to the longest value actually present, which makes events several times smaller
+and cheaper to copy, and widen() converts them back. Both are lossless, and to_dict/to_json give the same output for
+compact and wide events.
+"""
+import numpy as np
 
 
 # Defaults
@@ -311,3 +316,55 @@ thr_fields =(
     ('stim_list', False, 'b1'),
     ('is_stim', False, 'b1'),
 )
+
+
+# Compact events
+
+def _compact_dtype(dtype, values):
+    """
+    :param dtype: dtype (without subarray shape) of values
+    :param values: array of values of this dtype
+    :return: dtype with its string fields narrowed to the longest string in values
+    """
+    if dtype.names is None:
+        if dtype.kind in 'US':
+            longest = int(np.char.str_len(values).max()) if values.size else 0
+            return np.dtype((dtype.kind, max(longest, 1)))
+        return dtype
+    fields = []
+    for name in dtype.names:
+        field_dtype = dtype.fields[name][0]
+        base, shape = field_dtype.subdtype or (field_dtype, ())
+        field = (name, _compact_dtype(base, values[name]))
+        fields.append(field + (shape,) if shape else field)
+    return np.dtype(fields)
+
+
+def compact_dtype(events):
+    """
+    :param events: structured array of events
+    :return: dtype with the fields of events.dtype, in the same order, with each string field (including those of
+             nested records such as stim_params) just wide enough for the longest value it holds in events
+    """
+    return _compact_dtype(events.dtype, events)
+
+
+def compact(events):
+    """
+    :param events: structured array of events
+    :return: copy of events with compact_dtype(events)
+    """
+    return events.astype(compact_dtype(events)).view(np.recarray)
+
+
+def widen(events, dtype):
+    """
+    Converts events back to a wider dtype with the same fields, e.g. the dtype of the parser's template
+    :param events: structured array of events (e.g. as returned by compact)
+    :param dtype: dtype to convert to. Its string fields must be at least as wide as those of events
+    :return: copy of events with the given dtype
+    """
+    dtype = np.dtype(dtype)
+    if dtype.names != events.dtype.names:
+        raise ValueError('Fields {} do not match {}'.format(events.dtype.names, dtype.names))
+    return events.astype(dtype).view(np.recarray)
@@ -1,8 +1,12 @@
+from collections import Counter
 from .base_log_parser import BaseLogParser
+from ..readers.wordpool import load_wordpool
 import numpy as np
-import pandas as pd
 from . import dtypes
 import json
+from ..lazy import lazy_import
+
+pd = lazy_import('pandas')
 
 class BaseElememLogParser(BaseLogParser):
     """
@@ -120,12 +124,12 @@ class ElememRepFRParser(BaseElememLogParser):
         self._serialpos = -999
         self.practice = True
         self.current_num = -999
+        self._n_events_at_last_recall = 0
         if self._include_stim_params:
             self._stim_list = False
 
         if("wordpool" in list(files.keys())):
-            with open(files["wordpool"]) as f:
-                self.wordpool = [line.rstrip() for line in f]
+            self.wordpool = load_wordpool(files["wordpool"])
 
         else:
             raise Exception("wordpool not found in transferred files")
@@ -318,19 +322,38 @@ class ElememRepFRParser(BaseElememLogParser):
 
             # Append the new event
             events = np.append(events, new_event).view(np.recarray)
-            events = self.modify_repeats(events)
-
+            # Not counting the empty event that parse() starts with
+            self._n_events_at_last_recall = len(events) - 1
 
         return events
 
-    def modify_repeats(self, events):
-        # FIXME: this could be a lot more readable
-        repeat_mask = [True if ev.item_num in events[:i][events[:i]["type"] =="WORD"].item_num else False for i, ev in enumerate(events)]
-        events.is_repeat[repeat_mask] = True
-
-        for w in np.unique(events[events["type"] == "WORD"]["item_name"]):
-            events.repeats[((events["type"] == "WORD") | (events["type"] == "REC_WORD")) & (events["item_name"] == w)] = len(events[(events["item_name"] == w) & (events["type"] == "WORD")])
+    def parse(self):
+        events = super().parse().view(np.recarray)
+        return self.modify_repeats(events)
 
+    def modify_repeats(self, events):
+        """
+        Annotates repeated presentations once all events are parsed, in a single ordered pass. Only the events up to
+        the last recall are annotated, and only the words presented among them are counted, as when repeats were
+        annotated after every recall
+        :param events: all events of the session
+        :return: events, where is_repeat marks events whose item_num was presented in an earlier WORD event, and
+                 repeats gives WORD and REC_WORD events the number of times their word was presented
+        """
+        annotated = events[:self._n_events_at_last_recall]
+        is_word = annotated["type"] == "WORD"
+        presented = set()
+        for i, (item_num, word_event) in enumerate(zip(annotated.item_num.tolist(), is_word.tolist())):
+            if item_num in presented:
+                annotated.is_repeat[i] = True
+            if word_event:
+                presented.add(item_num)
+
+        n_presentations = Counter(annotated["item_name"][is_word].tolist())
+        for i in np.flatnonzero(is_word | (annotated["type"] == "REC_WORD")):
+            word = annotated["item_name"][i]
+            if word in n_presentations:
+                annotated.repeats[i] = n_presentations[word]
 
         return events
 
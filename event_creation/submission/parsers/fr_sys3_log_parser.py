@@ -127,19 +127,19 @@ class FRSys3LogParser(FRSessionLogParser,BaseSys3_1LogParser):
             else:
                 new_event.type = 'REC_WORD'
 
-            pres_mask = self.find_presentation(word, events)
-            pres_list = np.unique(events[pres_mask].list)
-            pres_mask = np.logical_and(pres_mask, events.list == self._list)
+            pres_rows = self._presentation_rows(word, events)
+            pres_list = np.unique(events.list[pres_rows])
+            pres_rows = pres_rows[events.list[pres_rows] == self._list]
 
             # Correct recall or PLI
             if len(pres_list) >= 1:
                 new_event.intrusion = self._list - max(pres_list)
                 if new_event.intrusion == 0:
-                    new_event.serialpos = np.unique(events[pres_mask].serialpos)
+                    new_event.serialpos = np.unique(events.serialpos[pres_rows])
                     new_event.recalled = True
-                    if not any(events.recalled[pres_mask]):
-                        events.recalled[pres_mask] = True
-                        events.rectime[pres_mask] = new_event.rectime
+                    if not any(events.recalled[pres_rows]):
+                        events.recalled[pres_rows] = True
+                        events.rectime[pres_rows] = new_event.rectime
             else:  # XLI
                 new_event.intrusion = -1
 
@@ -243,8 +243,9 @@ class catFRSys3LogParser(FRSys3LogParser):
         events= super(catFRSys3LogParser, self).clean_events(events).view(np.recarray)
         is_recall = (events.type=='REC_WORD') & (events.intrusion != -1)
         rec_events = events[is_recall]
-        categories = [events[(events.type=='WORD') & (events.item_name==r.item_name)].category[0] for r in rec_events]
-        category_nums = [events[(events.type=='WORD') & (events.item_name == r.item_name)].category_num[0] for r in rec_events]
+        pres_rows = [self._presentation_rows(r.item_name, events, types=('WORD',))[0] for r in rec_events]
+        categories = events.category[pres_rows]
+        category_nums = events.category_num[pres_rows]
         rec_events['category']=categories
         rec_events['category_num']=category_nums
         events[is_recall] = rec_events
@@ -1,8 +1,8 @@
 from event_creation.submission.parsers.base_log_parser import (
     BaseLogParser,BaseSys3_1LogParser,BaseSessionLogParser)
 from event_creation.submission.readers.eeg_reader import read_jacksheet
+from event_creation.submission.readers.wordpool import load_wordpool
 from event_creation.submission.parsers.fr_sys3_log_parser import FRSys3LogParser
-import pandas as pd
 import json
 from functools import wraps
 from copy import deepcopy
@@ -11,6 +11,9 @@ from event_creation.submission.quality import fr_tests
 import os
 from . import dtypes
 from collections import OrderedDict
+from ..lazy import lazy_import
+
+pd = lazy_import('pandas')
 
 def with_offset(event_handler):
     """
@@ -192,7 +195,7 @@ class FRHostPCLogParser(BaseHostPCLogParser,FRSys3LogParser):
         self._list = -999
         self._phase = ''
         self._serialpos = -999
-        self._wordpool = np.loadtxt(files['wordpool'],dtype=str)
+        self._wordpool = load_wordpool(files['wordpool'], column=0)
 
 
     @property
@@ -320,10 +323,10 @@ class catFRHostPCLogParser(FRHostPCLogParser):
         self._add_fields(*dtypes.category_fields)
         self._categories = np.unique([e[self._CATEGORY] for e in self._contents if self._CATEGORY in e])
         if os.path.splitext(self.files['wordpool'])[1]:
-            self._wordpool = np.loadtxt(self.files['wordpool'],dtype=str)
+            self._wordpool = load_wordpool(self.files['wordpool'], column=0)
         else:
-            self._wordpool = np.loadtxt(self.files['wordpool'], dtype=[('category','|S256'),('item_name','|S256')])
-            self._wordpool = self._wordpool['item_name']
+            # Lines of "<category> <word>"
+            self._wordpool = load_wordpool(self.files['wordpool'], column=1)
 
 
     def event_word(self, event_json):
@@ -344,8 +347,9 @@ class catFRHostPCLogParser(FRHostPCLogParser):
         events= super(catFRHostPCLogParser, self).clean_events(events).view(np.recarray)
         is_rec = (events.type == 'REC_WORD') & (events.intrusion != -1)
         rec_events = events[is_rec]
-        categories = [events[(events.item_name==r['item_name']) & (events.type=='WORD')]['category'][0] for r in rec_events]
-        category_nums = [events[events.item_name == r.item_name]['category_num'][0] for r in rec_events]
+        pres_rows = [self._presentation_rows(r.item_name, events, types=('WORD',))[0] for r in rec_events]
+        categories = events.category[pres_rows]
+        category_nums = events.category_num[pres_rows]
         rec_events['category']=categories
         rec_events['category_num']=category_nums
         events[is_rec] = rec_events
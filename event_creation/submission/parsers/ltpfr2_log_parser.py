@@ -1,13 +1,17 @@
 from .base_log_parser import BaseSessionLogParser
+from ..readers.wordpool import load_wordpool
 from . import dtypes
 import numpy as np
 
 
 class LTPFR2SessionLogParser(BaseSessionLogParser):
 
+    _PRESENTATION_FIELD = 'item_num'
+    _PRESENTATION_TYPES = ('WORD',)
+
     def __init__(self, protocol, subject, montage, experiment, session, files):
         super(LTPFR2SessionLogParser, self).__init__(protocol, subject, montage, experiment, session, files)
-        self._wordpool = np.array([x.strip() for x in open(files['wordpool']).readlines()])
+        self._wordpool = load_wordpool(files['wordpool'])
         self._session = -999
         self._trial = -999
         self._serialpos = -999
@@ -120,24 +124,24 @@ class LTPFR2SessionLogParser(BaseSessionLogParser):
                 new_event.intrusion = -1
             else:  # Correct recall or PLI or XLI from later list
                 # Determines which list the recalled word was from (gives [] if from a future list)
-                pres_mask = self.find_presentation(new_event.item_num, events)
-                pres_trial = np.unique(events[pres_mask].trial)
+                pres_rows = self._presentation_rows(new_event.item_num, events)
+                pres_trial = np.unique(events.trial[pres_rows])
 
                 # Correct recall or PLI
                 if len(pres_trial) == 1:
                     # Determines how many lists back the recalled word was presented
                     new_event.intrusion = self._trial - pres_trial[0]
                     # Retrieve the recalled word's serial position in its list, as well as the distractor(s) used
-                    new_event.serialpos = np.unique(events[pres_mask].serialpos)
-                    new_event.begin_distractor = np.unique(events[pres_mask].begin_distractor)
-                    new_event.final_distractor = np.unique(events[pres_mask].final_distractor)
+                    new_event.serialpos = np.unique(events.serialpos[pres_rows])
+                    new_event.begin_distractor = np.unique(events.begin_distractor[pres_rows])
+                    new_event.final_distractor = np.unique(events.final_distractor[pres_rows])
                     # Correct recall if word is from the most recent list
                     if new_event.intrusion == 0:
                         # Retroactively log on the word pres event that the word was recalled
-                        if not any(events[pres_mask].recalled):
-                            events.recalled[pres_mask] = True
+                        if not any(events.recalled[pres_rows]):
+                            events.recalled[pres_rows] = True
                     else:
-                        events.intruded[pres_mask] = new_event.intrusion
+                        events.intruded[pres_rows] = new_event.intrusion
                 else:  # XLI from later list
                     new_event.intrusion = -1
 
@@ -1,14 +1,18 @@
 import numpy as np
 from ast import literal_eval
 from .base_log_parser import BaseSessionLogParser
+from ..readers.wordpool import load_wordpool
 from . import dtypes
 
 
 class LTPFRSessionLogParser(BaseSessionLogParser):
 
+    _PRESENTATION_FIELD = 'item_num'
+    _PRESENTATION_TYPES = ('WORD',)
+
     def __init__(self, protocol, subject, montage, experiment, session, files):
         super(LTPFRSessionLogParser, self).__init__(protocol, subject, montage, experiment, session, files)
-        self._wordpool = np.array([x.strip() for x in open(files['wordpool']).readlines()])
+        self._wordpool = load_wordpool(files['wordpool'])
         self._recog_ann = []  # During the recog portion, records the lines of the .ann file currently being used
         self._presented = set()
         self._session = -999
@@ -199,31 +203,31 @@ class LTPFRSessionLogParser(BaseSessionLogParser):
                 new_event.intrusion = -1
             else:  # Correct recall or PLI or XLI from latter list
                 # Determines which list the recalled word was from (gives [] if from a future list)
-                pres_mask = self.find_presentation(new_event.item_num, events)
-                pres_trial = np.unique(events[pres_mask].trial)
+                pres_rows = self._presentation_rows(new_event.item_num, events)
+                pres_trial = np.unique(events.trial[pres_rows])
                 # Correct recall or PLI
                 if len(pres_trial) == 1:
                     # Determines how many lists back the recalled word was presented
                     new_event.intrusion = -999 if self._is_ffr else self._trial - pres_trial[0]
                     # Retrieve information about which distractors were used during the word's presentation
-                    new_event.distractor = np.unique(events[pres_mask].distractor)
-                    new_event.final_distractor = np.unique(events[pres_mask].final_distractor)
+                    new_event.distractor = np.unique(events.distractor[pres_rows])
+                    new_event.final_distractor = np.unique(events.final_distractor[pres_rows])
                     # Retrieve the recalled word's serial position in its list, along with task information
-                    new_event.serialpos = np.unique(events[pres_mask].serialpos)
-                    new_event.listtype = np.unique(events[pres_mask].listtype)
-                    new_event.task = np.unique(events[pres_mask].task)
-                    new_event.resp = np.unique(events[pres_mask].resp)
-                    new_event.rt = np.unique(events[pres_mask].rt)
+                    new_event.serialpos = np.unique(events.serialpos[pres_rows])
+                    new_event.listtype = np.unique(events.listtype[pres_rows])
+                    new_event.task = np.unique(events.task[pres_rows])
+                    new_event.resp = np.unique(events.resp[pres_rows])
+                    new_event.rt = np.unique(events.rt[pres_rows])
                     # Correct recall, i.e. word is from the most recent list
                     if new_event.intrusion == 0:
                         # Retroactively log on the word pres event that the word was recalled
-                        if not any(events[pres_mask].recalled):
-                            events.recalled[pres_mask] = True
+                        if not any(events.recalled[pres_rows]):
+                            events.recalled[pres_rows] = True
                     elif self._is_ffr:
                         new_event.studytrial = pres_trial
-                        events.finalrecalled[pres_mask] = True
+                        events.finalrecalled[pres_rows] = True
                     else:
-                        events.intruded[pres_mask] = new_event.intrusion
+                        events.intruded[pres_rows] = new_event.intrusion
                 else:  # XLI from later list
                     new_event.intrusion = -1
 
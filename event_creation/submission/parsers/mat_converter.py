@@ -4,9 +4,6 @@ import os
 import json
 import glob
 import datetime
-from scipy.io import loadmat
-
-from ptsa.data.readers import BaseEventReader
 
 from .base_log_parser import BaseSessionLogParser
 from .fr_log_parser import FRSessionLogParser
@@ -24,6 +21,9 @@ from ..fileutil import open_with_perms
 
 from ..configuration import paths
 from ..log import logger
+from ..lazy import lazy_import
+
+sio = lazy_import('scipy.io')
 
 
 class BaseMatConverter(object):
@@ -74,6 +74,7 @@ class BaseMatConverter(object):
         self._fields = self._BASE_FIELDS
 
         # Get the matlab events for this specific session
+        from ptsa.data.readers import BaseEventReader
         event_reader = BaseEventReader(filename=str(files[events_type]), common_root=paths.db_root)
         mat_events = event_reader.read()
         sess_events = mat_events[mat_events.session == int(original_session)]
@@ -247,6 +248,7 @@ class MatlabEEGExtractor(object):
         :param original_session: The session to reference in the matlab events
         :param files: output of transferer, must include 'matlab_events'
         """
+        from ptsa.data.readers import BaseEventReader
         event_reader = BaseEventReader(filename=str(files['matlab_events']),
                                        common_root=paths.db_root)
         mat_events = event_reader.read()
@@ -283,7 +285,7 @@ class MatlabEEGExtractor(object):
                         data = data * params['gain']
                         data = data.astype(params['data_format'])
                         out_file = os.path.join(noreref, os.path.basename(eeg_filename))
-                        logger.debug('transfering channel {}'.format(os.path.splitext(out_file)[-1]))
+                        logger.debug('transfering channel {}', os.path.splitext(out_file)[-1])
                         data.tofile(out_file)
                         os.chmod(out_file, 0o446)
                         n_samples = len(data)
@@ -576,7 +578,7 @@ class YCMatConverter(BaseMatConverter):
         super(YCMatConverter, self).__init__(protocol, subject, montage, experiment, session, original_session, files,
                                              include_stim_params=True)
         filename = str(files['matlab_events'])
-        mat_events = loadmat(filename, squeeze_me=True)['events']
+        mat_events = sio.loadmat(filename, squeeze_me=True)['events']
 
         sess_mask = mat_events['session'] == int(original_session)
 
@@ -752,7 +754,7 @@ class THMatConverter(BaseMatConverter):
         super(THMatConverter, self).__init__(protocol, subject, montage, experiment, session, original_session, files,
                                              include_stim_params=True)
         filename = str(files['matlab_events'])
-        mat_events = loadmat(filename, squeeze_me=True)['events']
+        mat_events = sio.loadmat(filename, squeeze_me=True)['events']
 
         sess_mask = mat_events['session'] == int(original_session)
 
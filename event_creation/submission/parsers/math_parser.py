@@ -1,8 +1,10 @@
 from .base_log_parser import BaseSessionLogParser,BaseSys3_1LogParser
 from .system2_log_parser import System2LogParser
-import pandas as pd
 import numpy as np
 from ..exc import UnknownExperimentError
+from ..lazy import lazy_import
+
+pd = lazy_import('pandas')
 
 
 def MathLogParser(protocol,subject,montage,experiment,session,files):
@@ -1,7 +1,9 @@
 import numpy as np
-import pandas as pd
 from . import dtypes
 from .courier_log_parser import CourierSessionLogParser
+from ..lazy import lazy_import
+
+pd = lazy_import('pandas')
 
 class NICLSSessionLogParser(CourierSessionLogParser):
     def __init__(self, protocol, subject, montage, experiment, session, files):
@@ -96,7 +98,6 @@ class NICLSSessionLogParser(CourierSessionLogParser):
         except:
             ann_outputs = self._parse_ann_file("final free-0")
             ann_outputs = ann_outputs + self._parse_ann_file("final free-1")
-        words = events[events["type"] == 'WORD']
 
         for recall in ann_outputs:
             new_event = self._new_rec_event(recall, rec_start_event)
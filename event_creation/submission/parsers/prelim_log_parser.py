@@ -5,6 +5,9 @@ from .base_log_parser import BaseUnityLTPLogParser
 
 class PrelimSessionLogParser(BaseUnityLTPLogParser):
 
+    _PRESENTATION_FIELD = 'item_num'
+    _PRESENTATION_TYPES = ('WORD',)
+
     def __init__(self, protocol, subject, montage, experiment, session, files):
         super(PrelimSessionLogParser, self).__init__(protocol, subject, montage, experiment, session, files)
         self._trial = -999
@@ -203,23 +206,23 @@ class PrelimSessionLogParser(BaseUnityLTPLogParser):
             if recall[1] == -1:
                 new_event.intrusion = -1
             else:  # Correct recall, PLI, or XLI word that appears in a later list
-                pres_mask = self.find_presentation(new_event.item_num, events)
-                pres_trial = np.unique(events[pres_mask].trial)
+                pres_rows = self._presentation_rows(new_event.item_num, events)
+                pres_trial = np.unique(events.trial[pres_rows])
 
                 # Correct recall or PLI
                 if len(pres_trial) == 1:
                     # Determines how many lists back the recalled word was presented
                     new_event.intrusion = self._trial - pres_trial[0]
                     # Retrieve the recalled word's serial position in its list
-                    new_event.serialpos = np.unique(events[pres_mask].serialpos)
+                    new_event.serialpos = np.unique(events.serialpos[pres_rows])
                     # Correct recall if word is from the most recent list
                     if new_event.intrusion == 0:
                         # Retroactively log on the word pres event that the word was recalled
-                        if not any(events[pres_mask].recalled):
-                            events.recalled[pres_mask] = True
+                        if not any(events.recalled[pres_rows]):
+                            events.recalled[pres_rows] = True
                     else:
                         # Mark on the presentation event that the word later intruded as a PLI
-                        events.intruded[pres_mask] = new_event.intrusion
+                        events.intruded[pres_rows] = new_event.intrusion
                 elif len(pres_trial) == 0:  # XLI from later list
                     new_event.intrusion = -1
                 else:
@@ -101,8 +101,6 @@ class PSSessionLogParser(BaseSessionLogParser):
             BEGIN_PS2=self.begin_ps2,
             BEGIN_PS3=self.begin_ps3,
             AFTER_DISCHARGE=self.modify_ad_check,
-            STIMULATING=self.make_stim_off,
-            BEGIN_BURST=self.make_stim_off,
         )
 
     def event_default(self, split_line):
@@ -160,7 +158,7 @@ class PSSessionLogParser(BaseSessionLogParser):
         params['stim_on'] = True
         self._previous_stim_duration = params['stim_duration'] + params['n_pulses'] * params['pulse_freq']
         self.set_event_stim_params(event, self._jacksheet, **params)
-        return event
+        return self.with_stim_off(event)
 
     def event_stimulating(self, split_line):
         event = self.event_default(split_line)
@@ -187,7 +185,7 @@ class PSSessionLogParser(BaseSessionLogParser):
         params['stim_on'] = True
         self._previous_stim_duration = params['stim_duration']
         self.set_event_stim_params(event, self._jacksheet, **params)
-        return event
+        return self.with_stim_off(event)
 
     def event_stim_single_pulse(self, split_line):
         event = self.event_default(split_line)
@@ -208,14 +206,23 @@ class PSSessionLogParser(BaseSessionLogParser):
                                    stim_on=True)
         return event
 
-    def make_stim_off(self, events):
-        off_event = events[-1].copy()
+    def with_stim_off(self, stim_on_event):
+        """
+        Pairs a STIM_ON event with the STIM_OFF event at the end of its stimulation, so that both are added to the
+        events at once rather than the STIM_OFF event being appended to the whole array afterwards
+        :param stim_on_event: the STIM_ON event
+        :return: recarray of the STIM_ON and STIM_OFF events, in that order
+        """
+        stim_pair = np.empty(2, dtype=stim_on_event.dtype).view(np.recarray)
+        stim_pair[0] = stim_on_event
+
+        off_event = stim_on_event.copy()
         off_event.type = 'STIM_OFF'
         off_event.is_stim = False
         off_event.mstime += self._previous_stim_duration
         self.set_event_stim_params(off_event, self._jacksheet, stim_on=False)
-
-        return np.append(events, off_event).view(np.recarray)
+        stim_pair[1] = off_event
+        return stim_pair
 
     def event_ads_checked(self, split_line):
         event = self.event_default(split_line)
@@ -303,24 +310,21 @@ class PSHostLogParser(BaseSessionLogParser):
         events.experiment = self._experiment
         events.exp_version = self._exp_version
 
-        stim_events = np.logical_or(events['type'] == 'STIM', events['type'] == 'STIM_OFF')
-        stim_events = np.logical_or(stim_events, events['type'] == 'SHAM')
-        stim_event_indices = np.where(stim_events)[0]
+        stim_event_indices = np.flatnonzero(np.isin(events['type'], ('STIM', 'STIM_OFF', 'SHAM')))
 
-        poll_events = np.where(events['type'] == 'NP_POLL')[0]
+        poll_events = np.flatnonzero(events['type'] == 'NP_POLL')
         first_poll_event = poll_events[0]
         last_poll_event = poll_events[-1]
 
         # Need the last two events (on/off) before the first np poll and the two events after the last np poll
-        stim_before = np.array([index for index in stim_event_indices if index < first_poll_event - 2])
-        stim_after = np.array([index for index in stim_event_indices if index > last_poll_event + 2])
+        n_stim_before = np.searchsorted(stim_event_indices, first_poll_event - 2, side='left')
+        first_stim_after = np.searchsorted(stim_event_indices, last_poll_event + 2, side='right')
 
-        good_range = np.array([index for index in range(len(events)) \
-                               if index not in stim_before and index not in stim_after])
+        keep = events['type'] != 'NP_POLL'
+        keep[stim_event_indices[:n_stim_before]] = False
+        keep[stim_event_indices[first_stim_after:]] = False
 
-        cleaned_events = events[good_range]
-        # Remove NP_POLL
-        cleaned_events = cleaned_events[cleaned_events['type'] != 'NP_POLL']
+        cleaned_events = events[keep]
         cleaned_events.sort(order='mstime')
         return cleaned_events
 
@@ -4,6 +4,7 @@ import numpy as np
 
 from .base_log_parser import BaseSessionLogParser
 from ..viewers.recarray import strip_accents
+from ..readers.wordpool import load_wordpool
 
 
 class RAASessionLogParser(BaseSessionLogParser):
@@ -49,18 +50,7 @@ class RAASessionLogParser(BaseSessionLogParser):
         else:
             wordpool_type = 'wordpool'
         try:
-            with open(files[wordpool_type]) as wordpool:
-                self._wordpool = np.array([x.strip() for x in wordpool])
-        except KeyError as key_error:
-            if type(self) is RAASessionLogParser:
-                raise key_error
-            else:
-                #Subclasses are allowed to not have a word pool
-                self._wordpool = None
-
-        try:
-            with open(files[wordpool_type]) as wordpool:
-                self._wordpool = np.array([x.strip() for x in wordpool])
+            self._wordpool = load_wordpool(files[wordpool_type])
         except KeyError as key_error:
             if type(self) is RAASessionLogParser:
                 raise key_error
@@ -250,13 +240,8 @@ class RAASessionLogParser(BaseSessionLogParser):
 
     def apply_word(self, event):
         event.item_name = self._word
-        try:
-            in_wordpool = bool((self._wordpool==self._word))
-        except ValueError:
-            in_wordpool = (self._wordpool==self._word).any()
-        if in_wordpool:
-            wordno = np.where(self._wordpool == self._word)
-            event.item_num = wordno[0] + 1
+        if self._wordpool is not None:
+            event.item_num = self._wordpool.item_num(self._word)
         else:
             event.item_num = -1
         return event
@@ -428,19 +413,19 @@ class RAASessionLogParser(BaseSessionLogParser):
             if recall[1] == -1:
                 new_event.intrusion = -1
             else:  # Correct recall or PLI or XLI from latter list
-                pres_mask = self.find_presentation(word, events)
-                pres_list = np.unique(events[pres_mask].list)
-                pres_mask = np.logical_and(pres_mask, events.list == self._list)
+                pres_rows = self._presentation_rows(word, events)
+                pres_list = np.unique(events.list[pres_rows])
+                pres_rows = pres_rows[events.list[pres_rows] == self._list]
 
                 # Correct recall or PLI
                 if len(pres_list) >= 1:
                     new_event.intrusion = self._list - max(pres_list)
                     if new_event.intrusion == 0:
-                        new_event.serialpos = np.unique(events[pres_mask].serialpos)
+                        new_event.serialpos = np.unique(events.serialpos[pres_rows])
                         new_event.recalled = True
-                        if not any(events.recalled[pres_mask]):
-                            events.recalled[pres_mask] = True
-                            events.rectime[pres_mask] = new_event.rectime
+                        if not any(events.recalled[pres_rows]):
+                            events.recalled[pres_rows] = True
+                            events.rectime[pres_rows] = new_event.rectime
                 else:  # XLI
                     new_event.intrusion = -1
 
@@ -1,7 +1,10 @@
 import numpy as np
-import pandas as pd
 from . import dtypes
 from .base_log_parser import BaseUnityLogParser
+from ..readers.wordpool import load_wordpool
+from ..lazy import lazy_import
+
+pd = lazy_import('pandas')
 
 
 #TODO: update default to use list rather than trial
@@ -18,8 +21,7 @@ class RepFRSessionLogParser(BaseUnityLogParser):
         self.protocol = protocol
 
         if("wordpool" in list(files.keys())):
-            with open(files["wordpool"]) as f:
-                self.wordpool = [line.rstrip() for line in f]
+            self.wordpool = load_wordpool(files["wordpool"])
 
         else:
             raise Exception("wordpool not found in transferred files")
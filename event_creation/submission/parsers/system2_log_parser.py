@@ -1,8 +1,68 @@
+from collections import defaultdict
 from .base_log_parser import BaseSessionLogParser
+from .. import fileutil
 import numpy as np
 from copy import deepcopy
 import re
 
+
+class HostLog(object):
+    """
+    A System 2 host log, read once, with the lines of each type (the second '~'-separated column) indexed, so that
+    the lines of one type can be selected without scanning the log again
+    """
+
+    def __init__(self, lines):
+        """
+        :param lines: lines of the log, without surrounding whitespace
+        """
+        self.lines = lines
+        # Only line numbers are kept, rather than columns that would be as wide as the longest line
+        indices = defaultdict(list)
+        for i, line in enumerate(lines):
+            indices[line.partition('~')[2].partition('~')[0]].append(i)
+        self._indices = {line_type: np.array(type_indices) for line_type, type_indices in indices.items()}
+
+    @classmethod
+    def from_file(cls, host_log_file):
+        with open(host_log_file, 'r') as f:
+            return cls([line.strip() for line in f])
+
+    def indices(self, line_type):
+        """
+        :return: indices of the lines of the given type
+        """
+        return self._indices.get(line_type, np.array([], dtype=int))
+
+    def rows_by_type(self, line_type):
+        """
+        :return: the lines of the given type, each split into a list of columns
+        """
+        return [self.lines[i].split('~') for i in self.indices(line_type)]
+
+    def column(self, line_type, index, cast=None):
+        """
+        :param line_type: type (second column) of the lines to read
+        :param index: column to read
+        :param cast: type to convert the column to (e.g. int)
+        :return: array of that column for the lines of the given type
+        """
+        column = np.array([row[index] for row in self.rows_by_type(line_type)], dtype=str)
+        return column.astype(cast) if cast else column
+
+
+LOADED_HOST_LOGS = fileutil.FileCache(HostLog.from_file, max_entries=4)
+
+
+def read_host_log(host_log_file):
+    """
+    Reads a host log. The last few logs read are kept in LOADED_HOST_LOGS
+    :param host_log_file: path to the host log
+    :return: HostLog
+    """
+    return LOADED_HOST_LOGS.get(host_log_file)
+
+
 class System2LogParser:
 
     _STIM_PARAMS_FIELD = 'stim_params'
@@ -179,23 +239,17 @@ class System2LogParser:
 
     @classmethod
     def get_rows_by_type(cls, host_log_file, line_type, columns=None, cast=None):
-        split_lines = [x.strip().split('~') for x in open(host_log_file, 'r').readlines()]
-        rows = []
-        for split_line in split_lines:
-            if len(split_line) > 1 and split_line[1] == line_type:
-                if columns:
-                    if cast:
-                        rows.append([cast(split_line[index]) for index in columns])
-                    else:
-                        rows.append([split_line[index] for index in columns])
-                else:
-                    rows.append(split_line)
-        return rows
+        if columns:
+            return [list(row) for row in zip(*cls.get_columns_by_type(host_log_file, line_type, columns, cast))]
+        return read_host_log(host_log_file).rows_by_type(line_type)
 
     @classmethod
     def get_columns_by_type(cls, host_log_file, line_type, columns=None, cast=None):
-        output = list(zip(*cls.get_rows_by_type(host_log_file, line_type, columns, cast)))
-        if (columns and not output):
-            output = [[]] * len(columns)
-        return output
-
+        """
+        :return: an array for each of the given columns of the lines of the given type (or, if no columns are given,
+                 a tuple for each column of the lines)
+        """
+        if not columns:
+            return list(zip(*cls.get_rows_by_type(host_log_file, line_type)))
+        host_log = read_host_log(host_log_file)
+        return [host_log.column(line_type, index, cast) for index in columns]
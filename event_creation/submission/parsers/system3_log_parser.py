@@ -235,7 +235,7 @@ class System3LogParser(object):
                 try:
                     stim_params[param] = stim_dict[self._STIM_PARAMS_FIELD][input]
                 except KeyError:
-                    logger.debug('Field %s is missing'%input)
+                    logger.debug('Field {} is missing', input)
 
             stim_params['pulse_width'] = stim_dict['pulse_width'] if 'pulse_width' in stim_dict else self._DEFAULT_PULSE_WIDTH
             stim_params['n_pulses'] = self.get_n_pulses(stim_params)
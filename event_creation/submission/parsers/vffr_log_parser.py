@@ -1,11 +1,15 @@
 import numpy as np
-import pandas as pd
 from . import dtypes
 from .base_log_parser import BaseUnityLTPLogParser
+from ..lazy import lazy_import
+
+pd = lazy_import('pandas')
 
 
 class VFFRSessionLogParser(BaseUnityLTPLogParser):
 
+    _PRESENTATION_TYPES = ('WORD',)
+
     def __init__(self, protocol, subject, montage, experiment, session, files):
         super(VFFRSessionLogParser, self).__init__(protocol, subject, montage, experiment, session, files)
         self._trial = -999
@@ -189,13 +193,13 @@ class VFFRSessionLogParser(BaseUnityLTPLogParser):
             new_event.intrusion = word != self.current_word
 
             # Determine the serial position of the spoken word within the 576 item list
-            pres_mask = (events.item_name == word) & (events.type == 'WORD')
+            pres_rows = self._presentation_rows(word, events)
             # Correct recall if word was previously presented
-            if pres_mask.sum() == 1:
-                new_event.serialpos = events[pres_mask].serialpos[0]
-                new_event.item_num = events[pres_mask].item_num[0]
+            if len(pres_rows) == 1:
+                new_event.serialpos = events.serialpos[pres_rows[0]]
+                new_event.item_num = events.item_num[pres_rows[0]]
             # ELI if word was never presented
-            elif pres_mask.sum() == 0:
+            elif len(pres_rows) == 0:
                 new_event.intrusion = True
             # If a word was presented multiple times, abort event creation, as this indicates an error with the session
             else:
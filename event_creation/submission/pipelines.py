@@ -5,10 +5,10 @@ import shutil
 import traceback
 
 from . import fileutil
-from .configuration import paths
+from .configuration import config, paths
 from .events_tasks import SplitEEGTask, MatlabEEGConversionTask, MatlabEventConversionTask, \
                   EventCreationTask, CompareEventsTask, EventCombinationTask, \
-                  MontageLinkerTask, RecognitionFlagTask
+                  MontageLinkerTask, RecognitionFlagTask, AlignmentPlotTask
 from .neurorad_tasks import (LoadVoxelCoordinatesTask, CorrectCoordinatesTask, CalculateTransformsTask,
                              AddContactLabelsTask, AddMNICoordinatesTask, WriteFinalLocalizationTask,
                              AddManualLocalizationsTask,CreateMontageTask, CreateDuralSurfaceTask,
@@ -18,6 +18,7 @@ from .parsers.math_parser import MathLogParser
 from .parsers.mat_converter import MathMatConverter
 from .transfer_config import TransferConfig
 from .tasks import ImportJsonMontageTask, CleanLeafTask
+from .task_stats import TaskStats
 from .transferer import generate_ephys_transferer, generate_session_transferer, generate_localization_transferer, \
     generate_import_montage_transferer, generate_create_montage_transferer, TRANSFER_INPUTS, find_sync_file
 from .exc import TransferError
@@ -161,6 +162,7 @@ class TransferPipeline(object):
 
     CURRENT_PROCESSED_DIRNAME = 'current_processed'
     INDEX_FILE = 'index.json'
+    TASK_STATS_KEY = 'task_stats'
 
     def __init__(self, transferer, *pipeline_tasks, **info):
         self.importer = None
@@ -180,6 +182,7 @@ class TransferPipeline(object):
         self.stored_objects = {}
         self.output_files = {}
         self.output_info = info
+        self.task_stats = []
         self.on_failure = lambda: CleanLeafTask(False).run([], self.destination)
 
     def previous_transfer_type(self):
@@ -256,22 +259,39 @@ class TransferPipeline(object):
                 return False
         return True
 
+    def _measure(self, name):
+        """
+        :return: TaskStats for a step of the pipeline, which are saved in the index info once the step has run
+        """
+        stats = TaskStats(name)
+        self.task_stats.append(stats)
+        return stats
+
     def _execute_tasks(self):
         logger.set_label('Transfer in progress')
-        transferred_files = self.transferer.transfer_with_rollback()
+        self.task_stats = []
+        with self._measure('Transfer') as stats:
+            transferred_files = self.transferer.transfer_with_rollback()
+        logger.debug('{}', stats)
         pipeline_task = None
         try:
             for i, pipeline_task in enumerate(self.pipeline_tasks):
 
                 logger.info('Executing task {}: {}'.format(i+1, pipeline_task.name))
                 logger.set_label(pipeline_task.name)
-                pipeline_task.run(transferred_files, self.destination)
+                with self._measure(pipeline_task.name) as stats:
+                    pipeline_task.run(transferred_files, self.destination)
+                # Non-critical tasks catch their own errors
+                stats.failed = pipeline_task.error is not None
+                logger.debug('{}', stats)
                 if pipeline_task.error:
                     logger.info('Task {} failed with message {}. Continuing'.format(
                         pipeline_task.name, pipeline_task.error))
                 else:
                     logger.info('Task {} finished successfully'.format(pipeline_task.name))
 
+            self.register_info(self.TASK_STATS_KEY, [stats.to_dict() for stats in self.task_stats])
+
             if os.path.islink(self.current_dir):
                 os.unlink(self.current_dir)
             os.symlink(self.processed_label, self.current_dir)
@@ -407,6 +427,9 @@ def build_events_pipeline(subject, montage, experiment, session, do_math=False,
     if 'recog' in groups:
         tasks.append(RecognitionFlagTask(critical=False))
 
+    if config.plot_alignment:
+        tasks.append(AlignmentPlotTask(critical=False))
+
     if do_compare:
         tasks.append(CompareEventsTask(subject, montage, experiment, session, protocol, code, original_session,
                                        match_field=kwargs['match_field'] if 'match_field' in kwargs else None))
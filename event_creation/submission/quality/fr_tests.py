@@ -1,10 +1,12 @@
 import json
 
 import numpy as np
-import pandas as pd
 
 from event_creation.submission.quality.util import as_recarray
 from ..log import logger
+from ..lazy import lazy_import
+
+pd = lazy_import('pandas')
 
 
 def with_time_field(function):
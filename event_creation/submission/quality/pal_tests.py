@@ -1,5 +1,7 @@
-import pandas as pd
 import numpy as np
+from ..lazy import lazy_import
+
+pd = lazy_import('pandas')
 
 def test_session_length(events,files):
     """
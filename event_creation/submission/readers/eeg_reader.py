@@ -1,26 +1,50 @@
 
-import warnings
 import struct
 import datetime
+import calendar
 import sys
 import os
 import re
-import mne
 import json
-import tables
 import numpy as np
 from shutil import copy
-
-try:
-    import pyedflib
-except ImportError:
-    warnings.warn("pyEDFlib not available")
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 from .. import fileutil
 from ..log import logger
 from .nsx_utility.brpylib import NsxFile
+from .eeg_writer import get_eeg_writer, SplitChannelWriter, SPLIT_OUTPUT
 from ..exc import EEGError
 from ..parsers.electrode_config_parser import ElectrodeConfig
+from ..lazy import lazy_import
+
+mne = lazy_import('mne')
+tables = lazy_import('tables')
+pyedflib = lazy_import('pyedflib', warn_missing=True)
+
+
+_SOURCES_LOCK = threading.Lock()
+
+
+def update_sources(location, entries):
+    """
+    Merges entries into location/sources.json. Updates from different threads are serialised; processes splitting
+    concurrently should return their entries to a single process to be written
+    :param location: directory containing sources.json
+    :param entries: {name: info} of split recordings
+    """
+    with _SOURCES_LOCK:
+        try:
+            with open(os.path.join(location, 'sources.json')) as source_file:
+                sources = json.load(source_file)
+        except:
+            sources = {}
+
+        sources.update(entries)
+
+        with fileutil.open_with_perms(os.path.join(location, 'sources.json'), 'w') as source_file:
+            json.dump(sources, source_file, indent=2, sort_keys=True)
 
 
 class EEG_reader(object):
@@ -50,13 +74,13 @@ class EEG_reader(object):
     def get_n_samples(self):
         raise NotImplementedError
 
-    def write_sources(self, location, basename):
-        try:
-            with open(os.path.join(location, 'sources.json')) as source_file:
-                sources = json.load(source_file)
-        except:
-            sources = {}
-
+    def sources_entry(self, basename, output_info=None):
+        """
+        :param basename: base name of the split files
+        :param output_info: description of the output, from EEGWriter.sources_info
+        :return: {name: info} describing the split recording in sources.json
+        """
+        sources = {}
         sources[basename] = {
             'name': basename,
             'source_file': os.path.basename(self.get_source_file()),
@@ -66,21 +90,41 @@ class EEG_reader(object):
             'sample_rate': int(self.get_sample_rate()),
             'data_format': self.DATA_FORMAT
         }
+        sources[basename].update(output_info or {})
+        return sources
 
-        with fileutil.open_with_perms(os.path.join(location, 'sources.json'), 'w') as source_file:
-            json.dump(sources, source_file, indent=2, sort_keys=True)
+    def write_sources(self, location, basename, output_info=None):
+        update_sources(location, self.sources_entry(basename, output_info))
 
-    def split_data(self, location, basename):
+    def split_data(self, location, basename, output=SPLIT_OUTPUT, complevel=0, record_sources=True):
+        """
+        Splits the recording into location/noreref and describes it in location/sources.json
+        :param location: directory in which to place noreref/ and sources.json
+        :param basename: base name of the split files
+        :param output: 'split' (one file per channel), 'hdf5' (a single chunked HDF5 file) or 'both'
+        :param complevel: compression level of HDF5 output
+        :param record_sources: Whether to add the recording to sources.json. If False, the caller is responsible for
+                               passing the returned entry to update_sources
+        :return: the entry describing the recording in sources.json
+        """
         noreref_location = os.path.join(location, 'noreref')
-        if not os.path.exists(noreref_location):
-            fileutil.makedirs(noreref_location)
+        # Files may be split into the same location at once
+        fileutil.makedirs(noreref_location, exist_ok=True)
         logger.info("Splitting data into {}/{}".format(noreref_location, basename))
-        self._split_data(noreref_location, basename)
-        self.write_sources(location, basename)
+        with get_eeg_writer(output, noreref_location, basename, self.DATA_FORMAT, complevel) as writer:
+            self._split_data(writer)
+        sources = self.sources_entry(basename, writer.sources_info())
+        if record_sources:
+            update_sources(location, sources)
         logger.info("Splitting complete")
+        return sources
 
-    def _split_data(self, location, basename):
-        return NotImplementedError
+    def _split_data(self, writer):
+        """
+        Declares the channels to split with writer.set_channels, then writes their data with writer.write
+        :param writer: eeg_writer.EEGWriter
+        """
+        raise NotImplementedError
 
     def get_matching_jacksheet_dict_label(self, label, jacksheet_dict, channel_map):
         if label in channel_map:
@@ -122,7 +166,7 @@ class HD5_reader(EEG_reader):
     @property
     def h5file(self):
         if self._h5file is None:
-            logger.debug("Opening {}".format(self.raw_filename))
+            logger.debug("Opening {}", self.raw_filename)
             self._h5file = tables.open_file(self.raw_filename, mode='r')
         return self._h5file
 
@@ -156,13 +200,13 @@ class HD5_reader(EEG_reader):
         else:
             return self.h5file.root.timeseries.shape[1]
 
-    def write_sources(self, location, basename):
+    def sources_entry(self, basename, output_info=None):
         if self.should_split:
-            super(HD5_reader, self).write_sources(location,basename)
+            return super(HD5_reader, self).sources_entry(basename, output_info)
         else:
-            super(HD5_reader, self).write_sources(location,basename+'.h5')
+            return super(HD5_reader, self).sources_entry(basename+'.h5', output_info)
 
-    def _split_data(self, location, basename):
+    def _split_data(self, writer):
         if self.should_split:
             time_series = self.h5file.get_node('/','timeseries').read()
             if self.by_row:
@@ -170,15 +214,15 @@ class HD5_reader(EEG_reader):
             if 'bipolar_to_monopolar_matrix' in self.h5file.root:
                 transform = self.h5file.root.bipolar_to_monopolar_matrix.read()
                 time_series = np.dot(transform,time_series).astype(self.DATA_FORMAT)
-            ports = self.h5file.root.ports
+            ports = self.h5file.root.ports.read()
+            writer.set_channels(ports)
             for i, port in enumerate(ports):
-                filename = os.path.join(location, basename + ('.%03d' % port))
                 data = time_series[i]
-                logger.debug("Writing channel {} ({})".format(self.h5file.root.names[i], port))
-                logger.debug('len(data):%s'%len(data))
-                data.tofile(filename)
+                logger.debug("Writing channel {} ({})", self.h5file.root.names[i], port)
+                logger.debug('len(data):{}', len(data))
+                writer.write(port, data)
         else:
-            filename= os.path.join(location,basename+'.h5')
+            filename= os.path.join(writer.location, writer.basename+'.h5')
             logger.debug('Moving HD5 file')
             copy(self.raw_filename,filename)
 
@@ -381,8 +425,8 @@ class NK_reader(EEG_reader):
             T_minute = self.uint8(f)
             T_second = self.uint8(f)
 
-            logger.debug('Date of session: %d/%d/%d\n' % (T_month, T_day, T_year))
-            logger.debug('Time of start: %02d:%02d:%02d\n' % (T_hour, T_minute, T_second))
+            logger.debug('Date of session: {}/{}/{}\n', T_month, T_day, T_year)
+            logger.debug('Time of start: {:02d}:{:02d}:{:02d}\n', T_hour, T_minute, T_second)
 
             sample_rate = self.uint16(f)
             sample_rate_conversion = {
@@ -402,7 +446,7 @@ class NK_reader(EEG_reader):
                 raise EEGError('Unknown sample rate')
 
             num_100_ms_blocks = self.uint32(f)
-            logger.debug('Length of session: %2.2f hours\n' % (num_100_ms_blocks / 10. / 3600.))
+            logger.debug('Length of session: {:2.2f} hours\n', num_100_ms_blocks / 10. / 3600.)
             num_samples = actual_sample_rate * num_100_ms_blocks / 10.
             self.num_samples = num_samples
             ad_off = self.int16(f)
@@ -565,9 +609,7 @@ class NK_reader(EEG_reader):
             self._data = self.get_data(self.jacksheet, self.channel_map)
         return self._data[channel]
 
-    def _split_data(self, location, basename):
-        if not os.path.exists(location):
-            fileutil.makedirs(location)
+    def _split_data(self, writer):
         if not self.jacksheet:
             raise EEGError('Jacksheet not specified')
         data = self.get_data(self.jacksheet, self.channel_map)
@@ -575,19 +617,23 @@ class NK_reader(EEG_reader):
             raise EEGError('Sample rate not determined')
 
         sys.stdout.flush()
+        writer.set_channels(list(data.keys()))
         for channel, channel_data in list(data.items()):
-            filename = os.path.join(location, basename + ('.%03d' % channel))
-
             logger.debug(channel)
             sys.stdout.flush()
-            channel_data.astype(self.DATA_FORMAT).tofile(filename)
+            writer.write(channel, channel_data)
 
 
 class Multi_NSx_reader(EEG_reader):
 
+    SPLIT_WORKERS = 4  # Number of files read or written at once
+
     def __init__(self, nsx_filenames, jacksheet_filename=None, channel_map_filename=None):
-        self.readers = [NSx_reader(filename, jacksheet_filename, i, channel_map_filename)
-                        for i, filename in enumerate(nsx_filenames)]
+        # Each reader loads its whole file, mostly in I/O that releases the GIL, so the files are read concurrently
+        with ThreadPoolExecutor(max(1, min(self.SPLIT_WORKERS, len(nsx_filenames)))) as executor:
+            self.readers = list(executor.map(
+                lambda args: NSx_reader(args[1], jacksheet_filename, args[0], channel_map_filename),
+                enumerate(nsx_filenames)))
 
     def get_source_file(self):
         return self.readers[0].get_source_file()
@@ -604,13 +650,8 @@ class Multi_NSx_reader(EEG_reader):
     def get_n_samples(self):
         return min([reader.get_n_samples() for reader in self.readers])
 
-    def write_sources(self, location, basename):
-        try:
-            with open(os.path.join(location, 'sources.json')) as source_file:
-                sources = json.load(source_file)
-        except:
-            sources = {}
-
+    def sources_entry(self, basename, output_info=None):
+        sources = {}
         sources[basename] = {
                 'start_time_str': self.get_start_time_string(),
                 'start_time_ms': self.get_start_time_ms(),
@@ -619,8 +660,9 @@ class Multi_NSx_reader(EEG_reader):
                 'source_file': os.path.basename(self.get_source_file()),
                 'data_format': self.DATA_FORMAT
                  }
+        sources[basename].update(output_info or {})
         for i, reader in enumerate(self.readers):
-             sources[basename].update({i:
+             sources[basename].update({str(i):
                  {
                 'source_file': os.path.join(os.path.basename(os.path.dirname(reader.get_source_file())),
                                             os.path.basename(reader.get_source_file())),
@@ -631,13 +673,28 @@ class Multi_NSx_reader(EEG_reader):
                 'data_format': reader.DATA_FORMAT
                  }
             })
+        return sources
+
+    def _split_data(self, writer):
+        # All files share one output, so their channels have to be declared together
+        to_split = [reader.split_channels() for reader in self.readers]
+        writer.set_channels([channel for channels in to_split for _, channel, _ in channels])
+        if not isinstance(writer, SplitChannelWriter) or len(self.readers) == 1:
+            for reader, channels in zip(self.readers, to_split):
+                reader.write_channels(writer, channels)
+            return
 
-        with fileutil.open_with_perms(os.path.join(location, 'sources.json'), 'w') as source_file:
-            json.dump(sources, source_file, indent=2, sort_keys=True)
+        # Files write disjoint sets of channel files, so each can be given its own writer and written at once
+        def write_reader_channels(reader, channels):
+            with SplitChannelWriter(writer.location, writer.basename, writer.data_format) as reader_writer:
+                reader_writer.set_channels([channel for _, channel, _ in channels])
+                reader.write_channels(reader_writer, channels)
 
-    def _split_data(self, location, basename):
-        for reader in self.readers:
-            reader._split_data(location, basename)
+        with ThreadPoolExecutor(min(self.SPLIT_WORKERS, len(self.readers))) as executor:
+            futures = [executor.submit(write_reader_channels, reader, channels)
+                       for reader, channels in zip(self.readers, to_split)]
+            for future in futures:
+                future.result()
 
 
 class NSx_reader(EEG_reader):
@@ -730,27 +787,50 @@ class NSx_reader(EEG_reader):
                 'reader': reader,
                 'data': data}
 
-    def _split_data(self, location, basename):
+    def split_channels(self):
+        """
+        :return: list of (label, channel, recording channel) for each jacksheet channel recorded in this file
+        """
         channels = np.array(self.data['elec_ids'])
-        buffer_size = self.data['data_headers'][-1]['Timestamp'] // (self.TIC_RATE // self.get_sample_rate())
+        to_split = []
         for label, channel in list(self.labels.items()):
             recording_channel = channel - self.lowest_channel
             if recording_channel < 0 or not recording_channel in channels:
-                logger.debug('Not getting channel {} from file {}'.format(channel, self.raw_filename))
+                logger.debug('Not getting channel {} from file {}', channel, self.raw_filename)
                 continue
-            filename = os.path.join(location, basename + '.%03d' % channel)
-            logger.debug('%s: %s' % (label, channel))
+            to_split.append((label, channel, recording_channel))
+        return to_split
+
+    def write_channels(self, writer, to_split):
+        """
+        Writes channels to a writer on which they have already been declared
+        :param writer: eeg_writer.EEGWriter
+        :param to_split: list of (label, channel, recording channel), as returned by split_channels
+        """
+        channels = np.array(self.data['elec_ids'])
+        buffer_size = self.data['data_headers'][-1]['Timestamp'] // (self.TIC_RATE // self.get_sample_rate())
+        for label, channel, recording_channel in to_split:
+            logger.debug('{}: {}', label, channel)
             data = self.data['data'][channels==recording_channel, :].astype(self.DATA_FORMAT)
             if len(data) == 0:
                 raise EEGError("EEG File {} contains no data "
                                                    "for channel {}".format(self.raw_filename, recording_channel))
-            data = np.concatenate((np.ones((1, buffer_size), self.DATA_FORMAT) * data[0,0], data), 1)
-            data.tofile(filename)
+            # Samples before the recording started are filled with its first value
+            writer.write(channel, np.full(buffer_size, data[0, 0], self.DATA_FORMAT))
+            writer.write(channel, data, buffer_size)
             sys.stdout.flush()
 
+    def _split_data(self, writer):
+        to_split = self.split_channels()
+        writer.set_channels([channel for _, channel, _ in to_split])
+        self.write_channels(writer, to_split)
+
 
 class EDF_reader(EEG_reader):
 
+    SPLIT_WORKERS = 4  # Number of processes that extract channels at once
+    SPLIT_BLOCK_SAMPLES = 2 ** 20  # Samples read from a channel at a time, to bound memory use
+
     def __init__(self, edf_filename, jacksheet_filename=None, substitute_raw_file_for_header=None,
                  channel_map_filename=None):
         self.raw_filename = edf_filename
@@ -791,13 +871,10 @@ class EDF_reader(EEG_reader):
             reader = self.reader
         else:
             reader = pyedflib.EdfReader(substitute_file)
+        # Read every signal header from the file header in one go, rather than probing channel numbers
         headers = {}
-        for i in range(self.MAX_CHANNELS):
-            try:
-                header = reader.getSignalHeader(i)
-            except:
-                continue
-            if header['label']!= '':
+        for i, header in enumerate(reader.getSignalHeaders()):
+            if header['label'] != '':
                 headers[i] = header
         return headers
 
@@ -806,10 +883,12 @@ class EDF_reader(EEG_reader):
         for channel, header in list(self.headers.items()):
             if channels and channel not in channels:
                 continue
-            if header['sample_rate']:
+            # Newer versions of pyedflib call it sample_frequency
+            header_rate = header.get('sample_rate', header.get('sample_frequency'))
+            if header_rate:
                 if not sample_rate:
-                    sample_rate = header['sample_rate']
-                elif sample_rate != header['sample_rate']:
+                    sample_rate = header_rate
+                elif sample_rate != header_rate:
                     raise EEGError('Different sample rates for recorded channels')
         return sample_rate
 
@@ -820,14 +899,16 @@ class EDF_reader(EEG_reader):
     def channel_data(self, channel):
         return self.reader.readSignal(channel)
 
-    def _split_data(self, location, basename):
+    def _split_data(self, writer):
         sys.stdout.flush()
         used_jacksheet_labels = []
+        n_samples = self.reader.getNSamples()
+        to_split = []
         for channel, header in list(self.headers.items()):
             if self.jacksheet:
                 label = self.get_matching_jacksheet_dict_label(header['label'], self.jacksheet, self.channel_map)
                 if not label or label in used_jacksheet_labels:
-                    logger.info("skipping channel {}".format(header['label']))
+                    logger.info("skipping channel {}", header['label'])
                     continue
                 if label.upper() in self.jacksheet:
                     out_channel = self.jacksheet[label.upper()]
@@ -836,20 +917,114 @@ class EDF_reader(EEG_reader):
                     out_channel = self.jacksheet[label]
                     used_jacksheet_labels.append(label)
                 else:
-                    logger.info("skipping channel {}".format(label))
+                    logger.info("skipping channel {}", label)
             else:
                 out_channel = channel
-            filename = os.path.join(location, basename + '.%03d' % (int(out_channel)))
 
-            logger.debug('{}: {}'.format(out_channel, header['label']))
-            sys.stdout.flush()
-            data = self.reader.readSignal(channel).astype(self.DATA_FORMAT)
-            data.tofile(filename)
+            logger.debug('{}: {}', out_channel, header['label'])
+            to_split.append((channel, int(n_samples[channel]), int(out_channel)))
+
+        writer.set_channels([out_channel for _, _, out_channel in to_split])
+        if not isinstance(writer, SplitChannelWriter):
+            # Outputs shared between channels are streamed from this process, a block at a time
+            for channel, channel_samples, out_channel in to_split:
+                for start in range(0, channel_samples, self.SPLIT_BLOCK_SAMPLES):
+                    n = min(self.SPLIT_BLOCK_SAMPLES, channel_samples - start)
+                    writer.write(out_channel, self.reader.readSignal(channel, start, n), start)
+        else:
+            self._split_channels_to_files(writer, to_split)
+        sys.stdout.flush()
 
         if self.jacksheet:
             for label in self.jacksheet:
                 if label not in used_jacksheet_labels:
-                    logger.critical("label {} not split! Potentially missing data!".format(label))
+                    logger.critical("label {} not split! Potentially missing data!", label)
+
+    def _split_channels_to_files(self, writer, to_split):
+        """
+        Each worker opens its own reader and streams a share of the channels to their own files. EDFlib will not open
+        a file that is already open (in this process, or in the parent of a forked worker), so this reader's file is
+        closed while the workers run.
+        :param writer: eeg_writer.SplitChannelWriter
+        :param to_split: list of (channel index, number of samples, output channel)
+        """
+        to_split = [(channel, channel_samples, writer.channel_filename(out_channel))
+                    for channel, channel_samples, out_channel in to_split]
+        n_workers = max(1, min(self.SPLIT_WORKERS, len(to_split)))
+        worker_channels = [to_split[i::n_workers] for i in range(n_workers)]
+        self.reader.close()
+        try:
+            if n_workers == 1:
+                split_edf_channels(self.raw_filename, to_split, self.DATA_FORMAT, self.SPLIT_BLOCK_SAMPLES)
+            else:
+                with ProcessPoolExecutor(n_workers) as executor:
+                    futures = [executor.submit(split_edf_channels, self.raw_filename, channels,
+                                               self.DATA_FORMAT, self.SPLIT_BLOCK_SAMPLES)
+                               for channels in worker_channels]
+                    for future in futures:
+                        future.result()
+        finally:
+            self.reader = pyedflib.EdfReader(self.raw_filename)
+
+
+def split_edf_channels(edf_filename, channels, data_format, block_samples):
+    """
+    Writes channels of an EDF file to individual files, reading each channel a block at a time.
+    Module-level so that it can be run in a worker process.
+    :param edf_filename: The EDF file to read from
+    :param channels: list of (channel index, number of samples, output filename)
+    :param data_format: dtype of the output files
+    :param block_samples: number of samples to read and write at once
+    """
+    reader = pyedflib.EdfReader(edf_filename)
+    try:
+        for channel, n_samples, filename in channels:
+            with open(filename, 'wb') as f:
+                for start in range(0, n_samples, block_samples):
+                    n = min(block_samples, n_samples - start)
+                    reader.readSignal(channel, start, n).astype(data_format).tofile(f)
+    finally:
+        reader.close()
+
+
+def read_edf_header(filename, sample_nbytes=2):
+    """
+    Parses the header of an EDF file (or of a BDF file, which shares its layout), without reading any data.
+
+    :param filename: Path to the file
+    :param sample_nbytes: Number of bytes per sample (2 for EDF, 3 for BDF)
+    :return: Dictionary of header information (start_datetime, sfreq, n_times), including the layout of the data
+             records. As in MNE, the sample rate is that of the fastest channel.
+    """
+    with open(filename, 'rb') as f:
+        main_header = f.read(256)
+        day, month, year = [int(x) for x in re.findall(r'(\d+)', main_header[168:176].decode('ascii'))]
+        hour, minute, second = [int(x) for x in re.findall(r'(\d+)', main_header[176:184].decode('ascii'))]
+        header_nbytes = int(main_header[184:192])
+        n_records = int(main_header[236:244])
+        record_duration = float(main_header[244:252])
+        nchan = int(main_header[252:256])
+        # Samples per record come after the label, transducer, dimension, min/max and prefilter fields
+        f.seek(256 + nchan * 216)
+        samples_per_record = [int(f.read(8)) for _ in range(nchan)]
+
+    # If the number of records was never written (see ScalpReader.repair_bdf_header), infer it from the file size
+    record_nbytes = sum(samples_per_record) * sample_nbytes
+    if n_records == -1:
+        n_records = (os.path.getsize(filename) - header_nbytes) // record_nbytes
+
+    # Interpret the start time as MNE does (as UTC), so that start times match those from a full MNE load
+    year += 2000 if year < 50 else 1900
+    start = datetime.datetime(year, month, day, hour, minute, second)
+    start_datetime = datetime.datetime.fromtimestamp(calendar.timegm(start.utctimetuple()))
+
+    return {'start_datetime': start_datetime,
+            'sfreq': max(samples_per_record) / record_duration,
+            'n_times': n_records * max(samples_per_record),
+            'data_offset': header_nbytes,
+            'n_records': n_records,
+            'record_nbytes': record_nbytes,
+            'dtype': None}
 
 
 class ScalpReader(EEG_reader):
@@ -857,6 +1032,10 @@ class ScalpReader(EEG_reader):
     A universal reader for all scalp lab recordings. This reader has support for reading from EGI's .mff and .raw
     formats, as well as BioSemi's .bdf format.
     """
+    VALIDATION_RECORDS = 5  # Number of records, spread evenly across the recording, that validate() decodes
+
+    # Data types of EGI .raw files, indexed by the precision bits of the version number
+    EGI_RAW_DTYPES = {2: '>i2', 4: '>f4', 6: '>f8'}
     def __init__(self, raw_filename, jacksheet=None):
         """
         :param raw_filename: The file path to the .raw, .mff, or .bdf file containing the EEG recording for the session.
@@ -873,6 +1052,7 @@ class ScalpReader(EEG_reader):
         self.save_loc = None
         self.basename = os.path.splitext(os.path.basename(raw_filename))[0]
         self.DATA_FORMAT = self.filetype
+        self.header = None
 
     def repair_bdf_header(self):
         """
@@ -928,15 +1108,135 @@ class ScalpReader(EEG_reader):
                     f.seek(236)
                     f.write(str(int(inferred_records)).encode('ascii'))
 
+    def read_header(self):
+        """
+        Reads the start time, sample rate, and number of samples of the recording from its header, without loading any
+        data. BioSemi .bdf and EGI .raw headers are parsed directly. EGI .mff headers are read through MNE without
+        preloading.
+
+        :return: True if the header was successfully read. False if an exception was encountered.
+        """
+        try:
+            logger.debug('Parsing EEG header of {}', self.raw_filename)
+            if self.filetype == '.bdf':
+                self.header = self.read_bdf_header(self.raw_filename)
+            elif self.filetype == '.raw':
+                self.header = self.read_egi_raw_header(self.raw_filename)
+            elif self.filetype == '.mff':
+                raw = mne.io.read_raw_egi(self.raw_filename, preload=False)
+                self.header = {'start_datetime': self.meas_date_to_datetime(raw.info['meas_date']),
+                               'sfreq': raw.info['sfreq'],
+                               'n_times': raw.n_times,
+                               'raw': raw}
+            else:
+                logger.critical('Unsupported EEG file type for file %s!' % self.raw_filename)
+                return False
+            self.start_datetime = self.header['start_datetime']
+            return True
+        except Exception:
+            logger.warn('Unable to parse EEG header!')
+            return False
+
+    @staticmethod
+    def meas_date_to_datetime(meas_date):
+        # Measurement date may be either an integer or a length-2 array
+        if isinstance(meas_date, int):
+            return datetime.datetime.fromtimestamp(meas_date)
+        else:
+            return datetime.datetime.fromtimestamp(meas_date[0])
+
+    @staticmethod
+    def read_bdf_header(filename):
+        """
+        Parses the header of a BioSemi .bdf file (EDF layout, 24-bit samples).
+
+        :param filename: Path to the .bdf file
+        :return: Dictionary of header information, including the layout of the data records
+        """
+        return read_edf_header(filename, sample_nbytes=3)
+
+    @classmethod
+    def read_egi_raw_header(cls, filename):
+        """
+        Parses the header of a continuous EGI simple binary (.raw) file.
+
+        :param filename: Path to the .raw file
+        :return: Dictionary of header information, including the layout of the data records
+        """
+        with open(filename, 'rb') as f:
+            version = int(np.fromfile(f, '>i4', 1)[0])
+            year, month, day, hour, minute, second = np.fromfile(f, '>i2', 6)
+            _ = np.fromfile(f, '>i4', 1)  # milliseconds
+            sfreq, nchan, _, _, _ = np.fromfile(f, '>i2', 5)  # gain, bits, and range are unused
+            if version & 1 or (version & 6) not in cls.EGI_RAW_DTYPES:
+                raise EEGError('%s is not a continuous EGI simple binary file' % filename)
+            n_samples = int(np.fromfile(f, '>i4', 1)[0])
+            n_events = int(np.fromfile(f, '>i2', 1)[0])
+            data_offset = f.tell() + 4 * n_events  # Skip the event codes
+
+        dtype = np.dtype(cls.EGI_RAW_DTYPES[version & 6])
+        return {'start_datetime': datetime.datetime(int(year), int(month), int(day),
+                                                    int(hour), int(minute), int(second)),
+                'sfreq': float(sfreq),
+                'n_times': n_samples,
+                'data_offset': data_offset,
+                'n_records': n_samples,
+                'record_nbytes': (int(nchan) + n_events) * dtype.itemsize,
+                'dtype': dtype}
+
+    def validate(self):
+        """
+        Confirms that the recording is readable and not corrupted, without loading it. The header must parse, the file
+        must be large enough to hold every record the header describes, and VALIDATION_RECORDS records spread across
+        the recording must decode.
+
+        :return: True if the file looks intact. False otherwise.
+        """
+        if self.header is None and not self.read_header():
+            return False
+
+        try:
+            if self.filetype == '.mff':
+                raw = self.header['raw']
+                for start in np.linspace(0, raw.n_times - 1, self.VALIDATION_RECORDS).astype(int):
+                    raw[:, start:start + 1]
+                return True
+
+            n_records = self.header['n_records']
+            record_nbytes = self.header['record_nbytes']
+            expected_size = self.header['data_offset'] + n_records * record_nbytes
+            file_size = os.path.getsize(self.raw_filename)
+            if file_size < expected_size:
+                logger.warn('EEG file {} is truncated: expected {} bytes, found {}'.format(
+                    self.raw_filename, expected_size, file_size))
+                return False
+
+            with open(self.raw_filename, 'rb') as f:
+                for record in np.unique(np.linspace(0, n_records - 1, self.VALIDATION_RECORDS).astype(int)):
+                    f.seek(self.header['data_offset'] + record * record_nbytes)
+                    data = f.read(record_nbytes)
+                    if len(data) != record_nbytes:
+                        raise EEGError('Could not read record {}'.format(record))
+                    if self.header['dtype'] is None:
+                        # 24-bit samples: the record must hold a whole number of them
+                        np.frombuffer(data, np.uint8).reshape(-1, 3)
+                    elif not np.isfinite(np.frombuffer(data, self.header['dtype'])).all():
+                        raise EEGError('Record {} contains non-finite values'.format(record))
+            return True
+
+        except Exception:
+            logger.warn('Unable to validate EEG data file {}!'.format(self.raw_filename))
+            return False
+
     def get_data(self):
         """
-        Uses MNE to load the data from a .mff, .raw, or .bdf file. This process is mainly used for confirming that the
-        data from a session is readable and not corrupted.
+        Uses MNE to load the data from a .mff, .raw, or .bdf file. This is only needed when the samples themselves are
+        required; process_eeg() validates the file from its header with validate().
 
         return: True if the file was successfully read. False if an exception was encountered.
         """
         try:
-            logger.debug('Parsing EEG data file ' + self.raw_filename)
+            logger.debug('Parsing EEG data file {}', self.raw_filename)
 
             # Read an EGI recording
             if self.filetype in ('.mff', '.raw'):
@@ -955,11 +1255,8 @@ class ScalpReader(EEG_reader):
             else:
                 logger.critical('Unsupported EEG file type for file %s!' % self.raw_filename)
 
-            # Pull relevant header info; Measurement date may be either an integer or a length-2 array
-            if isinstance(self.data.info['meas_date'], int):
-                self.start_datetime = datetime.datetime.fromtimestamp(self.data.info['meas_date'])
-            else:
-                self.start_datetime = datetime.datetime.fromtimestamp(self.data.info['meas_date'][0])
+            # Pull relevant header info
+            self.start_datetime = self.meas_date_to_datetime(self.data.info['meas_date'])
 
             logger.debug('Finished parsing EEG data.')
             return True
@@ -974,9 +1271,9 @@ class ScalpReader(EEG_reader):
         actually split the EEG recording into separate channel files for scalp studies. Rather, Scalp Lab data is left
         as raw .mff/.raw/.bdf data files, and this function creates a symlink in the ephys folder to the raw data file.
 
-        As part of this process, the function loads the data file with MNE to make sure that the EEG recording is
-        readable and not corrupted. For BioSemi recordings, it also repairs corrupted file headers if needed (see
-        docstring for the repair_bdf_header() function for more details).
+        As part of this process, the function checks the file's header and samples a few records across the file to
+        make sure that the EEG recording is readable and not corrupted (see validate()). For BioSemi recordings, it also
+        repairs corrupted file headers if needed (see docstring for the repair_bdf_header() function for more details).
 
         Note that our EEG post-processing methods for scalp data requires that the behavioral events have already been
         processed and aligned, so scalp post-processing takes places as part of the EventCreationTask instead of the
@@ -991,11 +1288,9 @@ class ScalpReader(EEG_reader):
         if self.filetype == '.bdf':
             self.repair_bdf_header()
 
-        # Make sure data can be loaded
-        if self.data is None:
-            success = self.get_data()
-            if not success:
-                return False
+        # Make sure data can be read
+        if not self.validate():
+            return False
 
         # Create a link to the raw data file in the ephys current_processed directory
         os.symlink(os.path.abspath(os.path.join(os.path.dirname(self.raw_filename), os.readlink(self.raw_filename))),
@@ -1007,7 +1302,7 @@ class ScalpReader(EEG_reader):
     def get_start_time(self):
         # Read header info if have not already done so, as the header contains the start time info
         if self.start_datetime is None:
-            self.get_data()
+            self.read_header()
         return self.start_datetime
 
     def get_start_time_string(self):
@@ -1017,17 +1312,21 @@ class ScalpReader(EEG_reader):
         return int((self.get_start_time() - self.EPOCH).total_seconds() * 1000)
 
     def get_sample_rate(self):
-        if self.data is None:
-            self.get_data()
-        return self.data.info['sfreq']
+        if self.data is not None:
+            return self.data.info['sfreq']
+        if self.header is None:
+            self.read_header()
+        return self.header['sfreq']
 
     def get_source_file(self):
         return self.raw_filename
 
     def get_n_samples(self):
-        if self.data is None:
-            self.get_data()
-        return self.data.n_times
+        if self.data is not None:
+            return self.data.n_times
+        if self.header is None:
+            self.read_header()
+        return self.header['n_times']
 
 
 def read_jacksheet(filename):
@@ -0,0 +1,250 @@
+"""
+Output backends for split EEG.
+
+An EEG_reader declares the channels it is about to write with set_channels, then streams each channel's data to the
+writer in blocks with write(channel, data, start). The same reader code can therefore produce the traditional layout
+of one raw file per channel in noreref/, a single chunked (channel x time) HDF5 container, or both.
+"""
+import os
+
+import numpy as np
+
+from ..exc import EEGError
+from ..lazy import lazy_import
+
+tables = lazy_import('tables')
+
+SPLIT_OUTPUT = 'split'
+HDF5_OUTPUT = 'hdf5'
+BOTH_OUTPUT = 'both'
+
+OUTPUTS = (SPLIT_OUTPUT, HDF5_OUTPUT, BOTH_OUTPUT)
+
+
+class EEGWriter(object):
+    """
+    Base class for writers of split EEG. Subclasses implement _open, _write and close
+    """
+
+    def __init__(self, location, basename, data_format):
+        """
+        :param location: directory to write to (noreref/)
+        :param basename: base name of the output, without extension
+        :param data_format: dtype in which samples are stored
+        """
+        self.location = location
+        self.basename = basename
+        self.data_format = np.dtype(data_format)
+        self.channels = None
+        self._channel_index = {}
+
+    def set_channels(self, channels):
+        """
+        Declares the channels that will be written. Must be called once, before any call to write.
+        Repeated channels are only stored once, the last data written to them winning.
+        :param channels: channel numbers, in the order in which they should be stored
+        """
+        if self.channels is not None:
+            raise EEGError('Channels have already been set for {}'.format(self.basename))
+        self.channels = []
+        for channel in channels:
+            channel = int(channel)
+            if channel not in self._channel_index:
+                self._channel_index[channel] = len(self.channels)
+                self.channels.append(channel)
+        self._open()
+
+    def write(self, channel, data, start=0):
+        """
+        Writes a block of samples for a single channel
+        :param channel: channel number, as passed to set_channels
+        :param data: samples to write
+        :param start: index of the first sample of the block
+        """
+        if self.channels is None:
+            raise EEGError('set_channels must be called before writing {}'.format(self.basename))
+        channel = int(channel)
+        if channel not in self._channel_index:
+            raise EEGError('Channel {} was not declared for {}'.format(channel, self.basename))
+        data = np.asarray(data).astype(self.data_format, copy=False).ravel()
+        self._write(channel, data, int(start))
+
+    def sources_info(self):
+        """
+        :return: dict of information describing the output, to be added to the entry in sources.json
+        """
+        return {}
+
+    def _open(self):
+        pass
+
+    def _write(self, channel, data, start):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class SplitChannelWriter(EEGWriter):
+    """
+    Writes each channel to its own raw file, <basename>.<channel>
+    """
+
+    def __init__(self, location, basename, data_format):
+        super(SplitChannelWriter, self).__init__(location, basename, data_format)
+        self._file = None
+        self._file_channel = None
+        self._written = set()
+
+    def channel_filename(self, channel):
+        return os.path.join(self.location, self.basename + '.%03d' % int(channel))
+
+    def _write(self, channel, data, start):
+        # Channels are written one after another, so only the current file is kept open
+        if channel != self._file_channel:
+            self.close()
+            mode = 'r+b' if channel in self._written else 'wb'
+            self._file = open(self.channel_filename(channel), mode)
+            self._file_channel = channel
+            self._written.add(channel)
+        self._file.seek(start * self.data_format.itemsize)
+        data.tofile(self._file)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._file_channel = None
+
+
+class HDF5ChannelWriter(EEGWriter):
+    """
+    Writes all channels to a single HDF5 file, <basename>.noreref.h5, containing:
+        /data: (channel x time) array, chunked in both dimensions
+        /channels: the channel number of each row of /data
+        /n_samples: the number of samples written to each row of /data
+    Rows that are shorter than the longest channel are padded with zeros.
+    """
+
+    FILE_EXT = '.noreref.h5'
+
+    CHUNK_CHANNELS = 4
+    CHUNK_SAMPLES = 2 ** 15
+
+    COMPLIB = 'zlib'
+
+    def __init__(self, location, basename, data_format, complevel=0):
+        """
+        :param complevel: compression level (0-9). 0 disables compression
+        """
+        super(HDF5ChannelWriter, self).__init__(location, basename, data_format)
+        self.complevel = complevel
+        self._h5file = None
+        self._data = None
+        self._n_samples = None
+
+    @property
+    def filename(self):
+        return os.path.join(self.location, self.basename + self.FILE_EXT)
+
+    @property
+    def chunkshape(self):
+        return (min(self.CHUNK_CHANNELS, len(self.channels)), self.CHUNK_SAMPLES)
+
+    def _open(self):
+        if not self.channels:
+            return
+        filters = tables.Filters(complevel=self.complevel, complib=self.COMPLIB, shuffle=True) \
+            if self.complevel else None
+        self._h5file = tables.open_file(self.filename, mode='w')
+        # Extendable along time, so that channels of different lengths can be streamed in without knowing their length
+        self._data = self._h5file.create_earray('/', 'data', tables.Atom.from_dtype(self.data_format),
+                                                shape=(len(self.channels), 0), chunkshape=self.chunkshape,
+                                                filters=filters)
+        self._h5file.create_array('/', 'channels', np.array(self.channels, dtype='int32'))
+        self._n_samples = np.zeros(len(self.channels), dtype='int64')
+
+    def _write(self, channel, data, start):
+        row = self._channel_index[channel]
+        end = start + len(data)
+        if end > self._data.nrows:
+            self._data.truncate(end)
+        self._data[row, start:end] = data
+        self._n_samples[row] = max(self._n_samples[row], end)
+
+    def close(self):
+        if self._h5file is not None:
+            self._h5file.create_array('/', 'n_samples', self._n_samples)
+            self._h5file.close()
+            self._h5file = None
+
+    def sources_info(self):
+        if not self.channels:
+            return {}
+        return {
+            'hdf5': {
+                'file': os.path.basename(self.filename),
+                'data': '/data',
+                'channels': '/channels',
+                'n_samples': '/n_samples',
+                'dimensions': ['channel', 'time'],
+                'chunk_shape': list(self.chunkshape),
+                'compression': self.COMPLIB if self.complevel else None,
+                'complevel': self.complevel,
+            }
+        }
+
+
+class MultiEEGWriter(EEGWriter):
+    """
+    Passes everything it receives on to several writers
+    """
+
+    def __init__(self, writers):
+        super(MultiEEGWriter, self).__init__(writers[0].location, writers[0].basename, writers[0].data_format)
+        self.writers = writers
+
+    def set_channels(self, channels):
+        channels = list(channels)
+        super(MultiEEGWriter, self).set_channels(channels)
+        for writer in self.writers:
+            writer.set_channels(channels)
+
+    def _write(self, channel, data, start):
+        for writer in self.writers:
+            writer.write(channel, data, start)
+
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+
+    def sources_info(self):
+        info = {}
+        for writer in self.writers:
+            info.update(writer.sources_info())
+        return info
+
+
+def get_eeg_writer(output, location, basename, data_format, complevel=0):
+    """
+    :param output: one of OUTPUTS
+    :param location: directory to write to
+    :param basename: base name of the output files
+    :param data_format: dtype in which samples are stored
+    :param complevel: compression level for HDF5 output
+    :return: the EEGWriter for the requested output
+    """
+    if output == SPLIT_OUTPUT:
+        return SplitChannelWriter(location, basename, data_format)
+    elif output == HDF5_OUTPUT:
+        return HDF5ChannelWriter(location, basename, data_format, complevel)
+    elif output == BOTH_OUTPUT:
+        return MultiEEGWriter([SplitChannelWriter(location, basename, data_format),
+                               HDF5ChannelWriter(location, basename, data_format, complevel)])
+    raise EEGError('Unknown EEG output {}. Options are {}'.format(output, ', '.join(OUTPUTS)))
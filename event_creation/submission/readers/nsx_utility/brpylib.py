@@ -398,6 +398,56 @@ def check_filesize(file_size):
 # </editor-fold>
 
 
+# <editor-fold desc="Data packet functions">
+def packet_view(packets, fields):
+    """
+    :param packets: {numpy array} data packets, one record of BytesInDataPackets bytes per packet
+    :param fields:  {list} (name, format, byte offset) of each field to extract from the packets
+    :return:        a view of the packets with just those fields
+    """
+    names, formats, offsets = zip(*fields)
+    return packets.view(np.dtype({'names': list(names), 'formats': list(formats), 'offsets': list(offsets),
+                                  'itemsize': packets.dtype.itemsize}))
+
+
+def group_by_first_seen(keys):
+    """
+    :param keys: {numpy array} key of each packet (e.g., digital event reason or electrode ID)
+    :return:     list of (key, indices of the packets with that key), with the keys in the order they first occur
+    """
+    unique_keys, first_indices, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    inverse    = inverse.ravel()
+    order      = np.argsort(inverse, kind='stable')
+    boundaries = np.cumsum(np.bincount(inverse, minlength=len(unique_keys)))[:-1]
+    groups     = np.split(order, boundaries)
+    return [(unique_keys[i], groups[i]) for i in np.argsort(first_indices)]
+
+
+def format_codes(codes, names, default='error'):
+    """
+    :param codes:   {numpy array} integer codes read from the packets
+    :param names:   {dict} code -> name
+    :param default: name of any code not in names
+    :return:        {numpy array} name of each code
+    """
+    formatted = np.full(len(codes), default, dtype=object)
+    for code, name in names.items():
+        formatted[codes == code] = name
+    return formatted
+
+
+def format_classifiers(codes):
+    """
+    :param codes: {numpy array} spike classifier of each packet
+    :return:      {list} the unit number (1-16) of each spike, or 'none', 'noise' or 'error'
+    """
+    formatted = format_codes(codes, {UNDEFINED: 'none', CLASSIFIER_NOISE: 'noise'})
+    units     = (codes >= CLASSIFIER_MIN) & (codes <= CLASSIFIER_MAX)
+    formatted[units] = [int(code) for code in codes[units]]
+    return formatted.tolist()
+# </editor-fold>
+
+
 class NevFile:
     """
     attributes and methods for all BR event data files.  Initialization opens the file and extracts the
@@ -427,11 +477,27 @@ class NevFile:
             if header_string == 'NEUEVWAV' and float(self.basic_header['FileSpec']) < 2.3:
                 self.extended_headers[i]['SpikeWidthSamples'] = WAVEFORM_SAMPLES_21
 
-    def getdata(self, elec_ids='all'):
+    def getpackets(self):
+        """
+        :return: {numpy memmap} all data packets of the file as a structured array (TimeStamp, PacketID, Payload),
+                 mapped rather than read into memory.  Packets are all BytesInDataPackets long, so a partial packet at
+                 the end of the file is ignored
+        """
+        packet_bytes = self.basic_header['BytesInDataPackets']
+        data_bytes   = ospath.getsize(self.datafile.name) - self.basic_header['BytesInHeader']
+        packet_dtype = np.dtype([('TimeStamp', '<u4'), ('PacketID', '<u2'), ('Payload', 'u1', (packet_bytes - 6,))])
+        num_packets  = max(data_bytes // packet_bytes, 0)
+        if num_packets == 0: return np.zeros(0, dtype=packet_dtype)
+        return np.memmap(self.datafile.name, dtype=packet_dtype, mode='r', offset=self.basic_header['BytesInHeader'],
+                         shape=(num_packets,))
+
+    def getdata(self, elec_ids='all', dig_events_only=False):
         """
         This function is used to return a set of data from the NSx datafile.
 
         :param elec_ids: [optional] {list} User selection of elec_ids to extract specific spike waveforms (e.g., [13])
+        :param dig_events_only: [optional] {bool} only extract digital events (e.g., sync pulses), skipping all other
+                                packets
         :return: output: {Dictionary} with one or more of the following dictionaries (all include TimeStamps)
                     dig_events:            Reason, Data, [for file spec 2.2 and below, AnalogData and AnalogDataUnits]
                     spike_events:          Units='nV', ChannelID, NEUEVWAV_HeaderIndices, Classification, Waveforms
@@ -445,210 +511,142 @@ class NevFile:
         than one digital type or spike event exists for a channel
         """
 
-        # Initialize output dictionary and reset position in file (if read before, may not be here anymore)
+        # Initialize output dictionary
         output = dict()
-        self.datafile.seek(self.basic_header['BytesInHeader'], 0)
 
         # Safety checks
         elec_ids = check_elecid(elec_ids)
 
-        # Must go through each data packet and process separately until end of file
-        while self.datafile.tell() != ospath.getsize(self.datafile.name):
-
-            time_stamp = unpack('<I', self.datafile.read(4))[0]
-            packet_id  = unpack('<H', self.datafile.read(2))[0]
-
-            # skip unwanted neural data packets if only asking for certain channels
-            if not (elec_ids == 'all' or ((packet_id in elec_ids) and
-                                           NEURAL_PACKET_ID_MIN <= packet_id <= NEURAL_PACKET_ID_MAX)):
-                self.datafile.seek(self.basic_header['BytesInDataPackets'] - 6, 1)
-                continue
-
-            # For digital event data, read reason, skip one byte (reserved), read digital value,
-            # and skip X bytes (reserved)
-            if packet_id == DIGITAL_PACKET_ID:
-
-                # See if the dictionary exists in output
-                if 'dig_events' not in output:
-                    output['dig_events'] = {'Reason': [], 'TimeStamps': [], 'Data': []}
-
-                reason = unpack('B', self.datafile.read(1))[0]
-                if   reason == PARALLEL_REASON: reason = 'parallel'
-                elif reason == PERIODIC_REASON: reason = 'periodic'
-                elif reason == SERIAL_REASON:   reason = 'serial'
-                else:                           reason = 'unknown'
-                self.datafile.seek(1, 1)
-
-                # Check if this type of data already exists, if not, create an empty list, and then append data
-                if reason in output['dig_events']['Reason']:
-                    idx = output['dig_events']['Reason'].index(reason)
-                else:
-                    idx = -1
-                    output['dig_events']['Reason'].append(reason)
-                    output['dig_events']['TimeStamps'].append([])
-                    output['dig_events']['Data'].append([])
-
-                output['dig_events']['TimeStamps'][idx].append(time_stamp)
-                output['dig_events']['Data'][idx].append(unpack('<H', self.datafile.read(2))[0])
-
-                # For serial data, strip off upper byte
-                if reason == 'serial':
-                    output['dig_events']['Data'][idx][-1] &= LOWER_BYTE_MASK
-
-                # For File Spec < 2.3, also capture analog Data, otherwise skip remaining packet bytes
-                if float(self.basic_header['FileSpec']) < 2.3:
-                    if 'AnalogDataUnits' not in output['dig_events']:
-                        output['dig_events']['AnalogDataUnits'] = 'mv'
-
-                    output['dig_events']['AnalogData'].append([])
-                    for j in range(5):
-                        output['dig_events']['AnalogData'][-1].append(unpack('<h', self.datafile.read(2))[0])
-                else:
-                    self.datafile.seek(self.basic_header['BytesInDataPackets'] - 10, 1)
-
-            # For neural waveforms, read classifier, skip one byte (reserved), and read waveform data
-            elif NEURAL_PACKET_ID_MIN <= packet_id <= NEURAL_PACKET_ID_MAX:
-
-                # See if the dictionary exists in output, if not, create it
-                if 'spike_events' not in output:
-                    output['spike_events'] = {'Units': 'nV', 'ChannelID': [], 'TimeStamps': [],
-                                              'NEUEVWAV_HeaderIndices': [], 'Classification': [], 'Waveforms': []}
-
-                classifier = unpack('B', self.datafile.read(1))[0]
-                if classifier == UNDEFINED:          classifier = 'none'
-                elif CLASSIFIER_MIN <= classifier <= CLASSIFIER_MAX: classifier = classifier
-                elif classifier == CLASSIFIER_NOISE: classifier = 'noise'
-                else:                                classifier = 'error'
-                self.datafile.seek(1, 1)
-
-                # Check if data for this electrode exists and update parameters accordingly
-                if packet_id in output['spike_events']['ChannelID']:
-                    idx = output['spike_events']['ChannelID'].index(packet_id)
-                else:
-                    idx = -1
-                    output['spike_events']['ChannelID'].append(packet_id)
-                    output['spike_events']['TimeStamps'].append([])
-                    output['spike_events']['Classification'].append([])
-
-                    # Find neuevwav extended header for this electrode for use in calculating data info
-                    output['spike_events']['NEUEVWAV_HeaderIndices'].append(
-                        next(item for (item, d) in enumerate(self.extended_headers)
-                             if d["ElectrodeID"] == packet_id and d["PacketID"] == 'NEUEVWAV'))
-
-                output['spike_events']['TimeStamps'][idx].append(time_stamp)
-                output['spike_events']['Classification'][idx].append(classifier)
-
-                # Use extended header idx to get specific data information
-                ext_header_idx = output['spike_events']['NEUEVWAV_HeaderIndices'][idx]
+        # All packets are the same size, so the whole data section is mapped at once and packets are selected by ID
+        packets = self.getpackets()
+        packet_ids = np.array(packets['PacketID'])
+        neural = (packet_ids >= NEURAL_PACKET_ID_MIN) & (packet_ids <= NEURAL_PACKET_ID_MAX)
+
+        # skip unwanted neural data packets (and all other packets) if only asking for certain channels
+        if elec_ids == 'all': selected = np.ones(len(packets), dtype=bool)
+        else:                 selected = neural & np.isin(packet_ids, elec_ids)
+
+        # For digital event data, read reason, skip one byte (reserved), read digital value,
+        # and for File Spec < 2.3, also capture analog Data
+        digital = selected & (packet_ids == DIGITAL_PACKET_ID)
+        if digital.any():
+            fields = [('TimeStamp', '<u4', 0), ('Reason', 'u1', 6), ('Data', '<u2', 8)]
+            if float(self.basic_header['FileSpec']) < 2.3: fields.append(('AnalogData', ('<h', 5), 10))
+            dig_packets = packet_view(packets, fields)[digital]
+
+            reasons = format_codes(dig_packets['Reason'], {PARALLEL_REASON: 'parallel', PERIODIC_REASON: 'periodic',
+                                                           SERIAL_REASON: 'serial'}, 'unknown')
+            data = dig_packets['Data'].copy()
+
+            # For serial data, strip off upper byte
+            data[reasons == 'serial'] &= LOWER_BYTE_MASK
+
+            # Each type of data gets its own list, in the order the types first occur
+            output['dig_events'] = {'Reason': [], 'TimeStamps': [], 'Data': []}
+            for reason, indices in group_by_first_seen(reasons):
+                output['dig_events']['Reason'].append(reason)
+                output['dig_events']['TimeStamps'].append(dig_packets['TimeStamp'][indices].tolist())
+                output['dig_events']['Data'].append(data[indices].tolist())
+
+            if 'AnalogData' in dig_packets.dtype.names:
+                output['dig_events']['AnalogDataUnits'] = 'mv'
+                output['dig_events']['AnalogData']      = dig_packets['AnalogData'].tolist()
+
+        if dig_events_only: return output
+
+        # For neural waveforms, read classifier, skip one byte (reserved), and read waveform data
+        spikes = np.flatnonzero(selected & neural)
+        if len(spikes):
+            output['spike_events'] = {'Units': 'nV', 'ChannelID': [], 'TimeStamps': [],
+                                      'NEUEVWAV_HeaderIndices': [], 'Classification': [], 'Waveforms': []}
+
+            for packet_id, indices in group_by_first_seen(packet_ids[spikes]):
+                channel_packets = packets[spikes[indices]]
+                packet_id       = int(packet_id)
+
+                # Find neuevwav extended header for this electrode for use in calculating data info
+                ext_header_idx = next(item for (item, d) in enumerate(self.extended_headers)
+                                      if d["PacketID"] == 'NEUEVWAV' and d["ElectrodeID"] == packet_id)
                 samples    = self.extended_headers[ext_header_idx]['SpikeWidthSamples']
                 dig_factor = self.extended_headers[ext_header_idx]['DigitizationFactor']
                 num_bytes  = self.extended_headers[ext_header_idx]['BytesPerWaveform']
                 if num_bytes <= 1:   data_type = np.int8
-                elif num_bytes == 2: data_type = np.int16
+                elif num_bytes == 2: data_type = np.dtype('<i2')
 
-                # Extract and scale the data
-                if idx == -1:
-                    output['spike_events']['Waveforms'].append(
-                        [np.fromfile(file=self.datafile, dtype=data_type, count=samples).astype(np.int32) * dig_factor])
-                else:
-                    output['spike_events']['Waveforms'][idx] = \
-                        np.append(output['spike_events']['Waveforms'][idx],
-                                  [np.fromfile(file=self.datafile, dtype=data_type, count=samples).astype(np.int32) *
-                                   dig_factor], axis=0)
-
-            # For comment events
-            elif packet_id == COMMENT_PACKET_ID:
-
-                # See if the dictionary exists in output, if not, create it
-                if 'comments' not in output:
-                    output['comments'] = {'TimeStamps': [], 'CharSet': [], 'Flag': [], 'Data': [], 'Comment': []}
-
-                output['comments']['TimeStamps'].append(time_stamp)
-
-                char_set = unpack('B', self.datafile.read(1))[0]
-                if char_set == CHARSET_ANSI:  output['comments']['CharSet'].append('ANSI')
-                elif char_set == CHARSET_UTF: output['comments']['CharSet'].append('UTF-16')
-                elif char_set == CHARSET_ROI: output['comments']['CharSet'].append('NeuroMotive ROI')
-                else:                         output['comments']['CharSet'].append('error')
-
-                comm_flag = unpack('B', self.datafile.read(1))[0]
-                if comm_flag == COMM_RGBA:   output['comments']['Flag'].append('RGBA color code')
-                elif comm_flag == COMM_TIME: output['comments']['Flag'].append('timestamp')
-                else:                        output['comments']['Flag'].append('error')
-
-                output['comments']['Data'].append(unpack('<I', self.datafile.read(4))[0])
-
-                samples = self.basic_header['BytesInDataPackets'] - 12
-                comm_string = bytes.decode(self.datafile.read(samples), 'latin-1')
-                output['comments']['Comment'].append(comm_string.split(STRING_TERMINUS, 1)[0])
-
-            # For video sync event
-            elif packet_id == VIDEO_SYNC_PACKET_ID:
-
-                # See if the dictionary exists in output, if not, create it
-                if 'video_sync_events' not in output:
-                    output['video_sync_events'] = {'TimeStamps': [], 'VideoFileNum': [], 'VideoFrameNum': [],
-                                                   'VideoElapsedTime_ms': [], 'VideoSourceID': []}
-
-                output['video_sync_events']['TimeStamps'].append(          time_stamp)
-                output['video_sync_events']['VideoFileNum'].append(        unpack('<H', self.datafile.read(2))[0])
-                output['video_sync_events']['VideoFrameNum'].append(       unpack('<I', self.datafile.read(4))[0])
-                output['video_sync_events']['VideoElapsedTime_ms'].append( unpack('<I', self.datafile.read(4))[0])
-                output['video_sync_events']['VideoSourceID'].append(       unpack('<I', self.datafile.read(4))[0])
-                self.datafile.seek((self.basic_header['BytesInDataPackets'] - 20), 1)
-
-            # For tracking event
-            elif packet_id == TRACKING_PACKET_ID:
-
-                # See if the dictionary exists in output, if not, create it
-                if 'tracking_events' not in output:
-                    output['tracking_events'] = {'TimeStamps': [], 'ParentID': [], 'NodeID': [], 'NodeCount': [],
-                                                 'PointCount': [], 'TrackingPoints': []}
-
-                output['tracking_events']['TimeStamps'].append( time_stamp)
-                output['tracking_events']['ParentID'].append(   unpack('<H', self.datafile.read(2))[0])
-                output['tracking_events']['NodeID'].append(     unpack('<H', self.datafile.read(2))[0])
-                output['tracking_events']['NodeCount'].append(  unpack('<H', self.datafile.read(2))[0])
-                output['tracking_events']['PointCount'].append( unpack('<H', self.datafile.read(2))[0])
-                samples = (self.basic_header['BytesInDataPackets'] - 14) // 2
-                output['tracking_events']['TrackingPoints'].append(
-                    np.fromfile(file=self.datafile, dtype=np.uint16, count=samples))
-
-            # For button trigger event
-            elif packet_id == BUTTON_PACKET_ID:
-
-                # See if the dictionary exists in output, if not, create it
-                if 'button_trigger_events' not in output:
-                    output['button_trigger_events'] = {'TimeStamps': [], 'TriggerType': []}
-
-                output['button_trigger_events']['TimeStamps'].append(time_stamp)
-                trigger_type = unpack('<H', self.datafile.read(2))[0]
-                if trigger_type == UNDEFINED:      output['button_trigger_events']['TriggerType'].append('undefined')
-                elif trigger_type == BUTTON_PRESS: output['button_trigger_events']['TriggerType'].append('button press')
-                elif trigger_type == BUTTON_RESET: output['button_trigger_events']['TriggerType'].append('event reset')
-                else:                              output['button_trigger_events']['TriggerType'].append('error')
-                self.datafile.seek((self.basic_header['BytesInDataPackets'] - 8), 1)
-
-            # For configuration log event
-            elif packet_id == CONFIGURATION_PACKET_ID:
-
-                # See if the dictionary exists in output, if not, create it
-                if 'configuration_events' not in output:
-                    output['configuration_events'] = {'TimeStamps': [], 'ConfigChangeType': [], 'ConfigChanged': []}
-
-                output['configuration_events']['TimeStamps'].append(time_stamp)
-                change_type = unpack('<H', self.datafile.read(2))[0]
-                if change_type == CHG_NORMAL:     output['configuration_events']['ConfigChangeType'].append('normal')
-                elif change_type == CHG_CRITICAL: output['configuration_events']['ConfigChangeType'].append('critical')
-                else:                             output['configuration_events']['ConfigChangeType'].append('error')
-
-                samples = self.basic_header['BytesInDataPackets'] - 8
-                output['configuration_events']['ConfigChanged'].append(unpack(('<' + str(samples) + 's'),
-                                                                              self.datafile.read(samples))[0])
-
-            # Otherwise, packet unknown, skip to next packet
-            else:  self.datafile.seek((self.basic_header['BytesInDataPackets'] - 6), 1)
+                output['spike_events']['ChannelID'].append(packet_id)
+                output['spike_events']['TimeStamps'].append(channel_packets['TimeStamp'].tolist())
+                output['spike_events']['NEUEVWAV_HeaderIndices'].append(ext_header_idx)
+                output['spike_events']['Classification'].append(
+                    format_classifiers(channel_packets['Payload'][:, 0]))
 
+                # Extract and scale the data
+                waveform_bytes = np.ascontiguousarray(
+                    channel_packets['Payload'][:, 2:2 + samples * np.dtype(data_type).itemsize])
+                output['spike_events']['Waveforms'].append(
+                    waveform_bytes.view(data_type).reshape(-1, samples).astype(np.int32) * dig_factor)
+
+        # For comment events
+        comments = selected & (packet_ids == COMMENT_PACKET_ID)
+        if comments.any():
+            comm_packets = packet_view(packets, [('TimeStamp', '<u4', 0), ('CharSet', 'u1', 6), ('Flag', 'u1', 7),
+                                                 ('Data', '<u4', 8)])[comments]
+            comm_strings = packets['Payload'][comments][:, 6:]
+            output['comments'] = {
+                'TimeStamps': comm_packets['TimeStamp'].tolist(),
+                'CharSet':    format_codes(comm_packets['CharSet'], {CHARSET_ANSI: 'ANSI', CHARSET_UTF: 'UTF-16',
+                                                                     CHARSET_ROI: 'NeuroMotive ROI'}).tolist(),
+                'Flag':       format_codes(comm_packets['Flag'], {COMM_RGBA: 'RGBA color code',
+                                                                  COMM_TIME: 'timestamp'}).tolist(),
+                'Data':       comm_packets['Data'].tolist(),
+                'Comment':    [bytes.decode(comm_string.tobytes(), 'latin-1').split(STRING_TERMINUS, 1)[0]
+                               for comm_string in comm_strings]}
+
+        # For video sync event
+        video_syncs = selected & (packet_ids == VIDEO_SYNC_PACKET_ID)
+        if video_syncs.any():
+            video_packets = packet_view(packets, [('TimeStamp', '<u4', 0), ('VideoFileNum', '<u2', 6),
+                                                  ('VideoFrameNum', '<u4', 8), ('VideoElapsedTime_ms', '<u4', 12),
+                                                  ('VideoSourceID', '<u4', 16)])[video_syncs]
+            output['video_sync_events'] = {'TimeStamps': video_packets['TimeStamp'].tolist()}
+            for name in ('VideoFileNum', 'VideoFrameNum', 'VideoElapsedTime_ms', 'VideoSourceID'):
+                output['video_sync_events'][name] = video_packets[name].tolist()
+
+        # For tracking event
+        trackings = selected & (packet_ids == TRACKING_PACKET_ID)
+        if trackings.any():
+            tracking_packets = packet_view(packets, [('TimeStamp', '<u4', 0), ('ParentID', '<u2', 6),
+                                                     ('NodeID', '<u2', 8), ('NodeCount', '<u2', 10),
+                                                     ('PointCount', '<u2', 12)])[trackings]
+            samples = (self.basic_header['BytesInDataPackets'] - 14) // 2
+            output['tracking_events'] = {'TimeStamps': tracking_packets['TimeStamp'].tolist()}
+            for name in ('ParentID', 'NodeID', 'NodeCount', 'PointCount'):
+                output['tracking_events'][name] = tracking_packets[name].tolist()
+            output['tracking_events']['TrackingPoints'] = list(np.ascontiguousarray(
+                packets['Payload'][trackings][:, 8:8 + 2 * samples]).view('<u2'))
+
+        # For button trigger event
+        buttons = selected & (packet_ids == BUTTON_PACKET_ID)
+        if buttons.any():
+            button_packets = packet_view(packets, [('TimeStamp', '<u4', 0), ('TriggerType', '<u2', 6)])[buttons]
+            output['button_trigger_events'] = {
+                'TimeStamps':  button_packets['TimeStamp'].tolist(),
+                'TriggerType': format_codes(button_packets['TriggerType'], {UNDEFINED: 'undefined',
+                                                                            BUTTON_PRESS: 'button press',
+                                                                            BUTTON_RESET: 'event reset'}).tolist()}
+
+        # For configuration log event
+        configurations = selected & (packet_ids == CONFIGURATION_PACKET_ID)
+        if configurations.any():
+            config_packets = packet_view(packets, [('TimeStamp', '<u4', 0),
+                                                   ('ConfigChangeType', '<u2', 6)])[configurations]
+            config_changes = packets['Payload'][configurations][:, 2:]
+            output['configuration_events'] = {
+                'TimeStamps':       config_packets['TimeStamp'].tolist(),
+                'ConfigChangeType': format_codes(config_packets['ConfigChangeType'],
+                                                 {CHG_NORMAL: 'normal', CHG_CRITICAL: 'critical'}).tolist(),
+                'ConfigChanged':    [config_changed.tobytes() for config_changed in config_changes]}
+
+        # Otherwise, packet unknown, skip it
         return output
 
     def processroicomments(self, comments):
@@ -19,6 +19,7 @@ matplotlib.rcParams['agg.path.chunksize'] = 10000
 
 from .eeg_reader import NK_reader, EDF_reader
 from ..exc import PeakFindingError
+from .pulse_signal import ChannelDifference, MinMaxPyramid, find_peaks_in_selection
 
 class LabeledEditLayout(QHBoxLayout):
 
@@ -57,6 +58,10 @@ class LabeledEditLayout(QHBoxLayout):
 
 class SyncPulseExtractor(QWidget):
 
+    # Maximum number of points drawn in the full view, and samples either side of the middle shown in the zoom view
+    FULL_VIEW_POINTS = 4000
+    ZOOM_SAMPLES = 20000
+
     def __init__(self, model=None, parent=None):
 
         super(SyncPulseExtractor, self).__init__(parent)
@@ -160,6 +165,7 @@ class SyncPulseExtractor(QWidget):
         self.gs = gridspec.GridSpec(2, 1, height_ratios=[1,5])
 
         self.full_ax = plt.subplot(self.gs[1])
+        self.full_line = None
         self.zoom_ax = plt.subplot(self.gs[0])
         self.zoom_ax.get_xaxis().set_ticks([])
         self.zoom_ax.get_yaxis().set_ticks([])
@@ -344,18 +350,36 @@ class SyncPulseExtractor(QWidget):
     def plot_full(self):
         # discards the old graph
         #self.full_ax.hold(False)
-        # plot data
-        self.full_ax.plot(self.model.data, '-')
+
+        # plot data. Until the view is zoomed in far enough to show every sample, the min/max envelope is drawn
+        x, y = self.full_view_data(0, len(self.model.data))
+        self.full_line, = self.full_ax.plot(x, y, '-')
 
         #self.full_ax.hold(True)
+        self.full_ax.callbacks.connect('xlim_changed', self.full_view_changed)
+
+    def full_view_data(self, start, stop):
+        """
+        :return: x, y to draw for samples [start, stop) of the data
+        """
+        envelope = self.model.envelope.envelope(start, stop, self.FULL_VIEW_POINTS)
+        if envelope is not None:
+            return envelope
+        start = max(int(start), 0)
+        stop = min(int(np.ceil(stop)), len(self.model.data))
+        return np.arange(start, stop), self.model.data[start:stop]
+
+    def full_view_changed(self, ax):
+        if self.full_line is not None and self.model.data is not None:
+            self.full_line.set_data(*self.full_view_data(*ax.get_xlim()))
 
     def plot_zoom(self):
         #self.zoom_ax.hold(False)
-        self.zoom_ax.plot(self.model.data, '-')
-        #self.zoom_ax.hold(True)
-        mid = len(self.model.data)/2
-        data_range = [mid-20000, mid+20000]
+        mid = len(self.model.data) // 2
+        data_range = [max(mid - self.ZOOM_SAMPLES, 0), mid + self.ZOOM_SAMPLES]
         mid_data = self.model.data[data_range[0]:data_range[1]]
+        self.zoom_ax.plot(np.arange(data_range[0], data_range[0] + len(mid_data)), mid_data, '-')
+        #self.zoom_ax.hold(True)
         min_data = min(mid_data) - 200
         max_data = max(mid_data) + 200
         self.zoom_ax.set_xlim(*data_range)
@@ -381,6 +405,7 @@ class SyncPulseExtractionModel(object):
         self._elec1_num = None
         self._elec2_num = None
         self._reader = None
+        self.envelope = None
         self.data_root = self.DEFAULT_DATA_ROOT
 
     @property
@@ -462,6 +487,7 @@ class SyncPulseExtractionModel(object):
     def clear_data(self):
         self.eeg_file = None
         self._data = None
+        self.envelope = None
         self.selected_x_peaks = None
 
     def load_eeg_file(self):
@@ -478,13 +504,19 @@ class SyncPulseExtractionModel(object):
             self._labels = self._reader.labels
 
     def load_data(self):
-        data_1 = 0
-        data_2 = 0
+        data_1 = None
+        data_2 = None
         if self.elec1:
-            data_1 = self._reader.channel_data(self._elec1_num)
+            data_1 = np.ravel(self._reader.channel_data(self._elec1_num))
         if self.elec2:
-            data_2 = self._reader.channel_data(self._elec2_num)
-        self._data = data_1 - data_2
+            data_2 = np.ravel(self._reader.channel_data(self._elec2_num))
+        if data_1 is None and data_2 is None:
+            self._data = None
+            self.envelope = None
+            return
+        # The difference is only computed where it is viewed
+        self._data = ChannelDifference(data_1, data_2)
+        self.envelope = MinMaxPyramid(self._data)
 
     @property
     def data_loaded(self):
@@ -513,39 +545,7 @@ class SyncPulseExtractionModel(object):
 
     @staticmethod
     def find_peaks_in_selection(data, y1, y2):
-        min_y = min(y1, y2)
-        max_y = max(y1, y2)
-        if (data < min_y).any() and (data > max_y).any():
-            raise PeakFindingError()
-
-        if (data < min_y).any():
-            in_border = min_y
-            sign = +1
-        else:
-            in_border = max_y
-            sign = -1
-
-        crossings = np.diff(((sign * data) > (sign * in_border)).astype(int))
-
-        up_crossings = np.where(crossings == 1)[0]
-        dn_crossings = np.where(crossings == -1)[0] + 1
-
-        peaks = []
-
-        for up in up_crossings:
-            following_downs = dn_crossings[np.where(dn_crossings >= up)[0]]
-            if len(following_downs) > 0:
-                down = following_downs[0]
-                if down == up:
-                    peaks.append((up, data[up]))
-                else:
-                    max_ind = np.argmax(sign * (data[up:down])) + up
-                    peaks.append((max_ind, data[max_ind]))
-
-        if peaks:
-            return list(zip(*peaks))
-        else:
-            return [], []
+        return find_peaks_in_selection(data, y1, y2)
 
 
 if __name__ == '__main__':
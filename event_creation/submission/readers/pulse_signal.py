@@ -0,0 +1,214 @@
+"""
+Signal handling for the sync pulse extraction GUIs (pulse_extraction and pulse_extraction_2), kept free of Qt and
+matplotlib so that it can be used and tested on its own.
+
+Clinical recordings run to hundreds of millions of samples per channel, so the channels are memory-mapped rather than
+read, the bipolar difference and gain are only computed for the samples that are actually looked at, and the full
+view is drawn from a pyramid of min/max envelopes instead of from every sample.
+"""
+import os
+
+import numpy as np
+
+from ..exc import PeakFindingError
+
+
+def read_params(params_file):
+    """
+    :param params_file: <basename>.params.txt written next to split channel files
+    :return: dict of the parameters in the file
+    """
+    with open(params_file, 'r') as f:
+        return dict(line.split() for line in f if line.strip())
+
+
+def memmap_channel(filename, data_format):
+    """
+    :return: read-only memory-map of a split channel file
+    """
+    if os.path.getsize(filename) == 0:  # Empty files can't be mapped
+        return np.zeros(0, dtype=data_format)
+    return np.memmap(filename, dtype=data_format, mode='r')
+
+
+class ChannelDifference(object):
+    """
+    (channel_1 - channel_2) * gain, computed on demand for whichever samples are indexed. Slicing returns a float
+    array of the requested window; the full-length difference is never materialized.
+    """
+
+    def __init__(self, channel_1=None, channel_2=None, gain=1.):
+        """
+        :param channel_1: array-like (typically a memmap) of samples, or None
+        :param channel_2: array-like of samples subtracted from channel_1, or None
+        :param gain: factor applied to the difference
+        """
+        if channel_1 is None and channel_2 is None:
+            raise ValueError('At least one channel is required')
+        self.channel_1 = channel_1
+        self.channel_2 = channel_2
+        self.gain = float(gain)
+        lengths = [len(channel) for channel in (channel_1, channel_2) if channel is not None]
+        # Channels of a single recording should have the same length. If not, only the common part is shown
+        self.n_samples = min(lengths)
+
+    @classmethod
+    def from_files(cls, eeg_file_1=None, eeg_file_2=None):
+        """
+        :param eeg_file_1: split channel file, or None
+        :param eeg_file_2: split channel file to subtract, or None
+        :return: ChannelDifference of the memory-mapped files, with the gain from their params.txt
+        """
+        params_file = os.path.splitext(eeg_file_1 or eeg_file_2)[0] + '.params.txt'
+        params = read_params(params_file)
+        data_format = params['dataformat'].strip('\'"')
+        channel_1, channel_2 = [memmap_channel(eeg_file, data_format) if eeg_file else None
+                                for eeg_file in (eeg_file_1, eeg_file_2)]
+        return cls(channel_1, channel_2, params['gain'])
+
+    def __len__(self):
+        return self.n_samples
+
+    @property
+    def shape(self):
+        return (self.n_samples,)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            item = slice(*item.indices(self.n_samples))
+        elif not np.isscalar(item):
+            item = np.asarray(item)
+        # Differences are taken in floating point, so that integer samples can't overflow
+        window = 0.
+        if self.channel_1 is not None:
+            window = np.asarray(self.channel_1[item], dtype=np.float64)
+        if self.channel_2 is not None:
+            window = window - np.asarray(self.channel_2[item], dtype=np.float64)
+        return window * self.gain
+
+    def __array__(self, dtype=None):
+        data = self[:]
+        return data if dtype is None else data.astype(dtype)
+
+
+class MinMaxPyramid(object):
+    """
+    Level-of-detail envelopes of a long signal. Level 0 holds the minimum and maximum of every BIN_SAMPLES samples,
+    and each further level merges LEVEL_FACTOR bins of the one below it. Any range of the signal can then be drawn
+    with a bounded number of points that still shows every excursion (i.e. every sync pulse).
+    """
+
+    BIN_SAMPLES = 64
+    LEVEL_FACTOR = 4
+
+    # Samples read at a time while building level 0. Must be a multiple of BIN_SAMPLES
+    BLOCK_SAMPLES = 2 ** 22
+
+    def __init__(self, data):
+        """
+        :param data: signal supporting len() and slicing, e.g. a ChannelDifference
+        """
+        self.n_samples = len(data)
+        mins = []
+        maxs = []
+        for start in range(0, self.n_samples, self.BLOCK_SAMPLES):
+            block = np.asarray(data[start:start + self.BLOCK_SAMPLES])
+            bin_starts = np.arange(0, len(block), self.BIN_SAMPLES)
+            mins.append(np.minimum.reduceat(block, bin_starts))
+            maxs.append(np.maximum.reduceat(block, bin_starts))
+        mins = np.concatenate(mins) if mins else np.zeros(0)
+        maxs = np.concatenate(maxs) if maxs else np.zeros(0)
+
+        # (samples per bin, mins, maxs), finest first
+        self.levels = [(self.BIN_SAMPLES, mins, maxs)]
+        while len(mins) > 1:
+            bin_starts = np.arange(0, len(mins), self.LEVEL_FACTOR)
+            mins = np.minimum.reduceat(mins, bin_starts)
+            maxs = np.maximum.reduceat(maxs, bin_starts)
+            self.levels.append((self.levels[-1][0] * self.LEVEL_FACTOR, mins, maxs))
+
+    def level_for(self, start, stop, max_points):
+        """
+        :return: the finest level that covers [start, stop) in no more than max_points points
+        """
+        for level in self.levels:
+            bin_samples = level[0]
+            if 2 * (-(-stop // bin_samples) - start // bin_samples) <= max_points:
+                return level
+        return self.levels[-1]
+
+    def envelope(self, start, stop, max_points):
+        """
+        :param start: first sample of the range
+        :param stop: end (exclusive) of the range
+        :param max_points: maximum number of points to return
+        :return: x, y of a line tracing the min and max of each bin in [start, stop), or None if the range is short
+                 enough that the samples themselves should be drawn
+        """
+        start = max(int(start), 0)
+        stop = min(int(np.ceil(stop)), self.n_samples)
+        if stop - start <= max_points:
+            return None
+        bin_samples, mins, maxs = self.level_for(start, stop, max_points)
+        first = start // bin_samples
+        last = -(-stop // bin_samples)
+        x = np.repeat(np.arange(first, last) * bin_samples + bin_samples // 2, 2)
+        y = np.column_stack([mins[first:last], maxs[first:last]]).ravel()
+        return x, y
+
+
+def find_peaks_in_selection(data, y1, y2):
+    """
+    Finds the pulses in a selected window of the signal. Pulses are the excursions past whichever of y1 and y2 the
+    signal crosses; each pulse is located at its extreme point.
+    :param data: samples in the selected window
+    :param y1: y-coordinate of one edge of the selection
+    :param y2: y-coordinate of the other edge of the selection
+    :return: (x indices into data, y values) of the peaks
+    :raises PeakFindingError: if the signal leaves the selection on both sides
+    """
+    data = np.asarray(data)
+    min_y = min(y1, y2)
+    max_y = max(y1, y2)
+    if (data < min_y).any() and (data > max_y).any():
+        raise PeakFindingError()
+
+    if (data < min_y).any():
+        in_border = min_y
+        sign = +1
+    else:
+        in_border = max_y
+        sign = -1
+
+    signed = sign * data
+    crossings = np.diff((signed > (sign * in_border)).astype(int))
+
+    up_crossings = np.where(crossings == 1)[0]
+    dn_crossings = np.where(crossings == -1)[0] + 1
+
+    # Each up-crossing is paired with the first down-crossing at or after it
+    following = np.searchsorted(dn_crossings, up_crossings, side='left')
+    paired = following < len(dn_crossings)
+    ups = up_crossings[paired]
+    downs = dn_crossings[following[paired]]
+
+    peaks = ups.copy()
+    wide = downs > ups
+    if wide.any():
+        starts = ups[wide]
+        lengths = downs[wide] - starts
+        # Indices of every sample in every [up, down) segment, concatenated, and the segment each belongs to
+        offsets = np.cumsum(lengths) - lengths
+        segment = np.repeat(np.arange(len(starts)), lengths)
+        positions = np.arange(lengths.sum()) - np.repeat(offsets, lengths) + np.repeat(starts, lengths)
+        values = signed[positions]
+        segment_max = np.maximum.reduceat(values, offsets)
+        # The first sample of each segment that reaches its maximum, as np.argmax would pick
+        hits = np.flatnonzero(values == segment_max[segment])
+        _, first_hits = np.unique(segment[hits], return_index=True)
+        peaks[wide] = positions[hits[first_hits]]
+
+    if len(peaks) > 0:
+        return list(peaks), list(data[peaks])
+    else:
+        return [], []
@@ -0,0 +1,104 @@
+"""
+Wordpools of the free recall tasks, loaded once per process.
+
+Parsers look up the position of every presented word in the session's wordpool (to set item_num). A Wordpool keeps a
+dict of word -> position, so that each lookup is a hash rather than a scan of the pool, and load_wordpool shares one
+Wordpool between all the sessions that use the same file, as long as the file is unchanged.
+
+Words that aren't found as given are looked up again with their accents removed (on both sides), so that a session
+logged with accented words matches a no-accent wordpool and vice versa.
+"""
+import unicodedata
+
+from .. import fileutil
+
+
+def normalize_word(word):
+    """
+    :return: word with accents removed (e.g. 'CAFÉ' -> 'CAFE')
+    """
+    decomposed = unicodedata.normalize('NFKD', word)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+class Wordpool(object):
+    """
+    Ordered list of words, with hashed lookup of their positions
+    """
+
+    def __init__(self, words):
+        """
+        :param words: words of the pool, in order
+        """
+        self.words = list(words)
+        self._positions = {}
+        self._normalized_positions = {}
+        # The first occurrence of a word wins, as it would when searching the list
+        for position, word in enumerate(self.words):
+            self._positions.setdefault(word, position)
+            self._normalized_positions.setdefault(normalize_word(word), position)
+
+    @classmethod
+    def from_file(cls, filename, encoding=None, column=None):
+        """
+        :param filename: text file with one word per line
+        :param encoding: encoding of the file (defaults to the locale's)
+        :param column: if given, lines are split on whitespace and only this column is used (e.g. for wordpools
+                       listing "<category> <word>")
+        :return: Wordpool of the lines of the file, without surrounding whitespace. Blank lines are kept (so that
+                 they count towards the positions of the words after them) unless a column is given
+        """
+        with open(filename, encoding=encoding) as f:
+            lines = [line.strip() for line in f]
+        if column is not None:
+            lines = [line.split()[column] for line in lines if line]
+        return cls(lines)
+
+    def position(self, word):
+        """
+        :return: 0-based position of the word in the pool, or None if it isn't there
+        """
+        position = self._positions.get(word)
+        if position is None:
+            position = self._normalized_positions.get(normalize_word(word))
+        return position
+
+    def index(self, word):
+        """
+        :return: 0-based position of the word in the pool
+        :raises ValueError: if the word isn't in the pool, as list.index does
+        """
+        position = self.position(word)
+        if position is None:
+            raise ValueError('{} is not in the wordpool'.format(word))
+        return position
+
+    def item_num(self, word):
+        """
+        :return: item number of the word (its 1-based position in the pool), or -1 if it isn't there
+        """
+        position = self.position(word)
+        return -1 if position is None else position + 1
+
+    def __contains__(self, word):
+        return self.position(word) is not None
+
+    def __len__(self):
+        return len(self.words)
+
+    def __iter__(self):
+        return iter(self.words)
+
+
+LOADED_WORDPOOLS = fileutil.FileCache(Wordpool.from_file, max_entries=16)
+
+
+def load_wordpool(filename, encoding=None, column=None):
+    """
+    Loads a wordpool, shared with earlier callers through LOADED_WORDPOOLS
+    :param filename: text file with one word per line
+    :param encoding: encoding of the file (defaults to the locale's)
+    :param column: column of each line to use, if lines have more than one (see Wordpool.from_file)
+    :return: Wordpool
+    """
+    return LOADED_WORDPOOLS.get(filename, encoding, column)
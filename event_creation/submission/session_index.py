@@ -0,0 +1,179 @@
+"""
+A flat, columnar view of a protocol index (protocols/<protocol>.json, as written by IndexAggregatorTask).
+
+The nested index ({'protocols': {'r1': {'subjects': {'R1001P': {'experiments': {'FR1': {'sessions': {'0': {...}}}}}}}}})
+is walked once and turned into one row per record. Each row has a column for every level of nesting above it
+(protocol, subject, experiment, session, localization, localization_montage) and its own fields. Rows are found
+through hashed lookups on the values of their columns, so that enumerating sessions does not re-walk and copy the
+nested dict the way repeated JsonIndexReader.filtered calls do.
+"""
+import json
+from collections import defaultdict, OrderedDict
+
+from .exc import IndexValueError
+from . import fileutil
+
+# Plural keys in the nested index, and the column that their children's keys are stored in
+LEVELS = {
+    'protocols': 'protocol',
+    'subjects': 'subject',
+    'experiments': 'experiment',
+    'sessions': 'session',
+    'localizations': 'localization',
+    'montages': 'montage',
+}
+
+# Montages under a localization are keyed by their number within it ('1'), not by '<localization>.<montage>' like the
+# montage of a session, so they get a column of their own
+LOCALIZATION_LEVELS = dict(LEVELS, montages='localization_montage')
+
+
+def _normalize(column, value):
+    """ Sessions are stored as ints; keys read from JSON are strings """
+    if column == 'session':
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return value
+    return value
+
+
+def _sort_key(value):
+    """ Numbers in numerical order, before anything else in string order """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return 0, value, ''
+    return 1, 0, str(value)
+
+
+class SessionIndex(object):
+
+    def __init__(self, index):
+        """
+        :param index: nested protocol index, as loaded from protocols/<protocol>.json
+        """
+        self.columns = defaultdict(dict)  # column -> {row: value}
+        self.n_rows = 0
+        self._lookups = {}
+        self._add_records(index, {})
+
+    @classmethod
+    def from_file(cls, index_file):
+        with open(index_file) as f:
+            return cls(json.load(f))
+
+    def _add_records(self, node, path):
+        fields = {}
+        levels = LOCALIZATION_LEVELS if 'localization' in path else LEVELS
+        for key, value in node.items():
+            if key in levels and isinstance(value, dict):
+                column = levels[key]
+                for child_key, child in value.items():
+                    child_path = dict(path)
+                    child_path[column] = _normalize(column, child_key)
+                    self._add_records(child, child_path)
+            else:
+                fields[key] = value
+        if fields:
+            row = self.n_rows
+            self.n_rows += 1
+            # Columns from the nesting take precedence over fields of the same name
+            fields.update(path)
+            for column, value in fields.items():
+                self.columns[column][row] = _normalize(column, value)
+
+    def __len__(self):
+        return self.n_rows
+
+    def _lookup(self, column):
+        """
+        :return: {value: [rows]} for a column, built on first use
+        """
+        if column not in self._lookups:
+            lookup = defaultdict(list)
+            for row, value in self.columns.get(column, {}).items():
+                try:
+                    lookup[value].append(row)
+                except TypeError:  # Unhashable field values can't be looked up
+                    pass
+            self._lookups[column] = lookup
+        return self._lookups[column]
+
+    def rows(self, **kwargs):
+        """
+        :param kwargs: column=value conditions that all have to match
+        :return: sorted list of matching rows
+        """
+        if not kwargs:
+            return list(range(self.n_rows))
+        matches = sorted((self._lookup(column).get(_normalize(column, value), []) for column, value in kwargs.items()),
+                         key=len)
+        rows = set(matches[0])
+        for match in matches[1:]:
+            rows.intersection_update(match)
+        return sorted(rows)
+
+    def row(self, row):
+        """
+        :return: dict of all of the columns of a row
+        """
+        return {column: values[row] for column, values in self.columns.items() if row in values}
+
+    def records(self, **kwargs):
+        """
+        :return: list of dicts of the rows matching kwargs
+        """
+        return [self.row(row) for row in self.rows(**kwargs)]
+
+    def values(self, column, **kwargs):
+        """
+        :return: sorted unique values of a column among the rows matching kwargs
+        """
+        values = self.columns.get(column, {})
+        return sorted(set(values[row] for row in self.rows(**kwargs) if row in values), key=_sort_key)
+
+    def group_by(self, *columns, **kwargs):
+        """
+        :param columns: columns to group by
+        :param kwargs: column=value conditions that rows have to match
+        :return: OrderedDict of {tuple of column values: [rows]}, sorted by key. Rows without every column are left out
+        """
+        groups = defaultdict(list)
+        values = [self.columns.get(column, {}) for column in columns]
+        for row in self.rows(**kwargs):
+            if all(row in column_values for column_values in values):
+                groups[tuple(column_values[row] for column_values in values)].append(row)
+        return OrderedDict(sorted(groups.items(), key=lambda item: [_sort_key(v) for v in item[0]]))
+
+    def get_value(self, column, **kwargs):
+        """
+        :return: the single value of a column among the rows matching kwargs
+        :raises IndexValueError: if there is not exactly one value
+        """
+        values = self.values(column, **kwargs)
+        if len(values) != 1:
+            raise IndexValueError('{} values of {} for {}'.format(len(values), column, kwargs))
+        return values[0]
+
+    def subjects(self, **kwargs):
+        return self.values('subject', **kwargs)
+
+    def experiments(self, **kwargs):
+        return self.values('experiment', **kwargs)
+
+    def sessions(self, **kwargs):
+        return self.values('session', **kwargs)
+
+    def montages(self, **kwargs):
+        return self.values('montage', **kwargs)
+
+
+LOADED_INDEXES = fileutil.FileCache(SessionIndex.from_file, max_entries=8)
+
+
+def load_session_index(index_file):
+    """
+    Loads a protocol index, held in LOADED_INDEXES so that each session does not parse it again
+    :param index_file: path to protocols/<protocol>.json
+    :return: SessionIndex
+    """
+    return LOADED_INDEXES.get(index_file)
@@ -0,0 +1,130 @@
+"""
+Resource usage of the steps of a TransferPipeline.
+
+Each step (the transfer itself, then every PipelineTask) is run inside a TaskStats, which records its wall time, CPU
+time, peak resident memory and bytes read and written. The pipeline saves them in the 'task_stats' entry of the info
+in the session's index.json, in the order in which the steps ran.
+"""
+import os
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROC_STATUS = '/proc/self/status'
+PROC_IO = '/proc/self/io'
+PROC_CLEAR_REFS = '/proc/self/clear_refs'
+
+
+def _read_proc_fields(filename):
+    """
+    :return: dict of the "key: value" lines of a /proc file, or an empty dict if it can't be read
+    """
+    try:
+        with open(filename) as f:
+            return dict(line.split(':', 1) for line in f if ':' in line)
+    except (IOError, OSError):
+        return {}
+
+
+def _reset_peak_rss():
+    """
+    Resets the peak resident set size of this process to its current size, so that the peak reported afterwards
+    belongs to the task being measured
+    :return: whether the peak could be reset (Linux only)
+    """
+    try:
+        with open(PROC_CLEAR_REFS, 'w') as f:
+            f.write('5')
+        return True
+    except (IOError, OSError):
+        return False
+
+
+def _peak_rss():
+    """
+    :return: peak resident set size of this process in bytes, or None if unknown
+    """
+    status = _read_proc_fields(PROC_STATUS)
+    if 'VmHWM' in status:
+        return int(status['VmHWM'].split()[0]) * 1024
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if os.uname()[0] == 'Darwin' else max_rss * 1024
+    return None
+
+
+def _io_counters():
+    """
+    :return: (bytes read, bytes written) by this process so far, through any file descriptor, or (None, None)
+    """
+    io = _read_proc_fields(PROC_IO)
+    if 'rchar' in io and 'wchar' in io:
+        return int(io['rchar']), int(io['wchar'])
+    return None, None
+
+
+def _cpu_times():
+    """
+    :return: (CPU seconds of this process, CPU seconds of its finished child processes)
+    """
+    times = os.times()
+    return times[0] + times[1], times[2] + times[3]
+
+
+class TaskStats(object):
+    """
+    Context manager measuring the resources used by the code it wraps:
+
+    wall_time: seconds elapsed
+    cpu_time: user + system CPU seconds of this process (all threads)
+    children_cpu_time: user + system CPU seconds of child processes (e.g. process pools) that finished in the meantime
+    peak_rss: peak resident memory of this process in bytes. Only specific to the task where the peak can be reset
+              (peak_rss_reset is True); otherwise it is the peak so far
+    read_bytes, written_bytes: bytes read and written by this process (not its children), including cached I/O
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.failed = False
+        self.stats = {}
+        self._start = None
+
+    def __enter__(self):
+        self._reset = _reset_peak_rss()
+        self._start = (time.time(), _cpu_times(), _io_counters())
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        end_time, (cpu, children_cpu), (read, written) = time.time(), _cpu_times(), _io_counters()
+        start_time, (start_cpu, start_children_cpu), (start_read, start_written) = self._start
+        self.failed = exc_type is not None
+        self.stats = {
+            'wall_time': end_time - start_time,
+            'cpu_time': cpu - start_cpu,
+            'children_cpu_time': children_cpu - start_children_cpu,
+            'peak_rss': _peak_rss(),
+            'peak_rss_reset': self._reset,
+            'read_bytes': read - start_read if read is not None else None,
+            'written_bytes': written - start_written if written is not None else None,
+        }
+        return False
+
+    def to_dict(self):
+        info = {'name': self.name, 'failed': self.failed}
+        info.update(self.stats)
+        return info
+
+    def __str__(self):
+        stats = self.stats
+        summary = '{}: {:.2f} s wall, {:.2f} s CPU'.format(self.name, stats['wall_time'],
+                                                           stats['cpu_time'] + stats['children_cpu_time'])
+        if stats['peak_rss'] is not None:
+            summary += ', {:.1f} MB peak RSS'.format(stats['peak_rss'] / 2. ** 20)
+        if stats['read_bytes'] is not None:
+            summary += ', {:.1f} MB read, {:.1f} MB written'.format(stats['read_bytes'] / 2. ** 20,
+                                                                    stats['written_bytes'] / 2. ** 20)
+        return summary
@@ -8,6 +8,7 @@ from . import fileutil
 from .log import logger
 from .configuration import paths
 from .exc import ProcessingError
+from .viewers.recarray import to_json, to_npz
 
 try:
     from ptsa.data.readers import BaseEventReader
@@ -39,6 +40,21 @@ class PipelineTask(object):
         if index_file:
             self.pipeline.register_output(filename, label)
 
+    def create_events_files(self, filename, events, label, index_file=True):
+        """
+        Writes events to a JSON file, and to a columnar binary file (see viewers.recarray.to_npz) next to it
+        :param filename: name of the JSON file. The binary file has the same name, with a .npz extension
+        :param events: recarray of events
+        :param label: label of the JSON file in the index. The binary file is labelled <label>_npz
+        :param index_file: whether to register the files in the index
+        """
+        self.create_file(filename, to_json(events), label, index_file)
+        npz_filename = os.path.splitext(filename)[0] + '.npz'
+        with fileutil.open_with_perms(os.path.join(self.destination, npz_filename), 'wb') as f:
+            to_npz(events, f)
+        if index_file:
+            self.pipeline.register_output(npz_filename, '{}_npz'.format(label))
+
     def run(self, files, db_folder):
         self.destination = db_folder
         try:
@@ -115,6 +115,8 @@ class TransferFile(object):
 
     OPTIONAL_PROPERTIES = { 'files': [] }
 
+    CHECKSUM_BLOCK_SIZE = 2 ** 20
+
 
     def __init__(self, **kwargs):
 
@@ -144,8 +146,10 @@ class TransferFile(object):
 
         self._checksum = hashlib.md5()
         self._checksum_calculated = False
+        self._file_checksums = {}
 
         self._transferred_files = []
+        self._transfer_records = {}
 
     @property
     def located(self):
@@ -205,7 +209,13 @@ class TransferFile(object):
 
         return os.path.join(root, destination_directory_name)
 
-    def transfer(self, root):
+    def transfer(self, root, copy_jobs=None):
+        """
+        Transfers the located files into root
+        :param root: directory to transfer into
+        :param copy_jobs: If provided, files are not copied. Instead, (transfer file, origin, destination) is
+                          appended to this list for each, to be copied by the caller
+        """
         if self.name=='output_log':
             pass
 
@@ -219,7 +229,7 @@ class TransferFile(object):
 
         if self.type == 'directory':
             for file in list(self.files.values()):
-                file.transfer(containing_dir)
+                file.transfer(containing_dir, copy_jobs)
             return
 
         for origin, destination_dir in zip(self.origin_paths, self.destination_directories):
@@ -232,9 +242,12 @@ class TransferFile(object):
             if self.type == 'file':
                 if not os.path.exists(os.path.dirname(destination_path)):
                     os.makedirs(os.path.dirname(destination_path))
-                logger.debug("Copying file {} to {}".format(origin, destination_path))
-                shutil.copyfile(origin, destination_path)
-                logger.debug("File {} copied successfully".format(origin))
+                if copy_jobs is not None:
+                    copy_jobs.append((self, origin, destination_path))
+                else:
+                    logger.debug("Copying file {} to {}".format(origin, destination_path))
+                    shutil.copyfile(origin, destination_path)
+                    logger.debug("File {} copied successfully".format(origin))
                 self._transferred_files.append(destination_path)
 
             elif self.type == 'link':
@@ -253,33 +266,56 @@ class TransferFile(object):
             self.calculate_checksum()
         return self._checksum
 
-    def contents_to_check(self):
-        contents = []
-        if self.located:
-            if not self._checksum_contents:
-                for filename in self.origin_paths:
-                    contents.append(os.path.basename(filename))
+    def update_checksum(self, checksum):
+        """
+        Adds the names or contents of the located files (and those of sub-files) to a checksum.
+        Contents are streamed in blocks, and the checksum of each file is kept for use when transferring
+        :param checksum: hashlib checksum to update
+        """
+        if not self.located:
+            return
+        for filename in self.origin_paths:
+            # JPazdera: Added the .mff condition to prevent .mff EEG packages from being opened as files
+            if not self._checksum_contents or filename.endswith('.mff'):
+                checksum.update(os.path.basename(filename).encode('utf-8'))
             else:
-                for filename in self.origin_paths:
-                    # JPazdera: Added this condition to prevent .mff EEG packages from being opened as files
-                    if filename.endswith('.mff'):
-                        contents.append(os.path.basename(filename))
-                    else:
-                        with open(filename, 'rb') as f:
-                            contents.append(f.read())
+                file_checksum = hashlib.md5()
+                with open(filename, 'rb') as f:
+                    for block in iter(lambda: f.read(self.CHECKSUM_BLOCK_SIZE), b''):
+                        checksum.update(block)
+                        file_checksum.update(block)
+                self._file_checksums[filename] = file_checksum.hexdigest()
 
-            for file in list(self.files.values()):
-                contents.extend(file.contents_to_check())
-
-        return contents
+        for file in list(self.files.values()):
+            file.update_checksum(checksum)
 
     def calculate_checksum(self):
-        for element in self.contents_to_check():
-            if isinstance(element, str):
-                element = element.encode('utf-8')
-            self._checksum.update(element)
+        self.update_checksum(self._checksum)
         self._checksum_calculated = True
 
+    def file_checksum(self, origin_path):
+        """
+        :param origin_path: one of the origin paths of this file
+        :return: md5 of the contents of the file
+        """
+        if origin_path not in self._file_checksums:
+            self._file_checksums[origin_path] = fileutil.md5sum(origin_path)
+        return self._file_checksums[origin_path]
+
+    def record_transfer(self, destination, md5, linked_from=None, link_type=None):
+        """
+        Records how a file was transferred, to be stored in the transferred index
+        :param destination: path of the transferred file, relative to the transfer directory
+        :param md5: md5 of its contents
+        :param linked_from: file of a previous transfer that was linked instead of copying, relative to the
+                            transfer root
+        :param link_type: 'reflink'
+        """
+        record = dict(md5=md5)
+        if linked_from:
+            record.update(linked_from=linked_from, link_type=link_type)
+        self._transfer_records[destination] = record
+
     def format(self, **kwargs):
         new_kwargs  = dict(**kwargs)
 
@@ -394,14 +430,33 @@ class TransferFile(object):
             self.name: dict(
                 origin_files=[os.path.relpath(origin_path, paths.rhino_root) for origin_path in self.origin_paths],
                 md5=self.checksum.hexdigest(),
+                fingerprint=self.fingerprint(),
             )
         }
+        if self._transfer_records:
+            index[self.name]['transferred_files'] = self._transfer_records
 
         for file in list(self.files.values()):
             index.update(file.transferred_index())
 
         return index
 
+    def fingerprint(self):
+        """
+        Sizes and modification times of the origin files, and modification times of the directories containing them
+        (which change when files are added or removed), for a cheap check of whether the origin has changed.
+        Paths are relative to the rhino root, as in origin_files
+        :return: dict(files={path: [size, mtime_ns]}, directories={path: mtime_ns})
+        """
+        files = {}
+        directories = {}
+        for origin_path in self.origin_paths:
+            stat = os.stat(origin_path)
+            files[os.path.relpath(origin_path, paths.rhino_root)] = [stat.st_size, stat.st_mtime_ns]
+            directory = os.path.dirname(os.path.abspath(origin_path))
+            directories[os.path.relpath(directory, paths.rhino_root)] = os.stat(directory).st_mtime_ns
+        return dict(files=files, directories=directories)
+
     def transferred_filenames(self, force_multiple=False):
         files = self._transferred_files
         multiple = self.multiple or force_multiple
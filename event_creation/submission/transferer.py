@@ -3,6 +3,7 @@ import glob
 import json
 import os
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 
 import yaml
 
@@ -30,6 +31,10 @@ class Transferer(object):
 
     JSON_FILES = {}
 
+    TRANSFER_WORKERS = 8  # Number of files copied at once
+
+    PROCESSED_NAME = 'current_processed'
+
     def __init__(self, config_filename, groups, destination, **kwargs):
         self.groups = groups
         self.destination_root = os.path.abspath(destination)
@@ -108,6 +113,46 @@ class Transferer(object):
             logger.info('No type file found')
             return None
 
+    @classmethod
+    def source_fingerprints_match(cls, destination_root):
+        """
+        Checks whether the origin of the current transfer into destination_root looks unchanged, by comparing the
+        fingerprints stored in its index (see TransferFile.fingerprint) against the files on disk. Nothing is located
+        or read, so this is much cheaper than building a pipeline and checking its checksums, but it cannot see
+        files that would now be found in directories that did not contribute to the previous transfer.
+        :param destination_root: directory containing the current_source link
+        :return: (whether the origin looks unchanged, reason)
+        """
+        if not os.path.exists(os.path.join(destination_root, cls.PROCESSED_NAME)):
+            return False, 'not processed'
+        index_filename = os.path.join(destination_root, cls.CURRENT_NAME, cls.INDEX_NAME)
+        try:
+            with open(index_filename) as index_file:
+                index = json.load(index_file)
+        except (IOError, OSError, ValueError):
+            return False, 'no transferred index'
+        if not index:
+            return False, 'no transferred index'
+
+        for entry in index.values():
+            fingerprint = entry.get('fingerprint')
+            if fingerprint is None:
+                return False, 'no fingerprint'
+            for path, (size, mtime) in fingerprint['files'].items():
+                try:
+                    stat = os.stat(os.path.join(paths.rhino_root, path))
+                except OSError:
+                    return False, 'source removed'
+                if stat.st_size != size or stat.st_mtime_ns != mtime:
+                    return False, 'source modified'
+            for path, mtime in fingerprint['directories'].items():
+                try:
+                    if os.stat(os.path.join(paths.rhino_root, path)).st_mtime_ns != mtime:
+                        return False, 'source directory modified'
+                except OSError:
+                    return False, 'source removed'
+        return True, 'unchanged'
+
     def matches_existing_checksum(self):
         old_index = self.load_previous_index()
         self.transfer_config.locate_origin_files()
@@ -134,10 +179,13 @@ class Transferer(object):
             self.transfer_aborted = True
             raise TransferError("No files to transfer")
 
+        # Directories are created up front; the files themselves are then copied (or linked) concurrently
+        copy_jobs = []
         for file in self.transfer_config.located_files():
-            file.transfer(self.destination_labelled)
+            file.transfer(self.destination_labelled, copy_jobs)
             self.transferred_files.append(file)
             self.transferred_filenames.update(file.transferred_filenames())
+        self._copy_files(copy_jobs)
 
         if os.path.islink(self.destination_current):
             self.old_symlink = os.path.relpath(os.path.realpath(self.destination_current), self.destination_root)
@@ -150,6 +198,49 @@ class Transferer(object):
 
         return self.transferred_filenames
 
+    def previous_file_checksums(self):
+        """
+        :return: {path relative to the transfer directory: md5} of the files in the current transfer
+        """
+        checksums = {}
+        for entry in self.load_previous_index().values():
+            for destination, record in entry.get('transferred_files', {}).items():
+                checksums[destination] = record['md5']
+        return checksums
+
+    def _copy_files(self, copy_jobs):
+        """
+        Copies files into the labelled destination in parallel. Files whose contents match the same file in the
+        previous transfer are reflinked to it instead of being copied, where the filesystem supports it
+        :param copy_jobs: list of (transfer file, origin path, destination path)
+        """
+        previous_checksums = self.previous_file_checksums() if self.previous_label else {}
+
+        def copy_file(job):
+            file, origin, destination_path = job
+            destination = os.path.relpath(destination_path, self.destination_labelled)
+            previous_path = os.path.join(self.destination_root, self.previous_label or '', destination)
+            if destination in previous_checksums and os.path.isfile(previous_path) and \
+                    os.path.getsize(previous_path) == os.path.getsize(origin):
+                md5 = file.file_checksum(origin)
+                if md5 == previous_checksums[destination]:
+                    link_type = fileutil.clone_file(previous_path, destination_path)
+                    if link_type:
+                        logger.debug("Linked unchanged file {} to {} ({})".format(origin, destination_path, link_type))
+                        file.record_transfer(destination, md5, os.path.join(self.previous_label, destination),
+                                             link_type)
+                        return 0, 1
+            logger.debug("Copying file {} to {}".format(origin, destination_path))
+            file.record_transfer(destination, fileutil.copy_with_md5(origin, destination_path))
+            return 1, 0
+
+        if not copy_jobs:
+            return
+        with ThreadPoolExecutor(min(self.TRANSFER_WORKERS, len(copy_jobs))) as executor:
+            counts = list(executor.map(copy_file, copy_jobs))
+        logger.info("Copied {} files, linked {} unchanged files from {}".format(
+            sum(copied for copied, _ in counts), sum(linked for _, linked in counts), self.previous_label))
+
     def transfer_with_rollback(self):
         try:
             return self._transfer_files()
@@ -333,6 +424,15 @@ def generate_create_montage_transferer(subject,montage,protocol,code=None,groups
 
 
 
+def session_destination(protocol, subject, experiment, session):
+    return os.path.join(paths.db_root,
+                        'protocols', protocol,
+                        'subjects', subject,
+                        'experiments', experiment,
+                        'sessions', str(session),
+                        'behavioral')
+
+
 def generate_session_transferer(subject, experiment, session, protocol='r1', groups=tuple(), code=None,
                                 original_session=None, new_experiment=None, **kwargs):
     cfg_file = TRANSFER_INPUTS['behavioral']
@@ -357,13 +457,7 @@ def generate_session_transferer(subject, experiment, session, protocol='r1', gro
     if not new_experiment:
         new_experiment = experiment
 
-    destination = os.path.join(paths.db_root,
-                               'protocols', protocol,
-                               'subjects', subject,
-                               'experiments', new_experiment,
-                               'sessions', str(session),
-                               'behavioral')
-
+    destination = session_destination(protocol, subject, new_experiment, session)
 
     transferer= Transferer(cfg_file, (experiment,) + groups, destination, new_experiment=new_experiment,**kwarg_inputs)
     return transferer
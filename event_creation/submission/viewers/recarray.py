@@ -1,4 +1,7 @@
+import ast
 import pprint
+import struct
+import zipfile
 import numpy as np
 import json
 import numpy
@@ -8,6 +11,10 @@ import re
 
 PPRINT_PADDING = 2
 
+# Binary events files: one .npy member per (flattened) field, plus the dtype to restore them into
+NPZ_DTYPE_KEY = '__dtype__'
+NPZ_FIELD_SEPARATOR = '.'
+
 
 def pprint_rec(arr, recurse=True):
     print((pformat_rec(arr, recurse)))
@@ -105,6 +112,122 @@ def to_json(arr, fp=None):
     else:
         return json.dumps(to_dict(arr), cls=MyEncoder, indent=2, sort_keys=True)
 
+def _npz_columns(arr, prefix=''):
+    """
+    Flattens a (possibly nested) recarray into columns
+    :param arr: recarray
+    :param prefix: prefix of the names of the columns
+    :return: generator of (name, column), where nested fields are named <field>.<subfield>. Columns of subarray fields
+             (e.g. stim_params) have the subarray's shape after the number of events
+    """
+    for name in arr.dtype.names:
+        column = arr[name]
+        if column.dtype.names:
+            for nested in _npz_columns(column, prefix + name + NPZ_FIELD_SEPARATOR):
+                yield nested
+        else:
+            yield prefix + name, column
+
+
+def _narrowest(column):
+    """
+    :return: string column at the width of its longest value; other columns unchanged
+    """
+    if column.dtype.kind not in 'US':
+        return column
+    width = max(int(np.char.str_len(column).max()), 1) if column.size else 1
+    return column.astype('{}{}'.format(column.dtype.kind, width))
+
+
+def to_npz(arr, fp):
+    """
+    Writes events to a columnar binary (.npz) file, which from_npz reads back into the same dtype.
+    As in to_json, events marked _remove are left out, as is the _remove field itself.
+    String columns are stored at the width of their longest value, and members are left uncompressed so that
+    npz_columns can memory-map them.
+    :param arr: recarray of events
+    :param fp: filename or file open for binary writing
+    """
+    if arr.ndim == 0 or not arr.dtype.names:
+        np.savez(fp, **{NPZ_DTYPE_KEY: repr(np.lib.format.dtype_to_descr(arr.dtype))})
+        return
+    names = [name for name in arr.dtype.names if name != '_remove']
+    if '_remove' in arr.dtype.names:
+        arr = arr[~arr['_remove'].astype(bool)]
+    dtype = np.dtype([(name, arr.dtype.fields[name][0]) for name in names])
+    columns = {name: _narrowest(column) for name, column in _npz_columns(arr[names])}
+    columns[NPZ_DTYPE_KEY] = repr(np.lib.format.dtype_to_descr(dtype))
+    np.savez(fp, **columns)
+
+
+def _mmap_npz_member(filename, zip_file, info):
+    """
+    :return: read-only memory map of an uncompressed .npy member of an .npz file
+    """
+    with open(filename, 'rb') as f:
+        # The member's data follows its local file header, whose name and extra field lengths are at bytes 26-30
+        f.seek(info.header_offset + 26)
+        name_length, extra_length = struct.unpack('<HH', f.read(4))
+        f.seek(info.header_offset + 30 + name_length + extra_length)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    if dtype.hasobject or 0 in shape:
+        return np.load(zip_file.open(info))
+    return np.memmap(filename, dtype=dtype, mode='r', offset=offset, shape=shape,
+                     order='F' if fortran_order else 'C')
+
+
+def npz_columns(filename, mmap=True):
+    """
+    Reads the columns of a file written by to_npz
+    :param filename: .npz file
+    :param mmap: whether to memory-map the columns, rather than read them into memory
+    :return: dict of column name -> array. Nested fields are named <field>.<subfield>
+    """
+    columns = {}
+    with zipfile.ZipFile(filename) as zip_file:
+        for info in zip_file.infolist():
+            name = info.filename[:-len('.npy')] if info.filename.endswith('.npy') else info.filename
+            if name == NPZ_DTYPE_KEY:
+                continue
+            if mmap and info.compress_type == zipfile.ZIP_STORED:
+                columns[name] = _mmap_npz_member(filename, zip_file, info)
+            else:
+                columns[name] = np.load(zip_file.open(info))
+    return columns
+
+
+def npz_dtype(filename):
+    """
+    :return: dtype of the events in a file written by to_npz
+    """
+    with np.load(filename) as npz:
+        descr = ast.literal_eval(str(npz[NPZ_DTYPE_KEY]))
+    return np.lib.format.descr_to_dtype(descr)
+
+
+def from_npz(filename):
+    """
+    Reads events written by to_npz
+    :param filename: .npz file
+    :return: recarray with the dtype of the events that were written
+    """
+    dtype = npz_dtype(filename)
+    columns = npz_columns(filename)
+    n_events = len(next(iter(columns.values()))) if columns else 0
+    arr = np.zeros(n_events, dtype)
+    for name, column in columns.items():
+        target = arr
+        for field in name.split(NPZ_FIELD_SEPARATOR):
+            target = target[field]
+        target[...] = column
+    return arr.view(np.recarray)
+
+
 def get_element_dtype(element):
     if isinstance(element, dict):
         return mkdtype(element)
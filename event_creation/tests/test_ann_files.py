@@ -0,0 +1,12 @@
+from ..submission.parsers.base_log_parser import BaseLogParser, read_ann_file
+
+
+def test_read_ann_file(tmpdir):
+    ann_file = str(tmpdir.join('0.ann'))
+    with open(ann_file, 'w') as f:
+        f.write('# Annotation file\n\n1234.5\t3\tDOG\n2000\t-1\t<>\n2500\t-1\tICE CREAM\n3000\t4\tlowercase\n')
+    rectimes, item_nums, words = read_ann_file(ann_file, BaseLogParser.MATCHING_ANN_REGEX)
+    assert list(rectimes) == [1234.5, 2000, 2500]
+    assert list(item_nums) == [3, -1, -1]
+    assert words == ['DOG', '<>', 'ICE CREAM']
+
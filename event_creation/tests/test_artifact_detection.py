@@ -0,0 +1,24 @@
+import numpy as np
+
+from ..submission.cleaning.artifact_detection import ArtifactDetector
+
+
+def test_eog_window_at_end_of_recording():
+    # 1.6 s at 2048 Hz is 3276.8 samples, so each window is round(3276.8) + 1 = 3278 samples long
+    sfreq = 2048.
+    n_times = 20000
+    eog = np.random.RandomState(0).randn(2, n_times)
+    events = np.recarray(4, dtype=[('type', 'U8'), ('eegfile', 'U32'), ('eegoffset', int), ('eogArtifact', int)])
+    events.type = 'WORD'
+    events.eegfile = 'session.bdf'
+    events.eegoffset = [0, 5000, n_times - 3278, n_times - 3277]
+    events.eogArtifact = -1
+
+    detector = ArtifactDetector(events, {}, '', 'ltpFR2')
+    detector.eegfile = 'session.bdf'
+    detector.leog_ind, detector.reog_ind = 0, 1
+    detector.detect_eog_artifacts(eog, sfreq)
+
+    # The last window fits exactly; the one after it would run one sample past the end of the recording
+    assert (events.eogArtifact[:3] >= 0).all()
+    assert events.eogArtifact[3] == -1
@@ -0,0 +1,30 @@
+import pytest
+
+from ..submission.session_index import SessionIndex
+from .test_session_index import INDEX
+
+# Needs the pipelines, and so everything that they import
+automation = pytest.importorskip('event_creation.submission.automation')
+
+
+def test_montage_importers(monkeypatch):
+    created = []
+
+    class RecordingImporter(object):
+        CONVERT_MONTAGE = automation.Importer.CONVERT_MONTAGE
+        errored = False
+
+        def __init__(self, kind, **kwargs):
+            created.append(kwargs)
+
+        def check(self):
+            return True
+
+    monkeypatch.setattr(automation, 'Importer', RecordingImporter)
+    automator = automation.Automator.__new__(automation.Automator)
+    automator.protocol = 'r1'
+    automator.index = SessionIndex(INDEX)
+    automator.importers = []
+    automator.add_existing_montage_importers()
+    assert [(kwargs['subject'], kwargs['montage'], kwargs['code']) for kwargs in created] == \
+        [('R1001P', '0.0', 'R1001P'), ('R1001P', '0.1', 'R1001P_1'), ('R1002P', '0.0', 'R1002P')]
@@ -0,0 +1,40 @@
+import numpy as np
+
+from ..submission.parsers import dtypes
+from ..submission.parsers.base_log_parser import EventCombiner
+from ..submission.viewers.recarray import from_dict, to_json
+
+
+def test_compact_round_trip():
+    dtype = ([(name, dtype) for name, _, dtype in dtypes.base_fields] +
+             [('stim_params', [(field[0], field[2]) for field in dtypes.stim_fields], (2,))])
+    events = np.zeros(4, dtype).view(np.recarray)
+    events.subject = 'R1001P'
+    events.type = ['SESS_START', 'WORD', 'STIM_ON', 'REC_WORD']
+    events.eegfile = 'R1001P_FR1_0_01Jan17_1200'
+    events.stim_params['anode_label'][2] = 'LA1'
+
+    compact = dtypes.compact(events)
+    assert compact.dtype.names == events.dtype.names
+    assert compact.dtype.itemsize < events.dtype.itemsize / 4
+    assert compact.dtype['eegfile'] == np.dtype('U25')
+    assert to_json(compact) == to_json(events)
+
+    widened = dtypes.widen(compact, events.dtype)
+    assert widened.dtype == events.dtype
+    assert (widened == events).all()
+
+
+def test_combine_compact_crossing_widths():
+    def stim_events(mstimes, anode, cathode):
+        return from_dict([{'mstime': mstime, 'type': 'STIM_ON',
+                           'stim_params': [{'anode_label': anode, 'cathode_label': cathode, 'amplitude': 0.5}] * 2}
+                          for mstime in mstimes])
+
+    short_anode = dtypes.compact(stim_events([1, 3], 'LA1', 'LA2'))
+    long_anode = dtypes.compact(stim_events([2], 'LAD10', 'LA'))
+    combined = EventCombiner([short_anode, long_anode]).combine()
+
+    assert list(combined.mstime) == [1, 2, 3]
+    assert list(combined.stim_params['anode_label'][:, 0]) == ['LA1', 'LAD10', 'LA1']
+    assert list(combined.stim_params['cathode_label'][:, 0]) == ['LA2', 'LA', 'LA2']
@@ -0,0 +1,91 @@
+import datetime
+import logging
+import os
+
+import numpy as np
+import pytest
+
+pyedflib = pytest.importorskip('pyedflib')
+
+from ..submission.readers.eeg_reader import EDF_reader
+
+LABELS = ['A1', 'A2', 'A3']
+SAMPLE_RATE = 256
+
+
+def write_edf(filename, seconds=10, start=None):
+    rng = np.random.RandomState(0)
+    data = [rng.randint(-2000, 2000, SAMPLE_RATE * seconds) for _ in LABELS]
+    writer = pyedflib.EdfWriter(filename, len(LABELS), file_type=pyedflib.FILETYPE_EDFPLUS)
+    try:
+        if start is not None:
+            writer.setStartdatetime(start)
+        # Physical and digital ranges are the same, so that samples read back exactly
+        writer.setSignalHeaders([{'label': label, 'dimension': 'uV', 'sample_frequency': SAMPLE_RATE,
+                                  'physical_min': -32768, 'physical_max': 32767,
+                                  'digital_min': -32768, 'digital_max': 32767, 'transducer': '', 'prefilter': ''}
+                                 for label in LABELS])
+        writer.writeSamples([channel.astype(float) for channel in data])
+    finally:
+        writer.close()
+    return data
+
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_split_edf(tmpdir, n_workers):
+    edf_filename = str(tmpdir.join('session.edf'))
+    data = write_edf(edf_filename)
+    reader = EDF_reader(edf_filename)
+    reader.SPLIT_WORKERS = n_workers
+    reader.split_data(str(tmpdir), 'R1001P_session', output='split', record_sources=False)
+
+    for channel, channel_data in enumerate(data):
+        split_file = str(tmpdir.join('noreref', 'R1001P_session.%03d' % channel))
+        np.testing.assert_array_equal(np.fromfile(split_file, reader.DATA_FORMAT), channel_data)
+    # The file is open again once the split is done
+    assert reader.get_n_samples() == len(data[0])
+
+
+def test_split_edf_missing_labels(tmpdir, caplog):
+    edf_filename = str(tmpdir.join('session.edf'))
+    write_edf(edf_filename)
+    jacksheet = tmpdir.join('jacksheet.txt')
+    jacksheet.write('1 A1\n2 A2\n3 A3\n4 B9\n')
+    reader = EDF_reader(edf_filename, str(jacksheet))
+
+    with caplog.at_level(logging.CRITICAL):
+        for output in ('split', 'hdf5'):
+            caplog.clear()
+            reader.split_data(str(tmpdir.join(output)), 'R1001P_session', output=output, record_sources=False)
+            assert 'label B9 not split' in caplog.text
+    assert os.path.exists(str(tmpdir.join('split', 'noreref', 'R1001P_session.001')))
+
+
+class NestedPoolError(Exception):
+    pass
+
+
+def no_nested_pool(*args, **kwargs):
+    raise NestedPoolError('A worker started a process pool of its own')
+
+
+def test_split_files_in_workers(tmpdir, monkeypatch):
+    from ..submission.configuration import config
+    from ..submission.events_tasks import SplitEEGTask
+    from ..submission.readers import eeg_reader
+
+    # Forked workers inherit the patch, so any reader that starts a pool of its own fails
+    monkeypatch.setattr(eeg_reader, 'ProcessPoolExecutor', no_nested_pool)
+    monkeypatch.setattr(config, 'eeg_output', 'split', raising=False)
+    monkeypatch.setattr(config, 'eeg_complevel', 0, raising=False)
+    jobs = []
+    for i in range(2):
+        edf_filename = str(tmpdir.join('session%d.edf' % i))
+        write_edf(edf_filename, start=datetime.datetime(2016, 1, 1, 10 + i))
+        jobs.append((edf_filename, None, None))
+
+    task = SplitEEGTask.__new__(SplitEEGTask)
+    task.subject, task.experiment, task.session = 'R1001P', 'FR1', 0
+    sources = task.split_files(jobs, str(tmpdir))
+    assert len(sources) == 2
+    assert len(tmpdir.join('noreref').listdir(lambda path: path.ext != '.json')) == 2 * len(LABELS)
@@ -0,0 +1,64 @@
+from ..submission.readers.eeg_writer import get_eeg_writer, SplitChannelWriter, HDF5ChannelWriter
+from ..submission.exc import EEGError
+import numpy as np
+import tables
+import pytest
+import os
+
+
+def write_channels(writer, channels, block_size=1000):
+    writer.set_channels(list(channels.keys()))
+    for channel, data in channels.items():
+        for start in range(0, len(data), block_size):
+            writer.write(channel, data[start:start + block_size], start)
+
+
+def random_channels(seed=0):
+    rng = np.random.RandomState(seed)
+    return {channel: rng.randint(-2000, 2000, n_samples).astype('int16')
+            for channel, n_samples in ((3, 70000), (1, 70000), (12, 69000))}
+
+
+def test_split_writer(tmpdir):
+    channels = random_channels()
+    with get_eeg_writer('split', str(tmpdir), 'test', 'int16') as writer:
+        write_channels(writer, channels)
+    assert writer.sources_info() == {}
+    for channel, data in channels.items():
+        np.testing.assert_array_equal(np.fromfile(str(tmpdir.join('test.%03d' % channel)), 'int16'), data)
+
+
+@pytest.mark.parametrize('complevel', [0, 4])
+def test_hdf5_writer(tmpdir, complevel):
+    channels = random_channels()
+    with get_eeg_writer('hdf5', str(tmpdir), 'test', 'int16', complevel) as writer:
+        write_channels(writer, channels)
+
+    info = writer.sources_info()['hdf5']
+    assert info['complevel'] == complevel
+    with tables.open_file(os.path.join(str(tmpdir), info['file'])) as h5file:
+        assert list(h5file.root.channels.read()) == [3, 1, 12]
+        assert h5file.root.data.chunkshape == tuple(info['chunk_shape']) == (3, HDF5ChannelWriter.CHUNK_SAMPLES)
+        n_samples = h5file.root.n_samples.read()
+        for row, channel in enumerate(h5file.root.channels.read()):
+            assert n_samples[row] == len(channels[channel])
+            np.testing.assert_array_equal(h5file.root.data[row, :n_samples[row]], channels[channel])
+
+
+def test_both_writers(tmpdir):
+    channels = random_channels()
+    with get_eeg_writer('both', str(tmpdir), 'test', 'int16') as writer:
+        write_channels(writer, channels)
+    assert 'hdf5' in writer.sources_info()
+    assert os.path.exists(os.path.join(str(tmpdir), 'test' + HDF5ChannelWriter.FILE_EXT))
+    np.testing.assert_array_equal(np.fromfile(str(tmpdir.join('test.012')), 'int16'), channels[12])
+
+
+def test_undeclared_channel(tmpdir):
+    writer = SplitChannelWriter(str(tmpdir), 'test', 'int16')
+    with pytest.raises(EEGError):
+        writer.write(1, np.zeros(10))
+    writer.set_channels([1])
+    with pytest.raises(EEGError):
+        writer.write(2, np.zeros(10))
+    writer.close()
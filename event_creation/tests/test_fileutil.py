@@ -0,0 +1,58 @@
+import os
+
+from ..submission import fileutil
+
+
+def test_clone_file_never_shares_data(tmpdir):
+    src = str(tmpdir.join('previous.bdf'))
+    dst = str(tmpdir.join('current.bdf'))
+    with open(src, 'wb') as f:
+        f.write(b'0 header')
+
+    link_type = fileutil.clone_file(src, dst)
+    assert link_type in ('reflink', None)
+    assert os.stat(src).st_nlink == 1
+    if link_type is None:
+        assert not os.path.exists(dst)
+    else:
+        # Editing the clone in place, as ScalpReader.repair_bdf_header does, leaves the original untouched
+        with open(dst, 'r+b') as f:
+            f.write(b'1')
+        with open(src, 'rb') as f:
+            assert f.read() == b'0 header'
+
+
+def test_file_cache(tmpdir):
+    reads = []
+
+    def read(filename, suffix=''):
+        reads.append((filename, suffix))
+        with open(filename) as f:
+            return f.read() + suffix
+
+    filenames = [str(tmpdir.join('%d.txt' % i)) for i in range(3)]
+    for i, filename in enumerate(filenames):
+        with open(filename, 'w') as f:
+            f.write(str(i))
+    cache = fileutil.FileCache(read, max_entries=2)
+
+    # Reused while the file is unchanged, read again once it changes or with other arguments
+    assert cache.get(filenames[0]) == '0'
+    assert cache.get(filenames[0]) == '0'
+    assert cache.get(filenames[0], '!') == '0!'
+    assert len(reads) == 2
+    with open(filenames[0], 'w') as f:
+        f.write('changed')
+    os.utime(filenames[0], (0, 0))
+    assert cache.get(filenames[0]) == 'changed'
+    assert len(reads) == 3
+
+    # Only the most recently used entries are kept
+    cache.get(filenames[1])
+    cache.get(filenames[0])
+    cache.get(filenames[2])
+    assert len(cache) == 2
+    del reads[:]
+    cache.get(filenames[0])
+    cache.get(filenames[1])
+    assert reads == [(filenames[1], '')]
@@ -0,0 +1,40 @@
+import numpy as np
+
+from ..submission.parsers.system2_log_parser import System2LogParser, HostLog
+from ..submission.alignment.system2 import System2TaskAligner
+
+
+def test_host_log(tmpdir):
+    host_log_file = str(tmpdir.join('host.log'))
+    with open(host_log_file, 'w') as f:
+        f.write('100~NEUROPORT-TIME~3000\n'
+                '110~OFFSET~50\n'
+                '120~STIM~E1:1~E2:2~AMP:1.5\n'
+                '130~NEUROPORT-TIME~6000\n'
+                '140~NEUROPORT-TIME~30\n'
+                '150~NEUROPORT-TIME~330\n'
+                '\n')
+    host_times, np_tics = System2LogParser.get_columns_by_type(host_log_file, 'NEUROPORT-TIME', [0, 2], int)
+    assert list(host_times) == [100, 130, 140, 150]
+    assert list(np_tics) == [3000, 6000, 30, 330]
+    assert System2LogParser.get_rows_by_type(host_log_file, 'STIM') == [['120', 'STIM', 'E1:1', 'E2:2', 'AMP:1.5']]
+
+    # The last time before the reset is left out
+    split_host, split_np = System2TaskAligner.split_np_times(host_times, np_tics)
+    assert [list(times) for times in split_host] == [[100], [140, 150]]
+    assert [list(times) for times in split_np] == [[3000], [30, 330]]
+
+
+def test_host_log_types():
+    host_log = HostLog(['100~STIM~' + 'A' * 250, '110', '120~NEUROPORT-TIME', '130~STIM~B'])
+    assert list(host_log.indices('STIM')) == [0, 3]
+    assert list(host_log.indices('NEUROPORT-TIME')) == [2]
+    assert list(host_log.indices('OFFSET')) == []
+    assert list(host_log.column('STIM', 0, int)) == [100, 130]
+    assert list(host_log.column('OFFSET', 0, int)) == []
+
+
+def test_align_source_to_dest():
+    source = np.array([-1, 5, 15, 25])
+    aligned = System2TaskAligner.align_source_to_dest(source, [(1, 0), (2, 0)], [0, 20])
+    assert list(aligned) == [-1, 5, 15, 50]
@@ -0,0 +1,22 @@
+from ..submission.lazy import lazy_import, MissingModule
+import subprocess
+import sys
+import pytest
+
+
+def test_deferred_until_used():
+    code = ("import sys\n"
+            "from event_creation.submission.lazy import lazy_import\n"
+            "json = lazy_import('json')\n"
+            "assert type(sys.modules['json']).__name__ == '_LazyModule'\n"
+            "assert json.loads('[1]') == [1]\n"
+            "assert type(sys.modules['json']).__name__ == 'module'\n")
+    subprocess.check_call([sys.executable, '-c', code])
+
+
+def test_missing_module():
+    module = lazy_import('not_an_installed_module.submodule')
+    assert isinstance(module, MissingModule)
+    assert not module
+    with pytest.raises(ImportError):
+        module.anything
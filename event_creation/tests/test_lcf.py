@@ -0,0 +1,64 @@
+from ..submission.cleaning.lcf import hurst_rs_2d, convolve_rows, reconstruction_matrix
+from scipy import linalg
+from scipy import signal as sp_signal
+from nolds import hurst_rs
+import numpy as np
+import collections
+
+
+def synthetic_channels(n_channels=6, n_samples=5000, seed=0):
+    rng = np.random.RandomState(seed)
+    noise = rng.randn(n_channels, n_samples)
+    data = np.vstack([noise[:n_channels // 2],
+                      np.cumsum(noise[n_channels // 2:], axis=1)])
+    # A flat channel, for which nolds returns NaN
+    data[-1] = 1.
+    return data
+
+
+def test_hurst_rs_2d():
+    data = synthetic_channels()
+    batched = hurst_rs_2d(data, fit='poly', block_size=4)
+    for row, hurst in zip(data, batched):
+        expected = hurst_rs(row, fit='poly')
+        if np.isnan(expected):
+            assert np.isnan(hurst)
+        else:
+            np.testing.assert_allclose(hurst, expected, rtol=1e-10)
+
+
+def test_convolve_rows():
+    rng = np.random.RandomState(1)
+    ctrl_signal = (rng.rand(5, 3000) > .99).astype(float)
+
+    dilator = np.ones(50)
+    dilated = convolve_rows(ctrl_signal, dilator)
+    for row, dilated_row in zip(ctrl_signal, dilated):
+        expected = np.convolve(row, dilator, 'same')
+        np.testing.assert_allclose(dilated_row, expected, atol=1e-9)
+        np.testing.assert_array_equal(dilated_row > .5, expected > 0)
+
+    trans_win = sp_signal.windows.hann(51, True)
+    trans_win /= trans_win.sum()
+    smoothed = convolve_rows(ctrl_signal, trans_win)
+    for row, smoothed_row in zip(ctrl_signal, smoothed):
+        np.testing.assert_allclose(smoothed_row, np.convolve(row, trans_win, 'same'), atol=1e-12)
+
+
+def test_reconstruction_matrix():
+    rng = np.random.RandomState(2)
+    n_channels = 8
+    ica = collections.namedtuple('ICA', ['pca_components_', 'mixing_matrix_', 'pca_mean_', 'pre_whitener_'])(
+        pca_components_=rng.randn(n_channels, n_channels),
+        mixing_matrix_=rng.randn(n_channels, n_channels),
+        pca_mean_=rng.randn(n_channels),
+        pre_whitener_=rng.rand(n_channels, 1),
+    )
+    sources = rng.randn(n_channels, 1000)
+
+    expected = np.dot(linalg.pinv(ica.pca_components_), np.dot(ica.mixing_matrix_, sources))
+    expected += ica.pca_mean_[:, None]
+    expected *= ica.pre_whitener_
+
+    mixing, offset = reconstruction_matrix(ica)
+    np.testing.assert_allclose(np.dot(mixing, sources) + offset, expected, rtol=1e-8, atol=1e-10)
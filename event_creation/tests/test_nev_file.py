@@ -0,0 +1,41 @@
+import struct
+
+import numpy as np
+
+from ..submission.readers.nsx_utility.brpylib import NevFile
+
+BYTES_IN_DATA_PACKETS = 104
+
+
+def write_nev(filename, packets):
+    extended_header = b'NEUEVWAV' + struct.pack('<HBBHHhhBBH8s', 1, 1, 1, 250, 0, 100, -100, 0, 2, 48, b'')
+    basic_header = struct.pack('<8s2BHIIII8H32s256sI', b'NEURALEV', 2, 3, 0, 336 + len(extended_header),
+                               BYTES_IN_DATA_PACKETS, 30000, 30000, 2020, 1, 3, 1, 12, 0, 0, 0, b'', b'', 1)
+    with open(filename, 'wb') as f:
+        f.write(basic_header + extended_header)
+        for time_stamp, packet_id, body in packets:
+            f.write((struct.pack('<IH', time_stamp, packet_id) + body).ljust(BYTES_IN_DATA_PACKETS, b'\0'))
+
+
+def test_nev_getdata(tmpdir):
+    filename = str(tmpdir.join('sync.nev'))
+    waveform = np.arange(48, dtype='<i2')
+    write_nev(filename, [(10, 0, struct.pack('<BBH', 1, 0, 5)),
+                         (20, 1, struct.pack('<BB', 2, 0) + waveform.tobytes()),
+                         (30, 0, struct.pack('<BBH', 129, 0, 0x1234)),
+                         (40, 0, struct.pack('<BBH', 1, 0, 6))])
+
+    output = NevFile(filename).getdata()
+    dig_events = output['dig_events']
+    assert dig_events['Reason'] == ['parallel', 'serial']
+    assert dig_events['TimeStamps'] == [[10, 40], [30]]
+    # Serial data only keeps the lower byte
+    assert dig_events['Data'] == [[5, 6], [0x34]]
+
+    spike_events = output['spike_events']
+    assert spike_events['ChannelID'] == [1]
+    assert spike_events['TimeStamps'] == [[20]]
+    assert spike_events['Classification'] == [[2]]
+    assert (spike_events['Waveforms'][0] == waveform * 250).all()
+
+    assert list(NevFile(filename).getdata(dig_events_only=True)) == ['dig_events']
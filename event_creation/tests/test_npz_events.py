@@ -0,0 +1,27 @@
+import numpy as np
+
+from ..submission.parsers import dtypes
+from ..submission.viewers.recarray import to_json, to_npz, from_npz, npz_columns
+
+
+def test_npz_round_trip(tmpdir):
+    dtype = ([(name, dtype) for name, _, dtype in dtypes.base_fields] +
+             [('stim_params', [(field[0], field[2]) for field in dtypes.stim_fields], (2,))])
+    events = np.zeros(3, dtype).view(np.recarray)
+    events.type = ['SESS_START', 'STIM_ON', 'SESS_END']
+    events.mstime = [1000, 1500.5, 2000]
+    events.stim_params['anode_label'][1] = 'LA1'
+    events.stim_params['amplitude'][1, 1] = 2.5
+
+    filename = str(tmpdir.join('task_events.npz'))
+    to_npz(events, filename)
+    loaded = from_npz(filename)
+    assert loaded.dtype == events.dtype
+    assert (loaded == events).all()
+    assert to_json(loaded) == to_json(events)
+
+    columns = npz_columns(filename)
+    assert isinstance(columns['type'], np.memmap)
+    assert list(columns['type']) == list(events.type)
+    assert columns['stim_params.amplitude'].shape == (3, 2)
+    assert columns['stim_params.amplitude'][1, 1] == 2.5
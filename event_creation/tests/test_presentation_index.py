@@ -0,0 +1,28 @@
+import numpy as np
+
+from ..submission.parsers.base_log_parser import PresentationIndex
+
+
+def make_events(types, words):
+    return np.rec.fromarrays([np.array(types, dtype='U16'), np.array(words, dtype='U64')],
+                             names=['type', 'item_name'])
+
+
+def test_presentation_index():
+    index = PresentationIndex('item_name', ('WORD', 'PRACTICE_WORD'))
+    events = make_events(['', 'PRACTICE_WORD', 'WORD', 'REC_WORD'], ['', 'CAT', 'DOG', 'DOG'])
+    assert list(index.rows('DOG', events)) == [2]
+    assert list(index.rows('CAT', events)) == [1]
+    assert len(index.rows('COW', events)) == 0
+
+    # Rows appended since the last lookup are indexed
+    events = np.append(events, make_events(['WORD', 'WORD'], ['COW', 'DOG'])).view(np.recarray)
+    assert list(index.rows('DOG', events)) == [2, 5]
+    assert list(index.rows('COW', events)) == [4]
+
+    # Reordered events are reindexed
+    events = events[::-1]
+    assert list(index.rows('DOG', events)) == [0, 3]
+    for word in ('CAT', 'DOG', 'COW'):
+        expected = np.flatnonzero((events.item_name == word) & np.isin(events.type, ['WORD', 'PRACTICE_WORD']))
+        assert list(index.rows(word, events)) == list(expected)
@@ -0,0 +1,75 @@
+import numpy as np
+
+from ..submission.parsers import dtypes
+from ..submission.parsers.ps_log_parser import PSSessionLogParser, PSHostLogParser
+
+
+def test_with_stim_off():
+    parser = PSSessionLogParser.__new__(PSSessionLogParser)
+    parser._jacksheet = {1: 'LA1', 2: 'LA2'}
+    parser._previous_stim_duration = 500
+
+    dtype = [(name, dtype) for name, _, dtype in dtypes.base_fields] + [
+        ('is_stim', 'b1'), ('stim_params', [(field[0], field[2]) for field in dtypes.stim_fields], (1,))]
+    stim_on = np.rec.array(np.zeros((), dtype))
+    stim_on.type = 'STIM_ON'
+    stim_on.mstime = 1000
+    stim_on.is_stim = True
+    parser.set_event_stim_params(stim_on, parser._jacksheet, anode_label='LA1', cathode_label='LA2',
+                                 stim_duration=500, stim_on=True)
+
+    stim_pair = parser.with_stim_off(stim_on)
+    assert list(stim_pair.type) == ['STIM_ON', 'STIM_OFF']
+    assert list(stim_pair.mstime) == [1000, 1500]
+    assert list(stim_pair.is_stim) == [True, False]
+    assert list(stim_pair.stim_params['stim_on'][:, 0]) == [True, False]
+    assert list(stim_pair.stim_params['anode_label'][:, 0]) == ['LA1', 'LA1']
+    # The STIM_ON event itself is left as it was
+    assert stim_on.type == 'STIM_ON' and stim_on.mstime == 1000
+
+
+def clean_events_by_membership(events):
+    """ PSHostLogParser.clean_events as it was, testing each event for membership in the stims to drop """
+    stim_event_indices = np.where(np.isin(events['type'], ('STIM', 'STIM_OFF', 'SHAM')))[0]
+    poll_events = np.where(events['type'] == 'NP_POLL')[0]
+    stim_before = np.array([index for index in stim_event_indices if index < poll_events[0] - 2])
+    stim_after = np.array([index for index in stim_event_indices if index > poll_events[-1] + 2])
+    good_range = np.array([index for index in range(len(events))
+                           if index not in stim_before and index not in stim_after])
+    cleaned_events = events[good_range]
+    cleaned_events = cleaned_events[cleaned_events['type'] != 'NP_POLL']
+    cleaned_events.sort(order='mstime')
+    return cleaned_events
+
+
+def host_events(types):
+    events = np.zeros(len(types), dtype=[('type', 'U16'), ('mstime', 'i8'), ('protocol', 'U8'), ('montage', 'U8'),
+                                         ('experiment', 'U8'), ('exp_version', 'U8')]).view(np.recarray)
+    events.type = types
+    # Out of order, so that the sort matters
+    events.mstime = np.random.RandomState(len(types)).permutation(len(types))
+    return events
+
+
+def test_clean_events_matches_membership():
+    parser = PSHostLogParser.__new__(PSHostLogParser)
+    parser._protocol, parser._montage, parser._experiment, parser._exp_version = 'r1', '0.0', 'PS2', '2.0'
+
+    # Stims 1, 2 and 3 rows before the first NP_POLL and after the last one
+    types = ['STIM', 'STIM_OFF', 'SHAM', 'STIM', 'NP_POLL', 'STIM', 'STIM_OFF', 'NP_POLL',
+             'STIM', 'STIM_OFF', 'SHAM', 'STIM']
+    events = host_events(types)
+    cleaned = parser.clean_events(events.copy())
+    expected = clean_events_by_membership(host_events(types))
+    assert list(cleaned.type) == list(expected.type)
+    assert list(cleaned.mstime) == list(expected.mstime)
+    assert (cleaned.protocol == 'r1').all()
+
+    random_state = np.random.RandomState(0)
+    for _ in range(50):
+        types = list(random_state.choice(['STIM', 'STIM_OFF', 'SHAM', 'NP_POLL', 'AD_CHECK'], 30))
+        types[random_state.randint(30)] = 'NP_POLL'
+        cleaned = parser.clean_events(host_events(types))
+        expected = clean_events_by_membership(host_events(types))
+        assert list(cleaned.type) == list(expected.type)
+        assert list(cleaned.mstime) == list(expected.mstime)
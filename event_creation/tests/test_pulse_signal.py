@@ -0,0 +1,41 @@
+from ..submission.readers.pulse_signal import ChannelDifference, MinMaxPyramid, find_peaks_in_selection
+import numpy as np
+
+
+def pulse_train(n_samples=200000, period=1000, width=20, seed=0):
+    rng = np.random.RandomState(seed)
+    t = np.arange(n_samples)
+    return (np.where(t % period < width, 500, 0) + rng.randint(-10, 10, n_samples)).astype('int16')
+
+
+def test_channel_difference(tmpdir):
+    channel_1, channel_2 = pulse_train(seed=1), pulse_train(seed=2)
+    for channel, data in ((1, channel_1), (2, channel_2)):
+        data.tofile(str(tmpdir.join('test.%03d' % channel)))
+    tmpdir.join('test.params.txt').write("dataformat 'int16'\ngain 0.5\n")
+
+    data = ChannelDifference.from_files(str(tmpdir.join('test.001')), str(tmpdir.join('test.002')))
+    expected = (channel_1.astype(float) - channel_2) * 0.5
+    assert len(data) == len(expected)
+    np.testing.assert_array_equal(data[1000:3000], expected[1000:3000])
+    np.testing.assert_array_equal(data[-5:], expected[-5:])
+
+
+def test_envelope():
+    signal = pulse_train()
+    pyramid = MinMaxPyramid(signal)
+    x, y = pyramid.envelope(0, len(signal), 1000)
+    assert len(y) <= 1000
+    # Every pulse survives decimation
+    assert y.max() == signal.max() and y.min() == signal.min()
+    assert pyramid.envelope(100, 600, 1000) is None
+
+
+def test_find_peaks():
+    signal = pulse_train()
+    peaks_x, peaks_y = find_peaks_in_selection(signal, 250, 1000)
+    # The first pulse starts the recording, so it is never crossed into
+    assert len(peaks_x) == 199
+    for x, y in zip(peaks_x, peaks_y):
+        start = x - x % 1000
+        assert y == signal[start:start + 20].max() == signal[x]
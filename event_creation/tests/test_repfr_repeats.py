@@ -0,0 +1,87 @@
+import numpy as np
+
+from ..submission.parsers import dtypes
+from ..submission.parsers.elemem_parsers import ElememRepFRParser
+
+FIELDS = dtypes.base_fields + dtypes.repFR_fields
+
+# (words presented as (item_num, item_name), recalls as (rectime, item_num, item_name)) for each list
+LISTS = [
+    ([(1, 'APPLE'), (2, 'BEAR'), (3, 'CORN')], [(500, 2, 'BEAR'), (900, 1, 'APPLE'), (1200, -1, 'ZEBRA'),
+                                                (1500, -1, '<>')]),
+    ([(1, 'APPLE'), (4, 'DOOR'), (2, 'BEAR')], [(400, 4, 'DOOR'), (800, 3, 'CORN')]),
+    ([(5, 'EGG'), (1, 'APPLE')], []),
+    ([(6, 'FISH'), (5, 'EGG'), (2, 'BEAR')], [(300, 6, 'FISH')]),
+    # Presented after the last recall
+    ([(3, 'CORN'), (6, 'FISH')], []),
+]
+
+
+class RepFRParser(ElememRepFRParser):
+    """ Just the recall and repeat handling of ElememRepFRParser, fed events directly rather than from event.log """
+
+    def __init__(self):
+        self._session = 0
+        self._trial = 0
+        self._n_events_at_last_recall = 0
+
+    @property
+    def _empty_event(self):
+        return np.rec.array(tuple(field[1] for field in FIELDS), dtype=[(field[0], field[2]) for field in FIELDS])
+
+    def _parse_ann_file(self, ann_id):
+        return LISTS[int(ann_id)][1]
+
+
+def modify_repeats_per_recall(events):
+    """ ElememRepFRParser.modify_repeats as it was, when it ran after every recall """
+    repeat_mask = [True if ev.item_num in events[:i][events[:i]["type"] == "WORD"].item_num else False
+                   for i, ev in enumerate(events)]
+    events.is_repeat[repeat_mask] = True
+
+    for w in np.unique(events[events["type"] == "WORD"]["item_name"]):
+        events.repeats[((events["type"] == "WORD") | (events["type"] == "REC_WORD")) & (events["item_name"] == w)] = \
+            len(events[(events["item_name"] == w) & (events["type"] == "WORD")])
+    return events
+
+
+def parse_session(parser, per_recall):
+    """ Adds events the way BaseLogParser.parse does, starting from an empty event that is dropped at the end """
+    events = parser._empty_event
+    mstime = 0
+    for trial, (words, _) in enumerate(LISTS):
+        parser._trial = trial
+        for item_num, item_name in words:
+            mstime += 1000
+            event = parser._empty_event
+            event.type, event.mstime, event['list'] = 'WORD', mstime, trial
+            event.item_num, event.item_name = item_num, item_name
+            events = np.append(events, event)
+        mstime += 1000
+        rec_start = parser._empty_event
+        rec_start.type, rec_start.mstime, rec_start['list'] = 'REC_START', mstime, trial
+        events = np.append(events, rec_start)
+
+        n_events = len(events)
+        events = parser.modify_recalls(events.view(np.recarray))
+        if per_recall and len(events) > n_events:
+            events = modify_repeats_per_recall(events)
+        mstime += 5000
+    return events[1:].view(np.recarray)
+
+
+def test_repeats_match_per_recall():
+    parser = RepFRParser()
+    events = parser.modify_repeats(parse_session(parser, per_recall=False))
+    expected = parse_session(RepFRParser(), per_recall=True)
+
+    assert list(events.type) == list(expected.type)
+    assert list(events.is_repeat) == list(expected.is_repeat)
+    assert list(events.repeats) == list(expected.repeats)
+
+    words = events[events.type == 'WORD']
+    # FISH is presented again after the last recall, which is not counted
+    assert list(words.repeats[words.item_name == 'FISH']) == [1, -999]
+    assert list(words.is_repeat[words['list'] == 1]) == [True, False, True]
+    recalls = events[events.type == 'REC_WORD']
+    assert list(recalls.repeats[recalls.item_name == 'APPLE']) == [3]
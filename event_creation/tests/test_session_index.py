@@ -0,0 +1,90 @@
+from ..submission.session_index import SessionIndex
+from ..submission.exc import IndexValueError
+import pytest
+
+
+INDEX = {
+    'protocols': {
+        'r1': {
+            'subjects': {
+                'R1001P': {
+                    'experiments': {
+                        'FR1': {
+                            'sessions': {
+                                '0': {'montage': '0.0', 'subject_alias': 'R1001P', 'original_session': 0},
+                                '1': {'montage': '0.0', 'subject_alias': 'R1001P', 'original_session': 1},
+                                '10': {'montage': '0.1', 'subject_alias': 'R1001P_1', 'original_session': 0},
+                            }
+                        },
+                        'PAL1': {
+                            'sessions': {
+                                '0': {'montage': '0.0', 'subject_alias': 'R1001P', 'original_experiment': 'PAL'},
+                            }
+                        },
+                    },
+                    'localizations': {
+                        '0': {'montages': {'0': {'subject_alias': 'R1001P', 'localization': 'ignored'},
+                                           '1': {'subject_alias': 'R1001P_1'}}},
+                    },
+                },
+                'R1002P': {
+                    'experiments': {
+                        'FR1': {'sessions': {'2': {'montage': '0.0', 'subject_alias': 'R1002P'}}},
+                    },
+                    'localizations': {'0': {'montages': {'0': {'subject_alias': 'R1002P'}}}},
+                },
+            }
+        }
+    }
+}
+
+
+def test_flattened_rows():
+    index = SessionIndex(INDEX)
+    assert len(index) == 8
+    assert index.subjects() == ['R1001P', 'R1002P']
+    assert index.experiments(subject='R1001P') == ['FR1', 'PAL1']
+    assert index.sessions(subject='R1001P', experiment='FR1') == [0, 1, 10]
+    assert index.sessions(subject='R1001P', experiment='FR1', montage='0.1') == [10]
+    # Columns from the nesting win over fields of the same name
+    assert index.get_value('localization', subject='R1001P', localization_montage='0') == '0'
+
+
+def test_localization_montages():
+    index = SessionIndex({'protocols': {'r1': {'subjects': {'R1003P': {
+        'experiments': {'FR1': {'sessions': {'0': {'montage': '0.0', 'subject_alias': 'R1003P'},
+                                             '1': {'montage': '0.1', 'subject_alias': 'R1003P_1'}}}},
+        'localizations': {'0': {'montages': {'0': {'subject_alias': 'R1003P'},
+                                             '1': {'subject_alias': 'R1003P_1'}}}},
+    }}}}})
+    assert index.montages(subject='R1003P') == ['0.0', '0.1']
+    assert index.values('localization_montage', subject='R1003P') == ['0', '1']
+    # As looked up by Automator.add_future_events_importers
+    localization, localization_montage = max(index.montages(subject='R1003P')).split('.')
+    assert index.get_value('subject_alias', subject='R1003P', localization=localization,
+                           localization_montage=localization_montage) == 'R1003P_1'
+
+
+def test_lookups():
+    index = SessionIndex(INDEX)
+    assert index.get_value('subject_alias', subject='R1001P', experiment='FR1', session='10') == 'R1001P_1'
+    assert index.values('original_session', subject_alias='R1001P', experiment='FR1') == [0, 1]
+    with pytest.raises(KeyError):
+        index.get_value('original_experiment', subject='R1001P', experiment='FR1', session=0)
+    with pytest.raises(ValueError):
+        index.get_value('subject_alias', subject='R1001P', experiment='FR1')
+    assert index.rows(subject='R9999X') == []
+
+
+def test_group_by():
+    index = SessionIndex(INDEX)
+    groups = index.group_by('experiment', 'subject', 'session')
+    assert list(groups.keys()) == [('FR1', 'R1001P', 0), ('FR1', 'R1001P', 1), ('FR1', 'R1001P', 10),
+                                   ('FR1', 'R1002P', 2), ('PAL1', 'R1001P', 0)]
+    record = index.row(groups[('PAL1', 'R1001P', 0)][0])
+    assert record['original_experiment'] == 'PAL'
+    assert record['protocol'] == 'r1'
+    assert list(index.group_by('subject', experiment='PAL1').keys()) == [('R1001P',)]
+    with pytest.raises(IndexValueError):
+        index.get_value('montage', subject='R1002P', experiment='PAL1')
+
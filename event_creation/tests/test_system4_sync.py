@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+
+from ..submission.alignment.system4 import System4Aligner, read_sync_markers
+from ..submission.readers.eeg_reader import read_edf_header
+
+
+def write_edf_header(filename, samples_per_record, n_records, record_duration=1):
+    nchan = len(samples_per_record)
+    header = ('0'.ljust(8) + ''.ljust(80) + ''.ljust(80) + '01.02.20' + '10.11.12' +
+              str(256 * (nchan + 1)).ljust(8) + ''.ljust(44) + str(n_records).ljust(8) +
+              str(record_duration).ljust(8) + str(nchan).ljust(4))
+    header += ''.join(field * nchan for field in (' ' * 16, ' ' * 80, ' ' * 8, '-3200'.ljust(8), '3200'.ljust(8),
+                                                  '-32768'.ljust(8), '32767'.ljust(8), ' ' * 80))
+    header += ''.join(str(n).ljust(8) for n in samples_per_record) + ' ' * 32 * nchan
+    with open(filename, 'wb') as f:
+        f.write(header.encode('ascii'))
+        f.write(b'\0' * 2 * sum(samples_per_record) * max(n_records, 3))
+
+
+def test_read_edf_header(tmpdir):
+    filename = str(tmpdir.join('recording.edf'))
+    write_edf_header(filename, [1000, 1000, 60], 5)
+    header = read_edf_header(filename)
+    assert header['sfreq'] == 1000
+    assert header['n_times'] == 5000
+    assert header['start_datetime'].year == 2020
+
+    # The number of records is inferred if it was never written
+    write_edf_header(filename, [500, 500], -1)
+    assert read_edf_header(filename)['n_times'] == 1500
+
+
+def test_read_sync_markers(tmpdir):
+    event_log = str(tmpdir.join('event.log'))
+    with open(event_log, 'w') as f:
+        f.write(json.dumps({'type': 'HEARTBEAT', 'time': 10}) + '\n\n')
+        f.write(json.dumps({'type': 'EEGSTART', 'time': 15}) + '\n')
+        f.write(json.dumps({'type': 'HEARTBEAT', 'time': 20, 'data': {'type': 'EEGSTART'}}) + '\n')
+    markers = read_sync_markers(event_log)
+    assert list(markers['HEARTBEAT']) == [10, 20]
+    assert list(markers['EEGSTART']) == [15]
+    assert System4Aligner.extract_eegstart(event_log) == 15
+
+    session_log = str(tmpdir.join('session.jsonl'))
+    with open(session_log, 'w') as f:
+        for time, sent in ((100, 'True'), (200, 'False'), (300, 'True')):
+            message = json.dumps({'type': 'HEARTBEAT', 'time': time, 'data': {'ok': True}})
+            f.write(json.dumps({'type': 'network', 'data': {'message': message, 'sent': sent}}) + '\n\n')
+    with open(session_log) as f:
+        contents = f.read()
+    heartbeats = System4Aligner.extract_heartbeats_unity(session_log)
+    assert isinstance(heartbeats, np.ndarray)
+    assert list(heartbeats) == [100, 300]
+    # The log is left as it was
+    with open(session_log) as f:
+        assert f.read() == contents
@@ -0,0 +1,17 @@
+from ..submission.task_stats import TaskStats
+import pytest
+
+
+def test_task_stats(tmpdir):
+    with TaskStats('Writing') as stats:
+        tmpdir.join('out.bin').write_binary(b'\0' * 2 ** 20)
+    info = stats.to_dict()
+    assert info['name'] == 'Writing' and not info['failed']
+    assert info['wall_time'] >= 0 and info['cpu_time'] >= 0
+    if info['written_bytes'] is not None:
+        assert info['written_bytes'] >= 2 ** 20
+
+    with pytest.raises(ValueError):
+        with TaskStats('Failing') as stats:
+            raise ValueError()
+    assert stats.to_dict()['failed']
@@ -0,0 +1,22 @@
+import pytest
+
+from ..submission.readers.wordpool import load_wordpool
+
+
+def test_wordpool(tmpdir):
+    filename = str(tmpdir.join('wordpool.txt'))
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write('APPLE\nCAFÉ\n\nZEBRA\nAPPLE\n')
+    wordpool = load_wordpool(filename, encoding='utf-8')
+    assert wordpool.item_num('APPLE') == 1
+    assert wordpool.item_num('ZEBRA') == 4
+    assert wordpool.item_num('CAFÉ') == wordpool.item_num('CAFE') == 2
+    assert wordpool.item_num('PEAR') == -1
+    with pytest.raises(ValueError):
+        wordpool.index('PEAR')
+
+    categorized_filename = str(tmpdir.join('categorized.txt'))
+    with open(categorized_filename, 'w') as f:
+        f.write('FRUIT PEAR\nANIMAL ZEBRA\n')
+    categorized = load_wordpool(categorized_filename, encoding='utf-8', column=1)
+    assert categorized.item_num('ZEBRA') == 2
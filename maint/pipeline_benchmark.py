@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+"""
+Replays a session through build_split_pipeline and build_events_pipeline, using a local fixture directory in place
+of rhino, and reports the time, CPU, memory and I/O of every step of each pipeline (as saved in the 'task_stats' of
+the session's index.json). Results can be saved as a baseline, and later runs compared against it to find per-task
+regressions.
+
+    python maint/pipeline_benchmark.py <fixture_root> code=R1001P:experiment=FR1:session=0:montage=0.0 \\
+        [--repeat N] [--baseline stats.json] [--save-baseline stats.json] [--tolerance 0.2]
+
+The fixture root is laid out like the root of rhino (data/eeg/<subject>/..., protocols/..., etc.) and needs to
+contain everything the transfer configuration expects for the session, e.g. a synthetic session built for testing
+or a copy of a real one. Outputs are written to a temporary database root, which is removed afterwards unless
+--keep is given. Exits with status 1 if any regression is found.
+"""
+
+from argparse import ArgumentParser
+from collections import OrderedDict
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_creation.submission.configuration import paths
+from event_creation.submission.pipelines import build_split_pipeline, build_events_pipeline
+
+PIPELINES = OrderedDict([
+    ('split', build_split_pipeline),
+    ('events', build_events_pipeline),
+])
+
+# Metrics compared against the baseline, and the smallest increase of each that counts as a regression
+METRICS = OrderedDict([
+    ('wall_time', .1),
+    ('cpu_time', .1),
+    ('peak_rss', 2 ** 20 * 10),
+    ('read_bytes', 2 ** 20),
+    ('written_bytes', 2 ** 20),
+])
+
+parser = ArgumentParser()
+parser.add_argument("fixture_root",
+                    help="directory laid out like rhino_root, containing the session's files")
+parser.add_argument("inputs",
+                    help="session to import, as key=value pairs separated by ':' "
+                         "(e.g. code=R1001P:experiment=FR1:session=0:montage=0.0)")
+parser.add_argument("--pipelines", nargs="+", default=list(PIPELINES.keys()), choices=list(PIPELINES.keys()),
+                    help="pipelines to run, in order")
+parser.add_argument("--repeat", "-r", type=int, default=1,
+                    help="number of times to run each pipeline. The lowest value of each metric is reported")
+parser.add_argument("--baseline", help="stats saved by an earlier run with --save-baseline, to compare against")
+parser.add_argument("--save-baseline", help="file to save the stats of this run to")
+parser.add_argument("--tolerance", type=float, default=.2,
+                    help="fraction by which a metric may exceed the baseline before it is reported as a regression")
+parser.add_argument("--db-root", help="database root to write to (otherwise a temporary directory)")
+parser.add_argument("--keep", action="store_true", help="don't remove the temporary database root")
+
+
+def parse_inputs(inputs):
+    """
+    :return: keyword arguments for the pipeline builders
+    """
+    kwargs = dict(item.split('=', 1) for item in inputs.split(':'))
+    kwargs['subject'] = kwargs.get('subject', kwargs['code'].split('_')[0])
+    kwargs['session'] = int(kwargs['session'])
+    kwargs.setdefault('original_session', kwargs['session'])
+    kwargs.setdefault('montage', '0.0')
+    kwargs.setdefault('protocol', 'r1')
+    return kwargs
+
+
+def set_paths(fixture_root, db_root):
+    fixture_root = os.path.abspath(fixture_root)
+    paths.set('rhino_root', fixture_root)
+    paths.set('data_root', os.path.join(fixture_root, 'data', 'eeg'))
+    paths.set('events_root', os.path.join(fixture_root, 'data', 'events'))
+    paths.set('loc_db_root', os.path.join(fixture_root, 'home2', 'RAM_maint', 'stim'))
+    paths.set('db_root', db_root)
+
+
+def run_pipeline(build, kwargs):
+    """
+    :return: OrderedDict of {step name: stats} for one run of the pipeline
+    """
+    kwargs = dict(kwargs)
+    subject, montage, experiment, session = [kwargs.pop(key) for key in ('subject', 'montage', 'experiment',
+                                                                        'session')]
+    pipeline = build(subject, montage, experiment, session, **kwargs)
+    pipeline.run(force=True)
+    if pipeline.transferer.transfer_aborted:
+        raise RuntimeError('{} did not run: nothing to transfer'.format(build.__name__))
+    return OrderedDict((stats.name, stats.to_dict()) for stats in pipeline.task_stats)
+
+
+def best_of(runs):
+    """
+    :return: the lowest value of each metric of each step over several runs
+    """
+    best = OrderedDict()
+    for run in runs:
+        for name, stats in run.items():
+            if name not in best:
+                best[name] = OrderedDict((metric, stats.get(metric)) for metric in METRICS)
+            else:
+                for metric in METRICS:
+                    if stats.get(metric) is not None:
+                        best[name][metric] = min(best[name][metric], stats[metric])
+    return best
+
+
+def find_regressions(results, baseline, tolerance):
+    """
+    :return: list of (pipeline, step, metric, baseline value, new value)
+    """
+    regressions = []
+    for pipeline, steps in results.items():
+        for name, stats in steps.items():
+            previous = baseline.get(pipeline, {}).get(name)
+            if previous is None:
+                continue
+            for metric, min_increase in METRICS.items():
+                new, old = stats.get(metric), previous.get(metric)
+                if new is None or old is None:
+                    continue
+                if new > old * (1 + tolerance) and new - old > min_increase:
+                    regressions.append((pipeline, name, metric, old, new))
+    return regressions
+
+
+def format_value(metric, value):
+    if value is None:
+        return '-'
+    if metric.endswith('time'):
+        return '{:.2f} s'.format(value)
+    return '{:.1f} MB'.format(value / 2. ** 20)
+
+
+def report(results, baseline):
+    for pipeline, steps in results.items():
+        print(pipeline)
+        print('    {:<40} '.format('step') + ' '.join('{:>14}'.format(metric) for metric in METRICS))
+        for name, stats in steps.items():
+            print('    {:<40} '.format(name[:40]) +
+                  ' '.join('{:>14}'.format(format_value(metric, stats[metric])) for metric in METRICS))
+            previous = baseline.get(pipeline, {}).get(name)
+            if previous:
+                print('    {:<40} '.format('  (baseline)') +
+                      ' '.join('{:>14}'.format(format_value(metric, previous.get(metric))) for metric in METRICS))
+
+
+def main():
+    args = parser.parse_args()
+    kwargs = parse_inputs(args.inputs)
+    db_root = args.db_root or tempfile.mkdtemp(prefix='pipeline_benchmark_')
+    set_paths(args.fixture_root, db_root)
+    results = OrderedDict()
+    try:
+        for pipeline in args.pipelines:
+            results[pipeline] = best_of([run_pipeline(PIPELINES[pipeline], kwargs) for _ in range(args.repeat)])
+    finally:
+        if not args.db_root and not args.keep:
+            shutil.rmtree(db_root, ignore_errors=True)
+
+    baseline = json.load(open(args.baseline)) if args.baseline else {}
+    report(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    regressions = find_regressions(results, baseline, args.tolerance)
+    for pipeline, name, metric, old, new in regressions:
+        print('REGRESSION {} / {}: {} {} -> {}'.format(pipeline, name, metric, format_value(metric, old),
+                                                       format_value(metric, new)))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
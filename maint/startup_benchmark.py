@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Measures how long it takes to import the entry points of the submission package, and which heavy dependencies get
+loaded just by importing them. Each import is timed in a fresh interpreter with python -X importtime.
+
+    python maint/startup_benchmark.py [--repeat N] [--top N] [module ...]
+"""
+
+from argparse import ArgumentParser
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    'event_creation.submission.configuration',
+    'event_creation.submission.log',
+    'event_creation.submission.readers.eeg_reader',
+    'event_creation.submission.parsers.base_log_parser',
+    'event_creation.submission.events_tasks',
+    'event_creation.submission.automation',
+    'event_creation.submission.convenience',
+]
+
+# Dependencies that should only be loaded once something uses them
+HEAVY_MODULES = ['mne', 'tables', 'pyedflib', 'pandas', 'scipy.stats', 'scipy.signal', 'scipy.io', 'scipy.linalg',
+                 'matplotlib', 'ptsa', 'requests']
+
+# Run in the child interpreter: times the import, then prints which heavy modules were actually executed, rather
+# than just deferred
+CHILD = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print('TOTAL %f' % (time.perf_counter() - start))
+for name in {heavy!r}:
+    module = sys.modules.get(name)
+    if module is not None and type(module).__name__ != '_LazyModule':
+        print('LOADED ' + name)
+"""
+
+parser = ArgumentParser()
+parser.add_argument("modules", nargs="*", default=MODULES,
+                    help="modules to time (otherwise the submission entry points)")
+parser.add_argument("--repeat", "-r", type=int, default=5,
+                    help="number of times to import each module. The fastest time is reported")
+parser.add_argument("--top", "-t", type=int, default=5,
+                    help="number of slowest modules (by time spent in the module itself) to list")
+
+
+def time_import(module):
+    """
+    :return: (import time in seconds, [(seconds, name)] of the time spent in each imported module itself,
+              [heavy modules loaded])
+    """
+    child = CHILD.format(module=module, heavy=HEAVY_MODULES)
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', child], cwd=ROOT,
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip().splitlines()[-1])
+    imports = []
+    for line in process.stderr.splitlines():
+        if line.startswith('import time:') and 'self [us]' not in line:
+            self_time, _, name = line[len('import time:'):].split('|')
+            imports.append((int(self_time) / 1e6, name.strip()))
+    output = process.stdout.splitlines()
+    total = [float(line.split()[1]) for line in output if line.startswith('TOTAL ')][0]
+    loaded = [line.split()[1] for line in output if line.startswith('LOADED ')]
+    return total, imports, loaded
+
+
+def main():
+    args = parser.parse_args()
+    for module in args.modules:
+        try:
+            runs = [time_import(module) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print("{:<55} failed: {}".format(module, e))
+            continue
+        total, imports, loaded = min(runs, key=lambda run: run[0])
+        print("{:<55} {:8.3f} s".format(module, total))
+        for seconds, name in sorted(imports, reverse=True)[:args.top]:
+            print("    {:<51} {:8.3f} s".format(name, seconds))
+        if loaded:
+            print("    heavy modules loaded: {}".format(', '.join(loaded)))
+
+
+if __name__ == "__main__":
+    main()